@@ -0,0 +1,140 @@
+"""
+JWT authentication classes.
+
+``StatelessJWTAuthentication`` avoids the per-request ``User`` query:
+
+- Safe methods (GET/HEAD/OPTIONS) get a ``ClaimsUser`` that answers the
+  identity claims (``user_id``, ``username``) from the token. Everything else
+  (``email``, ``is_tour_operator``, ``bio``...) can change during the token's
+  lifetime, so it is read from the real user, loaded lazily.
+- Unsafe methods get the real ``User``, served from the cache for
+  ``AUTH_USER_CACHE_TIMEOUT`` seconds.
+
+The real user is checked for revocation whenever it is loaded: deactivated
+users are refused, and tokens carry a hash of the password
+(``CHECK_REVOKE_TOKEN``), so changing the password invalidates every
+outstanding token. That covers all writes and any read that touches the user
+(e.g. the profile); reads answered from the identity claims alone keep working
+until the token expires. Saving a user drops its cache entry, so deactivation
+and password changes apply at once in this process and within the TTL in
+others.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from app.core.metrics import JWT_AUTH_LATENCY
+
+User = get_user_model()
+
+
+def user_cache_key(user_id):
+    return f'authuser:{user_id}'
+
+
+def get_cached_user(user_id):
+    """The ``User`` row for ``user_id`` via the cache; ``None`` if it does not exist."""
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is not None:
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+    return user
+
+
+def check_revocation(user, validated_token):
+    """Refuse ``validated_token`` if ``user`` was deactivated or changed password since it was issued."""
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+    if api_settings.CHECK_REVOKE_TOKEN and \
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+        raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+
+def profile_cache_key(user_id):
+    return f'profile:{user_id}'
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    cache.delete_many([user_cache_key(instance.pk), profile_cache_key(instance.pk)])
+
+
+class ClaimsUser(TokenUser):
+    """Authenticated user backed by token claims, falling back to the database."""
+
+    # Claims that are safe to trust for the token's lifetime.
+    IDENTITY_CLAIMS = frozenset({'username'})
+
+    @property
+    def id(self):
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def db_user(self):
+        """The real ``User``, loaded on first use and checked for revocation."""
+        user = get_cached_user(self.id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        check_revocation(user, self.token)
+        return user
+
+    @property
+    def is_active(self):
+        return self.db_user.is_active
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        if attr in self.IDENTITY_CLAIMS and attr in self.token:
+            return self.token[attr]
+        return getattr(self.db_user, attr)
+
+
+class TimedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that reports token validation time to Prometheus."""
+
+    def authenticate(self, request):
+        if self.get_header(request) is None:
+            return None
+        started = time.perf_counter()
+        try:
+            return super().authenticate(request)
+        finally:
+            JWT_AUTH_LATENCY.observe(time.perf_counter() - started)
+
+
+class StatelessJWTAuthentication(TimedJWTAuthentication):
+    # DRF instantiates authenticators per request, so this is request-scoped.
+    stateless = False
+
+    def authenticate(self, request):
+        self.stateless = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        if self.stateless:
+            return ClaimsUser(validated_token)
+
+        user = get_cached_user(validated_token[api_settings.USER_ID_CLAIM])
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        check_revocation(user, validated_token)
+        return user
+
+
+class TimedJWTAuthenticationScheme(SimpleJWTScheme):
+    target_class = TimedJWTAuthentication
+    match_subclasses = True
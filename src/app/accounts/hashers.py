@@ -0,0 +1,45 @@
+"""
+Password hashers with cost parameters taken from settings.
+
+They keep Django's algorithm names, so existing hashes still verify. Django
+rehashes a password on the next successful login whenever its hasher is not
+the first entry of ``PASSWORD_HASHERS`` or its stored parameters differ from
+the configured ones (``must_update``). Switching ``PASSWORD_HASHER`` or
+retuning the costs (see ``manage.py benchmark_hashers``) therefore upgrades
+users gradually as they log in, with no migration.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+def measure_ms(hasher, samples=3, password='correct horse battery staple'):
+    """Median milliseconds for one ``encode`` (verification costs the same)."""
+    timings = []
+    for _ in range(samples):
+        salt = hasher.salt()
+        started = time.perf_counter()
+        hasher.encode(password, salt)
+        timings.append((time.perf_counter() - started) * 1000)
+    return sorted(timings)[len(timings) // 2]
@@ -0,0 +1,122 @@
+"""
+Management command to measure password hashing cost on this machine and
+recommend hasher parameters for a per-login latency budget.
+
+Run: python src/manage.py benchmark_hashers
+     python src/manage.py benchmark_hashers --budget-ms 150 --samples 5
+     python src/manage.py benchmark_hashers --memory-costs 19456,65536 --parallelism 1
+
+Run it on the target instance: costs scale with its CPU and memory bandwidth.
+The recommendation is the strongest setting that still fits the budget; paste
+the printed variables into the environment and users are rehashed to them on
+their next login.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from app.accounts.hashers import TunedArgon2PasswordHasher, TunedPBKDF2PasswordHasher, measure_ms
+
+# OWASP minimums: Argon2id 19 MiB / 2 passes, PBKDF2-SHA256 600k iterations.
+MIN_ARGON2_MEMORY_COST = 19456
+MIN_ARGON2_TIME_COST = 2
+MIN_PBKDF2_ITERATIONS = 600000
+
+
+class _Argon2(TunedArgon2PasswordHasher):
+    def __init__(self, time_cost, memory_cost, parallelism):
+        self._params = (time_cost, memory_cost, parallelism)
+
+    time_cost = property(lambda self: self._params[0])
+    memory_cost = property(lambda self: self._params[1])
+    parallelism = property(lambda self: self._params[2])
+
+
+class _PBKDF2(TunedPBKDF2PasswordHasher):
+    def __init__(self, iterations):
+        self._iterations = iterations
+
+    iterations = property(lambda self: self._iterations)
+
+
+class Command(BaseCommand):
+    help = "Measure password hasher cost and recommend parameters for a latency budget"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--budget-ms", type=float, default=100,
+                            help="Target time for one hash (one login) on an idle core")
+        parser.add_argument("--samples", type=int, default=3, help="Hashes timed per setting (median is used)")
+        parser.add_argument("--memory-costs", default="19456,47104,65536,102400",
+                            help="Comma-separated Argon2 memory costs (KiB) to try")
+        parser.add_argument("--max-time-cost", type=int, default=6)
+        parser.add_argument("--parallelism", type=int, default=1,
+                            help="Argon2 lanes; concurrent logins already compete for the cores")
+
+    def handle(self, *args, **options):
+        budget, samples = options["budget_ms"], options["samples"]
+        if budget <= 0 or samples < 1:
+            raise CommandError("--budget-ms and --samples must be positive")
+        try:
+            memory_costs = sorted(int(cost) for cost in options["memory_costs"].split(","))
+        except ValueError:
+            raise CommandError("--memory-costs must be a comma-separated list of integers")
+
+        current = get_hasher()
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Configured: {settings.PASSWORD_HASHER} ({current.algorithm}) "
+            f"{measure_ms(current, samples):.1f}ms per hash"
+        ))
+
+        argon2 = self._recommend_argon2(memory_costs, options["max_time_cost"], options["parallelism"], budget, samples)
+        pbkdf2 = self._recommend_pbkdf2(budget, samples)
+
+        self.stdout.write("")
+        if argon2:
+            time_cost, memory_cost, parallelism, ms = argon2
+            self.stdout.write(self.style.SUCCESS(f"✓ Argon2 within {budget:g}ms ({ms:.1f}ms):"))
+            self.stdout.write("    PASSWORD_HASHER=argon2")
+            self.stdout.write(f"    PASSWORD_ARGON2_TIME_COST={time_cost}")
+            self.stdout.write(f"    PASSWORD_ARGON2_MEMORY_COST={memory_cost}")
+            self.stdout.write(f"    PASSWORD_ARGON2_PARALLELISM={parallelism}")
+            if memory_cost < MIN_ARGON2_MEMORY_COST or time_cost < MIN_ARGON2_TIME_COST:
+                self.stdout.write(self.style.WARNING("  ! Below the OWASP minimum; consider a larger budget."))
+        else:
+            self.stdout.write(self.style.WARNING(f"No tried Argon2 setting fits {budget:g}ms."))
+
+        iterations, ms = pbkdf2
+        if ms > budget:
+            self.stdout.write(self.style.WARNING(f"No PBKDF2 setting fits {budget:g}ms; the lowest tried:"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✓ PBKDF2 within {budget:g}ms ({ms:.1f}ms):"))
+        self.stdout.write("    PASSWORD_HASHER=pbkdf2")
+        self.stdout.write(f"    PASSWORD_PBKDF2_ITERATIONS={iterations}")
+        if iterations < MIN_PBKDF2_ITERATIONS:
+            self.stdout.write(self.style.WARNING(
+                f"  ! Below the OWASP minimum of {MIN_PBKDF2_ITERATIONS}; prefer Argon2 on this machine."
+            ))
+
+    def _recommend_argon2(self, memory_costs, max_time_cost, parallelism, budget, samples):
+        """Strongest (memory x passes) setting under budget, as (time_cost, memory_cost, parallelism, ms)."""
+        best = None
+        for memory_cost in memory_costs:
+            for time_cost in range(1, max_time_cost + 1):
+                ms = measure_ms(_Argon2(time_cost, memory_cost, parallelism), samples)
+                self.stdout.write(f"  argon2  m={memory_cost:>7} t={time_cost} p={parallelism}  {ms:8.1f}ms")
+                if ms > budget:
+                    break
+                if best is None or memory_cost * time_cost > best[1] * best[0]:
+                    best = (time_cost, memory_cost, parallelism, ms)
+        return best
+
+    def _recommend_pbkdf2(self, budget, samples, attempts=5):
+        """Iterations scaled from a probe, then scaled down until a measured hash fits the budget."""
+        probe = 100000
+        ms = measure_ms(_PBKDF2(probe), samples)
+        iterations = probe
+        for _ in range(attempts):
+            # Cost is roughly linear in iterations; aim 5% under to absorb timing noise.
+            iterations = max(1000, int(iterations * budget * 0.95 / ms) // 1000 * 1000)
+            ms = measure_ms(_PBKDF2(iterations), samples)
+            self.stdout.write(f"  pbkdf2  i={iterations:>9}        {ms:8.1f}ms")
+            if ms <= budget or iterations == 1000:
+                break
+        return iterations, ms
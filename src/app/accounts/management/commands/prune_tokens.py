@@ -0,0 +1,54 @@
+"""
+Management command to delete expired refresh tokens from the blacklist tables.
+
+Every refresh adds an outstanding token and blacklists the previous one, so the
+tables grow with usage. Rows past ``expires_at`` can never validate again and
+are removed in batches (oldest first, each batch its own short transaction) so
+the job never holds a long lock on a busy database. Schedule it daily, e.g. as
+a PythonAnywhere scheduled task.
+
+Run: python src/manage.py prune_tokens
+     python src/manage.py prune_tokens --batch-size 500 --dry-run
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding and blacklisted JWT refresh tokens in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be deleted")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive")
+
+        now = timezone.now()
+        # Tokens share one lifetime, so id order is expiry order and each
+        # batch is found at the start of the primary key index.
+        expired = OutstandingToken.objects.filter(expires_at__lte=now).order_by("id")
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"Would delete {expired.count()} outstanding token(s), "
+                f"{BlacklistedToken.objects.filter(token__expires_at__lte=now).count()} blacklisted."
+            )
+            return
+
+        outstanding = blacklisted = 0
+        while True:
+            ids = list(expired.values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                blacklisted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+                outstanding += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Deleted {outstanding} expired outstanding token(s) and {blacklisted} blacklisted token(s)"
+        ))
@@ -0,0 +1,8 @@
+from rest_framework.permissions import BasePermission
+
+
+class IsTourOperator(BasePermission):
+    message = 'Only tour operators can use this endpoint.'
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and request.user.is_tour_operator)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .tokens import CachedRefreshToken
 
 User = get_user_model()
 
@@ -32,6 +33,8 @@ class RegisterSerializer(serializers.ModelSerializer):
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = CachedRefreshToken
+
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
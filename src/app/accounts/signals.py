@@ -0,0 +1,8 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from .authentication import invalidate_cached_user
+
+User = get_user_model()
+
+post_save.connect(invalidate_cached_user, sender=User, dispatch_uid='accounts_invalidate_cached_user_save')
+post_delete.connect(invalidate_cached_user, sender=User, dispatch_uid='accounts_invalidate_cached_user_delete')
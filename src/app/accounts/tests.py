@@ -2,7 +2,21 @@ from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, override_settings
+from django.core.management import call_command
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from prometheus_client import REGISTRY
+from .authentication import ClaimsUser, StatelessJWTAuthentication
+from .tokens import CachedRefreshToken
+from app.core.testing import ScaledCatalogueMixin
 
 User = get_user_model()
 
@@ -56,4 +70,265 @@ class AccountsAPITest(TestCase):
         self.client.force_authenticate(user=user)
         response = self.client.get(self.profile_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['username'], 'profuser')
+        self.assertEqual(response.json()['username'], 'profuser')
+
+    def test_jwt_authentication_is_timed(self):
+        User.objects.create_user(username='timed', email='timed@example.com', password='SecurePass123')
+        token = self.client.post(self.login_url, {'username': 'timed', 'password': 'SecurePass123'}).data['access']
+        before = REGISTRY.get_sample_value('api_jwt_authentication_duration_seconds_count')
+        response = self.client.get(self.profile_url, HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(REGISTRY.get_sample_value('api_jwt_authentication_duration_seconds_count'), before + 1)
+
+
+class StatelessJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='operator', email='op@example.com', password='SecurePass123', is_tour_operator=True,
+        )
+        self.token = self.client.post(
+            '/api/v1/auth/login/', {'username': 'operator', 'password': 'SecurePass123'},
+        ).data['access']
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {self.token}'}
+
+    def test_reads_authenticate_from_claims_without_queries(self):
+        request = RequestFactory().get('/api/v1/attractions/', **self.auth)
+        with self.assertNumQueries(0):
+            user, _ = StatelessJWTAuthentication().authenticate(request)
+            self.assertIsInstance(user, ClaimsUser)
+            self.assertEqual((user.pk, user.username), (self.user.pk, 'operator'))
+
+    def test_mutable_claims_come_from_the_database(self):
+        User.objects.filter(pk=self.user.pk).update(email='new@example.com', is_tour_operator=False)
+        request = RequestFactory().get('/api/v1/attractions/', **self.auth)
+        user, _ = StatelessJWTAuthentication().authenticate(request)
+        self.assertEqual(user.email, 'new@example.com')
+        self.assertFalse(user.is_tour_operator)
+
+    def test_profile_falls_back_to_cached_user(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/auth/profile/', **self.auth)
+        self.assertEqual(response.json()['id'], self.user.pk)
+        with self.assertNumQueries(0):
+            self.client.get('/api/v1/auth/profile/', **self.auth)
+
+    def test_password_change_revokes_token_for_writes(self):
+        response = self.client.patch('/api/v1/auth/profile/', {'bio': 'Guide'}, **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.set_password('AnotherPass456')
+        self.user.save()
+        response = self.client.patch('/api/v1/auth/profile/', {'bio': 'Guide'}, **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_inactive_user_cannot_write(self):
+        self.client.patch('/api/v1/auth/profile/', {'bio': 'Guide'}, **self.auth)  # caches the user
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.patch('/api/v1/auth/profile/', {'bio': 'Guide'}, **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revoked_token_cannot_read_profile(self):
+        self.assertEqual(self.client.get('/api/v1/auth/profile/', **self.auth).status_code, status.HTTP_200_OK)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get('/api/v1/auth/profile/', **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.user.is_active = True
+        self.user.set_password('AnotherPass456')
+        self.user.save()
+        response = self.client.get('/api/v1/auth/profile/', **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_claims_user_reports_deactivation(self):
+        request = RequestFactory().get('/api/v1/attractions/', **self.auth)
+        user, _ = StatelessJWTAuthentication().authenticate(request)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            user.is_active
+
+
+class TokenRevocationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='rotator', email='rot@example.com', password='SecurePass123')
+        self.refresh = self.client.post(
+            '/api/v1/auth/login/', {'username': 'rotator', 'password': 'SecurePass123'},
+        ).data['refresh']
+
+    def test_rotated_refresh_token_is_rejected_from_cache(self):
+        response = self.client.post('/api/v1/auth/token/refresh/', {'refresh': self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('refresh', response.data)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+        with self.assertNumQueries(0):
+            with self.assertRaises(TokenError):
+                CachedRefreshToken(self.refresh)
+        response = self.client.post('/api/v1/auth/token/refresh/', {'refresh': self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_blacklist_recorded_by_another_process_is_found_and_cached(self):
+        CachedRefreshToken(self.refresh).blacklist()
+        cache.clear()
+        with self.assertRaises(TokenError):
+            CachedRefreshToken(self.refresh)
+        with self.assertNumQueries(0):
+            with self.assertRaises(TokenError):
+                CachedRefreshToken(self.refresh)
+
+    def test_prune_tokens_deletes_only_expired(self):
+        CachedRefreshToken(self.refresh).blacklist()
+        live = OutstandingToken.objects.create(
+            user=self.user, jti='live', token='live', expires_at=timezone.now() + timedelta(days=1),
+        )
+        OutstandingToken.objects.exclude(pk=live.pk).update(expires_at=timezone.now() - timedelta(minutes=1))
+        out = StringIO()
+        call_command('prune_tokens', '--batch-size', '1', stdout=out)
+        self.assertIn('Deleted 1 expired outstanding token(s) and 1 blacklisted', out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.all()), [live])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+class LoginThrottleTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_repeated_failed_logins_are_throttled(self):
+        for _ in range(10):
+            response = self.client.post('/api/v1/auth/login/', {'username': 'victim', 'password': 'guess'})
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post('/api/v1/auth/login/', {'username': 'victim', 'password': 'guess'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+    def test_username_is_limited_across_ips(self):
+        for n in range(10):
+            self.client.post('/api/v1/auth/login/', {'username': 'Victim', 'password': 'guess'}, REMOTE_ADDR=f'10.0.0.{n}')
+        response = self.client.post('/api/v1/auth/login/', {'username': 'victim', 'password': 'guess'}, REMOTE_ADDR='10.0.1.1')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_forged_forwarded_for_does_not_reset_the_limit(self):
+        def register(n, forwarded_for):
+            return self.client.post('/api/v1/auth/register/', {'username': f'bot{n}'},
+                                    REMOTE_ADDR='10.0.0.9', HTTP_X_FORWARDED_FOR=forwarded_for)
+
+        for num_proxies, forwarded_for in [(0, '203.0.113.{n}'), (1, '203.0.113.{n}, 10.0.0.9')]:
+            cache.clear()
+            with self.subTest(num_proxies=num_proxies), \
+                    override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': num_proxies}):
+                statuses = [register(n, forwarded_for.format(n=n)).status_code for n in range(6)]
+                self.assertNotIn(status.HTTP_429_TOO_MANY_REQUESTS, statuses[:5])
+                self.assertEqual(statuses[5], status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+@override_settings(PASSWORD_ARGON2_TIME_COST=1, PASSWORD_ARGON2_MEMORY_COST=1024, PASSWORD_ARGON2_PARALLELISM=1,
+                   PASSWORD_PBKDF2_ITERATIONS=1000)
+class PasswordHasherTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_old_hash_is_upgraded_on_login(self):
+        hashers = list(settings.PASSWORD_HASHERS)
+        with override_settings(PASSWORD_HASHERS=[hashers[1], hashers[0]] + hashers[2:]):
+            User.objects.create_user(username='legacy', email='legacy@example.com', password='SecurePass123')
+        self.assertTrue(User.objects.get(username='legacy').password.startswith('pbkdf2_sha256$1000$'))
+
+        response = APIClient().post('/api/v1/auth/login/', {'username': 'legacy', 'password': 'SecurePass123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(User.objects.get(username='legacy').password.startswith('argon2$argon2id$v=19$m=1024,t=1,p=1$'))
+
+    def test_retuned_cost_is_applied_on_login(self):
+        User.objects.create_user(username='tuned', email='tuned@example.com', password='SecurePass123')
+        with override_settings(PASSWORD_ARGON2_TIME_COST=2):
+            APIClient().post('/api/v1/auth/login/', {'username': 'tuned', 'password': 'SecurePass123'})
+        self.assertIn('m=1024,t=2,p=1', User.objects.get(username='tuned').password)
+
+    def test_benchmark_hashers_recommends_settings(self):
+        out = StringIO()
+        call_command('benchmark_hashers', '--budget-ms', '1000', '--samples', '1',
+                     '--memory-costs', '1024', '--max-time-cost', '2', '--parallelism', '1', stdout=out)
+        self.assertIn('PASSWORD_ARGON2_MEMORY_COST=1024', out.getvalue())
+        self.assertIn('PASSWORD_PBKDF2_ITERATIONS=', out.getvalue())
+
+    def test_benchmark_hashers_pbkdf2_fits_the_budget(self):
+        def measure(hasher, samples):
+            # Larger runs cost more per iteration than the probe (cache, turbo), so one extrapolation overshoots.
+            iterations = getattr(hasher, 'iterations', 1000)
+            return iterations / 1000 * (1.0 if iterations <= 100000 else 1.3)
+
+        out = StringIO()
+        with patch('app.accounts.management.commands.benchmark_hashers.measure_ms', measure):
+            call_command('benchmark_hashers', '--budget-ms', '200', '--samples', '1',
+                         '--memory-costs', '1024', '--max-time-cost', '1', stdout=out)
+        self.assertIn('PASSWORD_PBKDF2_ITERATIONS=146000', out.getvalue())
+        self.assertIn('✓ PBKDF2 within 200ms (189.8ms)', out.getvalue())
+
+
+class ProfileCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='poller', email='poll@example.com', password='SecurePass123')
+        token = self.client.post(
+            '/api/v1/auth/login/', {'username': 'poller', 'password': 'SecurePass123'},
+        ).data['access']
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def test_profile_is_served_from_cache_with_etag(self):
+        first = self.client.get('/api/v1/auth/profile/', **self.auth)
+        self.assertEqual(first.json()['username'], 'poller')
+        self.assertIn('private', first['Cache-Control'])
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/v1/auth/profile/', **self.auth)
+            not_modified = self.client.get('/api/v1/auth/profile/', HTTP_IF_NONE_MATCH=first['ETag'], **self.auth)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_update_and_admin_edit_invalidate_profile(self):
+        etag = self.client.get('/api/v1/auth/profile/', **self.auth)['ETag']
+        self.client.patch('/api/v1/auth/profile/', {'bio': 'Guide'}, **self.auth)
+        response = self.client.get('/api/v1/auth/profile/', HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['bio'], 'Guide')
+
+        self.user.refresh_from_db()
+        self.user.phone = '+255700000000'
+        self.user.save()  # e.g. from the admin
+        self.assertEqual(self.client.get('/api/v1/auth/profile/', **self.auth).json()['phone'], '+255700000000')
+
+    def test_claim_backed_fields_are_not_served_stale(self):
+        # email and is_tour_operator are also in the access token; the profile must not echo them.
+        self.client.get('/api/v1/auth/profile/', **self.auth)
+        response = self.client.patch('/api/v1/auth/profile/', {'email': 'new@example.com'}, **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get('/api/v1/auth/profile/', **self.auth).json()['email'], 'new@example.com')
+
+        self.user.refresh_from_db()
+        self.user.is_tour_operator = True
+        self.user.save()
+        self.assertTrue(self.client.get('/api/v1/auth/profile/', **self.auth).json()['is_tour_operator'])
+
+
+class AccountsQueryBudgetTest(ScaledCatalogueMixin, TestCase):
+    def test_register_login_and_profile(self):
+        client = APIClient()
+        with self.assertQueryBudget(4):
+            response = client.post('/api/v1/auth/register/', {
+                'username': 'budget', 'email': 'budget@example.com',
+                'password': 'SecurePass123', 'password_confirm': 'SecurePass123',
+            })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        with self.assertQueryBudget(2):
+            response = client.post('/api/v1/auth/login/', {'username': 'budget', 'password': 'SecurePass123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['access'])
+        client.force_authenticate(user=User.objects.get(username='budget'))
+        with self.assertQueryBudget(0):
+            response = client.get('/api/v1/auth/profile/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['username'], 'budget')
@@ -0,0 +1,51 @@
+"""
+Refresh tokens with a cached revocation check.
+
+With ``ROTATE_REFRESH_TOKENS`` and ``BLACKLIST_AFTER_ROTATION`` every refresh
+blacklists the token it was given, so a replayed (stolen or double-submitted)
+refresh token is the common revoked case. ``CachedRefreshToken`` records each
+revoked JTI in the cache until the token would have expired anyway and answers
+``check_blacklist`` from there, so replays are rejected without touching the
+blacklist tables.
+
+Only revocations are cached, never "not revoked": with per-process caches a
+cached negative could outlive a blacklisting done by another worker. A JTI
+missing from the cache falls back to the indexed ``jti`` lookup, and
+``manage.py prune_tokens`` keeps the tables down to unexpired tokens.
+"""
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+
+def revoked_cache_key(jti):
+    return f'jwtrevoked:{jti}'
+
+
+class CachedRefreshToken(RefreshToken):
+    def _remember_revoked(self):
+        ttl = (datetime_from_epoch(self.payload['exp']) - self.current_time).total_seconds()
+        if ttl > 0:
+            cache.set(revoked_cache_key(self.payload[api_settings.JTI_CLAIM]), True, int(ttl) + 1)
+
+    def check_blacklist(self):
+        if cache.get(revoked_cache_key(self.payload[api_settings.JTI_CLAIM])):
+            raise TokenError(_('Token is blacklisted'))
+        try:
+            super().check_blacklist()
+        except TokenError:
+            self._remember_revoked()
+            raise
+
+    def blacklist(self):
+        result = super().blacklist()
+        self._remember_revoked()
+        return result
+
+
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = CachedRefreshToken
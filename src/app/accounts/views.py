@@ -1,9 +1,14 @@
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiResponse
+from app.core.cache import cached_json_response
+from app.core.throttling import LoginRateThrottle, RegisterRateThrottle
+from .authentication import profile_cache_key
 from .serializers import RegisterSerializer, UserSerializer, CustomTokenObtainPairSerializer
 
 User = get_user_model()
@@ -62,6 +67,9 @@ User = get_user_model()
                 ),
             ],
         ),
+        429: OpenApiResponse(
+            description='Too many registrations from this IP. Retry after the `Retry-After` header.',
+        ),
     },
     examples=[
         OpenApiExample(
@@ -90,6 +98,7 @@ User = get_user_model()
 )
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([RegisterRateThrottle])
 def register(request):
     serializer = RegisterSerializer(data=request.data)
     if serializer.is_valid():
@@ -146,6 +155,15 @@ def register(request):
                 )
             ],
         ),
+        429: OpenApiResponse(
+            description='Too many login attempts from this IP or for this username. Retry after the `Retry-After` header.',
+            examples=[
+                OpenApiExample(
+                    'Throttled',
+                    value={'detail': 'Request was throttled. Expected available in 42 seconds.'},
+                )
+            ],
+        ),
     },
     examples=[
         OpenApiExample(
@@ -157,6 +175,7 @@ def register(request):
 )
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginRateThrottle])
 def login(request):
     serializer = CustomTokenObtainPairSerializer(data=request.data, context={'request': request})
     serializer.is_valid(raise_exception=True)
@@ -180,7 +199,8 @@ def login(request):
         '  -H "Authorization: Bearer <access_token>" \\\n'
         '  -H "Content-Type: application/json" \\\n'
         '  -d \'{"bio":"Updated bio"}\'\n'
-        '```'
+        '```\n\n'
+        'GET responses carry an `ETag`; send it back as `If-None-Match` to get `304 Not Modified` while the profile is unchanged.'
     ),
     request=UserSerializer,
     responses={
@@ -202,6 +222,7 @@ def login(request):
                 )
             ],
         ),
+        304: OpenApiResponse(description='Profile unchanged since the `If-None-Match` ETag (GET only).'),
         401: OpenApiResponse(description='Authentication credentials were not provided or are invalid.'),
     },
     examples=[
@@ -217,8 +238,17 @@ def login(request):
 def user_profile(request):
     user = request.user
     if request.method == 'GET':
-        serializer = UserSerializer(user)
-        return Response(serializer.data)
+        # request.user is token-backed on reads and its claims may be stale: serialize the real row.
+        # Loading it also refuses tokens revoked since they were issued, even when the body is cached.
+        profile = user if isinstance(user, User) else user.db_user
+
+        def build():
+            return UserSerializer(profile).data
+
+        response = cached_json_response(request, profile_cache_key(user.pk), build, settings.PROFILE_CACHE_TIMEOUT)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization',))
+        return response
     serializer = UserSerializer(user, data=request.data, partial=request.method == 'PATCH')
     if serializer.is_valid():
         serializer.save()
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class AttractionsConfig(AppConfig):
     name = 'app.attractions'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,234 @@
+"""
+Map marker clustering (supercluster-style).
+
+Attractions are projected to Web Mercator in the unit square. Starting from
+``MAX_ZOOM`` and working up to zoom 0, every item of the level below is merged
+with its unvisited neighbours within ``RADIUS`` screen pixels (of a
+``EXTENT``-pixel tile) into a weighted-centroid cluster, using a grid of
+radius-sized cells as the neighbour index. Each level is kept sorted by x, so
+a bbox query is a bisect plus a filter over the visible slice.
+
+The index lives in process memory and queries never wait for a rebuild. An
+attraction save or delete is compared with its marker (position, rank, name,
+category) and only a marker that moved, appeared, disappeared or changed
+schedules a rebuild once the transaction commits, on a background worker
+(``CATALOGUE_INDEX_REBUILD_ASYNC``); other edits (descriptions, tips...) are ignored.
+Queries keep using the previous index until the new one is swapped in.
+
+Writes made by other worker processes do not reach this process's signals, so
+an index older than ``CATALOGUE_INDEX_MAX_AGE`` seconds schedules the same
+rebuild in the background: the markers are reloaded (one narrow query) and the
+hierarchy is only rebuilt if they differ.
+"""
+import logging
+import math
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .models import Attraction
+
+logger = logging.getLogger('app.clustering')
+
+MAX_ZOOM = 16
+RADIUS = 60
+EXTENT = 512
+REPRESENTATIVES = 3
+
+_lock = threading.Lock()
+_index = None
+
+
+def project(longitude, latitude):
+    """Longitude/latitude to Web Mercator x/y in [0, 1]."""
+    sin = math.sin(math.radians(max(min(latitude, 85.0511), -85.0511)))
+    x = longitude / 360 + 0.5
+    y = 0.5 - 0.25 * math.log((1 + sin) / (1 - sin)) / math.pi
+    return x, y
+
+
+def unproject(x, y):
+    longitude = (x - 0.5) * 360
+    latitude = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+    return longitude, latitude
+
+
+class Cluster:
+    __slots__ = ('x', 'y', 'count', 'attractions', 'expansion_zoom')
+
+    def __init__(self, x, y, count, attractions, expansion_zoom=None):
+        self.x = x
+        self.y = y
+        self.count = count
+        self.attractions = attractions  # best-ranked first, at most REPRESENTATIVES
+        self.expansion_zoom = expansion_zoom
+
+    def as_dict(self):
+        longitude, latitude = unproject(self.x, self.y)
+        return {
+            'latitude': round(latitude, 6),
+            'longitude': round(longitude, 6),
+            'count': self.count,
+            'expansion_zoom': self.expansion_zoom,
+            'attractions': [
+                {'slug': slug, 'name': name, 'category': category}
+                for _, slug, name, category in self.attractions
+            ],
+        }
+
+
+def _cluster_level(items, zoom):
+    """Merge ``items`` (the level below) into the clusters shown at ``zoom``."""
+    radius = RADIUS / (EXTENT * 2 ** zoom)
+    grid = {}
+    for i, item in enumerate(items):
+        grid.setdefault((int(item.x / radius), int(item.y / radius)), []).append(i)
+
+    visited = [False] * len(items)
+    clusters = []
+    for i, item in enumerate(items):
+        if visited[i]:
+            continue
+        visited[i] = True
+        cx, cy = int(item.x / radius), int(item.y / radius)
+        members = [item]
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                for j in grid.get((gx, gy), ()):
+                    if visited[j]:
+                        continue
+                    other = items[j]
+                    if (other.x - item.x) ** 2 + (other.y - item.y) ** 2 <= radius * radius:
+                        visited[j] = True
+                        members.append(other)
+        if len(members) == 1:
+            clusters.append(item)
+            continue
+        count = sum(member.count for member in members)
+        clusters.append(Cluster(
+            sum(member.x * member.count for member in members) / count,
+            sum(member.y * member.count for member in members) / count,
+            count,
+            sorted((a for member in members for a in member.attractions), reverse=True)[:REPRESENTATIVES],
+            expansion_zoom=zoom + 1,
+        ))
+    return clusters
+
+
+class ClusterIndex:
+    def __init__(self, markers):
+        """``markers`` maps an attraction id to its rank-tuple ``(rank, slug, name, category)`` and ``(x, y)``."""
+        self.markers = markers
+        self.built_at = time.monotonic()
+        points = dict(markers.values())
+        level = [Cluster(x, y, 1, [attraction]) for attraction, (x, y) in points.items()]
+        self.levels = {}
+        for zoom in range(MAX_ZOOM, -1, -1):
+            level = _cluster_level(level, zoom)
+            level.sort(key=lambda cluster: cluster.x)
+            self.levels[zoom] = (level, [cluster.x for cluster in level])
+        self.leaves = sorted(
+            (Cluster(x, y, 1, [attraction]) for attraction, (x, y) in points.items()), key=lambda c: c.x,
+        )
+        self.levels[MAX_ZOOM + 1] = (self.leaves, [leaf.x for leaf in self.leaves])
+
+    def query(self, bbox, zoom):
+        """Clusters visible in ``bbox`` = (min_lon, min_lat, max_lon, max_lat) at ``zoom``."""
+        min_lon, min_lat, max_lon, max_lat = bbox
+        min_x, max_y = project(min_lon, min_lat)
+        max_x, min_y = project(max_lon, max_lat)
+        level, xs = self.levels[max(0, min(zoom, MAX_ZOOM + 1))]
+        return [
+            cluster for cluster in level[bisect_left(xs, min_x):bisect_right(xs, max_x)]
+            if min_y <= cluster.y <= max_y
+        ]
+
+
+def marker(slug, name, category, is_featured, latitude, longitude):
+    # Featured attractions represent their cluster first.
+    return (int(is_featured), slug, name, category), project(float(longitude), float(latitude))
+
+
+def load_markers():
+    rows = Attraction.objects.filter(is_active=True).values_list(
+        'pk', 'slug', 'name', 'category', 'is_featured', 'latitude', 'longitude',
+    )
+    return {pk: marker(*fields) for pk, *fields in rows}
+
+
+def get_index():
+    """The current index; built on first use, then only ever refreshed in the background."""
+    global _index
+    index = _index
+    if index is None:
+        with _lock:
+            if _index is None:
+                _index = ClusterIndex(load_markers())
+            return _index
+    if time.monotonic() - index.built_at >= settings.CATALOGUE_INDEX_MAX_AGE:
+        index.built_at = time.monotonic()  # one refresh per expiry, not one per request
+        schedule_rebuild()
+    return index
+
+
+def attraction_changed(instance, deleted=False):
+    """Schedule a rebuild if saving or deleting ``instance`` changes its marker."""
+    index = _index
+    if index is None:
+        return
+    current = None
+    if not deleted and instance.is_active:
+        current = marker(instance.slug, instance.name, instance.category, instance.is_featured,
+                         instance.latitude, instance.longitude)
+    if index.markers.get(instance.pk) != current:
+        transaction.on_commit(schedule_rebuild)
+
+
+def schedule_rebuild():
+    if not settings.CATALOGUE_INDEX_REBUILD_ASYNC:
+        rebuild()
+        return
+    global _pending
+    with _lock:
+        if _pending:
+            return  # the queued rebuild will read the latest markers
+        _pending = True
+    _executor.submit(_run)
+
+
+def _run():
+    global _pending
+    with _lock:
+        _pending = False
+    try:
+        rebuild()
+    except Exception:
+        logger.exception('Cluster index rebuild failed')
+    finally:
+        connections.close_all()
+
+
+def rebuild():
+    """Reload the markers and swap in a new index if they changed."""
+    global _index
+    markers = load_markers()
+    index = _index
+    if index is not None and index.markers == markers:
+        index.built_at = time.monotonic()
+        return
+    index = ClusterIndex(markers)  # built outside the lock: queries keep the old index meanwhile
+    with _lock:
+        _index = index
+
+
+def reset_index():
+    global _index
+    _index = None
+
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='clusters')
+_pending = False
@@ -0,0 +1,264 @@
+"""
+Precomputed great-circle distances between active attractions.
+
+``manage.py build_distance_matrix`` computes the full matrix with vectorized
+haversine in row blocks and stores it under ``DISTANCE_MATRIX_DIR`` as ``.npy``
+files opened memory-mapped, so every process shares one copy through the page
+cache and nothing is loaded eagerly:
+
+    ids.npy         int64[n]      attraction ids, matrix row order
+    coords.npy      float64[n, 2] latitude/longitude each row was computed from
+    distances.npy   float32[n, n] kilometres
+    neighbours.npy  int32[n, K]   row positions of the K nearest, closest first
+
+Each build goes into a fresh subdirectory and ``CURRENT`` is switched to it
+atomically, so readers never see a half-written matrix. k-nearest lookups for
+k <= K are a slice of ``neighbours``; larger k fall back to a partial sort of
+the row.
+
+When a stored attraction moves, its row and column are rewritten in place and
+only the neighbour lists it can affect are recomputed. Saves and deletes
+schedule this with ``sync_attraction`` once their transaction commits, from the
+committed row, so a rolled-back save never reaches the shared files. Writes hold an
+exclusive ``flock`` on ``LOCK`` next to ``CURRENT``, so concurrent workers
+apply them one at a time (readers do not lock). Deleted or deactivated
+attractions get infinite distances. Attractions added since the last build are
+not in the matrix: their distances are computed on the fly until the next
+build (run it nightly).
+"""
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines: single process, no locking
+    fcntl = None
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from .models import Attraction
+
+EARTH_RADIUS_KM = 6371.0088
+
+_matrix = None
+_matrix_stamp = None
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km between points given in degrees; broadcasts like any ufunc."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _top_k(block, positions, k):
+    """Positions of the ``k`` smallest values in each row of ``block``, excluding the row's own column."""
+    block = np.array(block, dtype=np.float32)
+    block[np.arange(len(positions)), positions] = np.inf
+    if k == 0:
+        return np.empty((len(positions), 0), dtype=np.int32)
+    nearest = np.argpartition(block, k - 1, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(block, nearest, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(nearest, order, axis=1).astype(np.int32)
+
+
+class DistanceMatrix:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.ids = np.load(self.path / 'ids.npy')
+        self.coords = np.load(self.path / 'coords.npy', mmap_mode='r+')
+        self.distances = np.load(self.path / 'distances.npy', mmap_mode='r+')
+        self.neighbours = np.load(self.path / 'neighbours.npy', mmap_mode='r+')
+        self.positions = {int(attraction_id): i for i, attraction_id in enumerate(self.ids)}
+
+    @classmethod
+    def build(cls, root, ids, latitudes, longitudes, neighbours=32, block_size=256):
+        """Compute the matrix for the given attractions into a new version under ``root``."""
+        root = Path(root)
+        path = root / f'v{time.time_ns()}'
+        path.mkdir(parents=True)
+        n = len(ids)
+        k = max(0, min(neighbours, n - 1))
+        lats = np.asarray(latitudes, dtype=np.float64)
+        lons = np.asarray(longitudes, dtype=np.float64)
+
+        np.save(path / 'ids.npy', np.asarray(ids, dtype=np.int64))
+        np.save(path / 'coords.npy', np.column_stack([lats, lons]) if n else np.empty((0, 2)))
+        distances = np.lib.format.open_memmap(path / 'distances.npy', mode='w+', dtype=np.float32, shape=(n, n))
+        nearest = np.lib.format.open_memmap(path / 'neighbours.npy', mode='w+', dtype=np.int32, shape=(n, k))
+        for start in range(0, n, block_size):
+            stop = min(start + block_size, n)
+            block = haversine_km(lats[start:stop, None], lons[start:stop, None], lats[None, :], lons[None, :])
+            block[np.arange(stop - start), np.arange(start, stop)] = 0
+            distances[start:stop] = block
+            nearest[start:stop] = _top_k(block, np.arange(start, stop), k)
+        distances.flush()
+        nearest.flush()
+        del distances, nearest
+
+        pointer = root / 'CURRENT.tmp'
+        pointer.write_text(path.name)
+        os.replace(pointer, root / 'CURRENT')
+        # Keep the previous version for processes that still have it mapped.
+        versions = sorted(p for p in root.glob('v*') if p.is_dir())
+        for old in versions[:-2]:
+            shutil.rmtree(old, ignore_errors=True)
+        return cls(path)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @contextmanager
+    def _write_lock(self):
+        with open(self.path.parent / 'LOCK', 'a') as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def __contains__(self, attraction_id):
+        return attraction_id in self.positions
+
+    def distance(self, a, b):
+        return float(self.distances[self.positions[a], self.positions[b]])
+
+    def nearest(self, attraction_id, k):
+        """``[(attraction_id, km), ...]`` for the ``k`` nearest, closest first."""
+        i = self.positions[attraction_id]
+        if k <= self.neighbours.shape[1]:
+            positions = self.neighbours[i, :k]
+        else:
+            positions = _top_k(self.distances[i:i + 1], [i], min(k, len(self) - 1))[0]
+        row = self.distances[i]
+        return [(int(self.ids[j]), float(row[j])) for j in positions if np.isfinite(row[j])]
+
+    def submatrix(self, attraction_ids, coordinates=None):
+        """
+        Distances between ``attraction_ids`` as an m x m float32 array. Ids not in
+        the matrix need ``coordinates[id] = (lat, lon)`` and are computed on the fly.
+        """
+        m = len(attraction_ids)
+        stored = [a in self.positions for a in attraction_ids]
+        if all(stored):
+            positions = np.array([self.positions[a] for a in attraction_ids], dtype=np.int64)
+            return np.asarray(self.distances[np.ix_(positions, positions)], dtype=np.float32)
+        points = np.array([
+            self.coords[self.positions[a]] if known else coordinates[a]
+            for a, known in zip(attraction_ids, stored)
+        ], dtype=np.float64).reshape(m, 2)
+        return haversine_km(points[:, None, 0], points[:, None, 1], points[None, :, 0], points[None, :, 1]).astype(np.float32)
+
+    def update_location(self, attraction_id, latitude, longitude):
+        """Rewrite one attraction's row/column after it moved. Returns False if it is not stored."""
+        i = self.positions.get(attraction_id)
+        if i is None:
+            return False
+        with self._write_lock():
+            if tuple(self.coords[i]) == (latitude, longitude):
+                return True
+            row = haversine_km(latitude, longitude, self.coords[:, 0], self.coords[:, 1]).astype(np.float32)
+            row[np.isnan(row)] = np.inf  # removed attractions
+            row[i] = 0
+            self.coords[i] = (latitude, longitude)
+            self._set_row(i, row)
+        return True
+
+    def remove(self, attraction_id):
+        """Make a deleted or deactivated attraction unreachable until the next build."""
+        i = self.positions.get(attraction_id)
+        if i is None:
+            return False
+        with self._write_lock():
+            row = np.full(len(self), np.inf, dtype=np.float32)
+            row[i] = 0
+            self.coords[i] = (np.nan, np.nan)  # so reactivating recomputes the row
+            self._set_row(i, row)
+        return True
+
+    def _set_row(self, i, row):
+        self.distances[i, :] = row
+        self.distances[:, i] = row
+        k = self.neighbours.shape[1]
+        if k:
+            # Lists that contained i, or whose furthest entry is now further than i.
+            furthest = self.distances[np.arange(len(self)), self.neighbours[:, -1]]
+            affected = np.flatnonzero((self.neighbours == i).any(axis=1) | (row < furthest))
+            affected = np.union1d(affected, [i])
+            self.neighbours[affected] = _top_k(self.distances[affected], affected, k)
+        self.distances.flush()
+        self.coords.flush()
+        self.neighbours.flush()
+
+
+def get_matrix():
+    """The current matrix, reopened when a new build is published; ``None`` if never built."""
+    global _matrix, _matrix_stamp
+    pointer = Path(settings.DISTANCE_MATRIX_DIR) / 'CURRENT'
+    try:
+        stamp = pointer.stat().st_mtime_ns
+    except FileNotFoundError:
+        _matrix = _matrix_stamp = None
+        return None
+    if stamp != _matrix_stamp:
+        _matrix = DistanceMatrix(pointer.parent / pointer.read_text().strip())
+        _matrix_stamp = stamp
+    return _matrix
+
+
+def nearest_attractions(attraction, k):
+    """``[(attraction_id, km), ...]`` nearest to ``attraction``, from the matrix when it is stored there."""
+    matrix = get_matrix()
+    if matrix is not None and attraction.pk in matrix:
+        return matrix.nearest(attraction.pk, k)
+    rows = Attraction.objects.filter(is_active=True).exclude(pk=attraction.pk).values_list('id', 'latitude', 'longitude')
+    ids, lats, lons = zip(*rows) if rows else ((), (), ())
+    distances = haversine_km(float(attraction.latitude), float(attraction.longitude),
+                             np.array(lats, dtype=np.float64), np.array(lons, dtype=np.float64))
+    order = np.argsort(distances, kind='stable')[:k]
+    return [(ids[j], float(distances[j])) for j in order]
+
+
+def build_matrix(neighbours=None, block_size=256):
+    rows = list(Attraction.objects.filter(is_active=True).order_by('id').values_list('id', 'latitude', 'longitude'))
+    matrix = DistanceMatrix.build(
+        settings.DISTANCE_MATRIX_DIR,
+        [row[0] for row in rows],
+        [float(row[1]) for row in rows],
+        [float(row[2]) for row in rows],
+        neighbours=settings.DISTANCE_MATRIX_NEIGHBOURS if neighbours is None else neighbours,
+        block_size=block_size,
+    )
+    reset_matrix()
+    return matrix
+
+
+def schedule_sync(attraction_id):
+    """Bring ``attraction_id``'s stored row up to date once the current transaction commits."""
+    matrix = get_matrix()
+    if matrix is not None and attraction_id in matrix.positions:
+        transaction.on_commit(lambda: sync_attraction(attraction_id))
+
+
+def sync_attraction(attraction_id):
+    """Rewrite or remove the stored row from the attraction as committed."""
+    matrix = get_matrix()
+    if matrix is None:
+        return
+    location = Attraction.objects.filter(pk=attraction_id, is_active=True).values_list('latitude', 'longitude').first()
+    if location is None:
+        matrix.remove(attraction_id)
+    else:
+        matrix.update_location(attraction_id, float(location[0]), float(location[1]))
+
+
+def reset_matrix():
+    global _matrix, _matrix_stamp
+    _matrix = _matrix_stamp = None
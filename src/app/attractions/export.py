@@ -0,0 +1,106 @@
+"""
+Streaming catalogue export (NDJSON or CSV) shared by the export endpoint and
+the ``export_attractions`` management command.
+
+Rows are read in primary-key batches rather than with a single
+``QuerySet.iterator()``: mysqlclient buffers the whole result set client-side,
+so keyset batches are what keeps memory flat regardless of catalogue size.
+Each batch prefetches its own images and tips.
+"""
+import csv
+import json
+
+import cloudinary
+from django.core.serializers.json import DjangoJSONEncoder
+from .models import Attraction
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+ATTRACTION_FIELDS = [
+    'id', 'name', 'slug', 'category', 'short_description', 'description',
+    'latitude', 'longitude', 'altitude', 'difficulty_level', 'access_info',
+    'nearest_airport', 'distance_from_airport', 'best_time_to_visit',
+    'seasonal_availability', 'estimated_duration', 'entrance_fee',
+    'requires_guide', 'requires_permit', 'is_featured', 'updated_at',
+]
+
+CSV_COLUMNS = ATTRACTION_FIELDS + ['region_slug', 'region_name', 'featured_image', 'image_urls', 'tips']
+
+
+class _Echo:
+    """File-like object that hands back what csv.writer writes, for streaming."""
+
+    def write(self, value):
+        return value
+
+
+def image_url(resource):
+    if not resource or not resource.public_id:
+        return ''
+    if not cloudinary.config().cloud_name:
+        return resource.public_id
+    return resource.url
+
+
+def iter_attractions(chunk_size):
+    queryset = (
+        Attraction.objects.filter(is_active=True)
+        .select_related('region')
+        .prefetch_related('images', 'tips')
+        .order_by('pk')
+    )
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            return
+        yield from chunk
+        last_pk = chunk[-1].pk
+
+
+def attraction_row(attraction):
+    row = {field: getattr(attraction, field) for field in ATTRACTION_FIELDS}
+    row.update({
+        'region_slug': attraction.region.slug,
+        'region_name': attraction.region.name,
+        'featured_image': image_url(attraction.featured_image),
+        'image_urls': [image_url(image.image) for image in attraction.images.all()],
+        'tips': [{'title': tip.title, 'description': tip.description} for tip in attraction.tips.all()],
+    })
+    return row
+
+
+def iter_ndjson(chunk_size):
+    lines = []
+    for attraction in iter_attractions(chunk_size):
+        lines.append(json.dumps(attraction_row(attraction), cls=DjangoJSONEncoder) + '\n')
+        if len(lines) >= chunk_size:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def iter_csv(chunk_size):
+    writer = csv.DictWriter(_Echo(), fieldnames=CSV_COLUMNS)
+    yield writer.writeheader()
+    lines = []
+    for attraction in iter_attractions(chunk_size):
+        row = attraction_row(attraction)
+        row['image_urls'] = ' '.join(row['image_urls'])
+        row['tips'] = json.dumps(row['tips'])
+        lines.append(writer.writerow(row))
+        if len(lines) >= chunk_size:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def iter_export(export_format, chunk_size):
+    if export_format == 'csv':
+        return iter_csv(chunk_size)
+    return iter_ndjson(chunk_size)
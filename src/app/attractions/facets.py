@@ -0,0 +1,147 @@
+"""
+Filters and facet counts for the attraction list.
+
+Filters combine with AND across facets and OR within one facet
+(``?category=beach,island&requires_guide=true``). Facet counts are
+"disjunctive": the counts of a facet ignore that facet's own selection, so a
+filter UI can show what ticking another value of it would add.
+
+All counts come from one grouped aggregate: the active attractions matching
+the search are grouped by every facet column at once (a few hundred groups at
+most), and each group's count is added to the facets it is compatible with in
+Python. Results are cached in the ``catalogue`` namespace, so any attraction
+or region write invalidates them.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, Q, Value, When
+
+from app.core.cache import hash_key_part, namespace_key
+from .models import Attraction
+
+# name -> (label, Q matching the band). Fees are USD.
+FEE_BANDS = {
+    'free': ('Free', Q(entrance_fee__isnull=True) | Q(entrance_fee=0)),
+    'under_50': ('Under $50', Q(entrance_fee__gt=0, entrance_fee__lt=Decimal('50'))),
+    '50_to_100': ('$50 - $100', Q(entrance_fee__gte=Decimal('50'), entrance_fee__lt=Decimal('100'))),
+    'over_100': ('$100 and over', Q(entrance_fee__gte=Decimal('100'))),
+}
+
+_BOOLEANS = {'true': True, 'false': False}
+
+# query parameter -> grouped column
+FACETS = {
+    'category': 'category',
+    'difficulty': 'difficulty_level',
+    'region': 'region__slug',
+    'requires_guide': 'requires_guide',
+    'requires_permit': 'requires_permit',
+    'fee': 'fee_band',
+}
+
+_CHOICES = {
+    'category': dict(Attraction.CATEGORY_CHOICES),
+    'difficulty': dict(Attraction.DIFFICULTY_CHOICES),
+    'fee': {band: label for band, (label, _) in FEE_BANDS.items()},
+    'requires_guide': {True: 'Yes', False: 'No'},
+    'requires_permit': {True: 'Yes', False: 'No'},
+}
+
+
+class FilterError(ValueError):
+    pass
+
+
+def parse_filters(params):
+    """``{facet: [values]}`` from query parameters; raises ``FilterError`` on unknown values."""
+    filters = {}
+    for facet in FACETS:
+        raw = params.get(facet)
+        if not raw:
+            continue
+        values = list(dict.fromkeys(value.strip() for value in raw.split(',') if value.strip()))
+        if facet in ('requires_guide', 'requires_permit'):
+            if any(value.lower() not in _BOOLEANS for value in values):
+                raise FilterError(f'{facet} must be true or false')
+            values = [_BOOLEANS[value.lower()] for value in values]
+        else:
+            unknown = [value for value in values if facet in _CHOICES and value not in _CHOICES[facet]]
+            if unknown:
+                raise FilterError(f"Unknown {facet}: {', '.join(unknown)}. Valid values: {', '.join(_CHOICES[facet])}")
+        if values:
+            filters[facet] = values
+    return filters
+
+
+def search_q(search):
+    if not search:
+        return Q()
+    return (Q(name__icontains=search) | Q(description__icontains=search)
+            | Q(short_description__icontains=search) | Q(region__name__icontains=search))
+
+
+def filters_q(filters):
+    q = Q()
+    for facet, values in filters.items():
+        if facet == 'fee':
+            band_q = Q()
+            for band in values:
+                band_q |= FEE_BANDS[band][1]
+            q &= band_q
+        else:
+            q &= Q(**{f'{FACETS[facet]}__in': values})
+    return q
+
+
+def _fee_band():
+    return Case(
+        *(When(band_q, then=Value(band)) for band, (_, band_q) in FEE_BANDS.items()),
+        output_field=CharField(),
+    )
+
+
+def facet_counts(search, filters):
+    """``{'count': n, 'facets': {facet: [{'value', 'label', 'count'}, ...]}}`` for the current selection."""
+    groups = (
+        Attraction.objects.filter(search_q(search), is_active=True)
+        .annotate(fee_band=_fee_band())
+        .values(*FACETS.values(), 'region__name')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    counts = {facet: {} for facet in FACETS}
+    labels = {'region': {}}
+    total = 0
+    for group in groups:
+        labels['region'][group['region__slug']] = group['region__name']
+        # Which selected facets this group fails; it counts towards a facet only if it fails nothing else.
+        failed = [facet for facet, values in filters.items() if group[FACETS[facet]] not in values]
+        if not failed:
+            total += group['n']
+        for facet, column in FACETS.items():
+            if not failed or failed == [facet]:
+                counts[facet][group[column]] = counts[facet].get(group[column], 0) + group['n']
+
+    facets = {}
+    for facet, found in counts.items():
+        for value in filters.get(facet, ()):
+            found.setdefault(value, 0)  # keep selected values visible
+        choice_labels = _CHOICES.get(facet, labels.get(facet, {}))
+        order = list(choice_labels)
+        facets[facet] = sorted(
+            (
+                {'value': value, 'label': choice_labels.get(value, value), 'count': count}
+                for value, count in found.items()
+            ),
+            key=lambda item: (-item['count'], order.index(item['value']) if item['value'] in order else len(order),
+                              str(item['value'])),
+        )
+    return {'count': total, 'facets': facets}
+
+
+def cached_facet_counts(search, filters):
+    selection = sorted((facet, sorted(map(str, values))) for facet, values in filters.items())
+    key = namespace_key('catalogue', 'facets', hash_key_part((search or '', selection)))
+    return cache.get_or_set(key, lambda: facet_counts(search, filters), settings.CATALOGUE_CACHE_TIMEOUT)
@@ -0,0 +1,168 @@
+"""
+Bulk attraction import (NDJSON or CSV) shared by the import endpoint and the
+``import_attractions`` management command.
+
+Rows are validated in chunks with a single reusable serializer, region slugs
+are resolved from one query up front, slug clashes are checked with one query
+per chunk, and each chunk is written with ``bulk_create`` inside a transaction.
+Invalid rows are skipped and reported by line number; valid rows still import.
+The column layout matches ``export_attractions``, so an export re-imports as is.
+
+``bulk_create`` sends no model signals, so once a chunk is written the
+catalogue namespace is bumped and ``attractions_imported`` is sent with the
+created attractions; its receivers do what the ``post_save`` ones would for
+the map clusters (one rebuild per chunk), similar-attraction lists and search
+suggestions. The distance matrix
+only covers attractions from its last build, so imports join it on the next
+``build_distance_matrix`` run, as single creates do.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+from rest_framework import serializers
+from app.core.cache import bump_namespace
+from app.regions.models import Region
+from app.sync.signals import record_changes
+from .models import Attraction, AttractionTip
+from .serializers import AttractionCreateUpdateSerializer
+from .signals import attractions_imported
+
+
+class TipImportSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=200)
+    description = serializers.CharField()
+
+
+class AttractionImportSerializer(AttractionCreateUpdateSerializer):
+    region = serializers.SlugField(max_length=100)
+    tips = TipImportSerializer(many=True, required=False)
+
+    class Meta(AttractionCreateUpdateSerializer.Meta):
+        fields = AttractionCreateUpdateSerializer.Meta.fields + ['is_featured', 'tips']
+        extra_kwargs = {
+            # Uniqueness is checked once per chunk instead of once per row.
+            'slug': {'validators': []},
+            'featured_image': {'required': False},
+        }
+
+
+def parse_ndjson(lines):
+    for line_no, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, {'non_field_errors': [f'Invalid JSON: {e}']}
+            continue
+        if not isinstance(row, dict):
+            yield line_no, None, {'non_field_errors': ['Each line must be a JSON object']}
+            continue
+        yield line_no, row, None
+
+
+def parse_csv(lines):
+    reader = csv.DictReader(lines)
+    for line_no, row in enumerate(reader, 2):
+        # Empty cells mean "not provided", so model defaults and nulls apply.
+        row = {key: value for key, value in row.items() if key and value not in ('', None)}
+        if 'tips' in row:
+            try:
+                row['tips'] = json.loads(row['tips'])
+            except ValueError:
+                yield line_no, None, {'tips': ['Must be a JSON list of {"title", "description"} objects']}
+                continue
+        yield line_no, row, None
+
+
+PARSERS = {
+    'ndjson': parse_ndjson,
+    'csv': parse_csv,
+}
+
+
+class AttractionImporter:
+    def __init__(self, user=None, chunk_size=500):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.region_ids = dict(Region.objects.values_list('slug', 'id'))
+        self.serializer = AttractionImportSerializer()
+        self.seen_slugs = set()
+        self.created = 0
+        self.errors = []
+
+    def run(self, lines, import_format):
+        rows = PARSERS[import_format](lines)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+        self.errors.sort(key=lambda error: error['line'])
+        return {'created': self.created, 'failed': len(self.errors), 'errors': self.errors}
+
+    def import_chunk(self, chunk):
+        valid = []
+        for line_no, row, error in chunk:
+            if error is None:
+                row = self._normalize(row)
+                try:
+                    data = self.serializer.run_validation(row)
+                except serializers.ValidationError as e:
+                    error = e.detail
+            if error is None and data['region'] not in self.region_ids:
+                error = {'region': [f"Unknown region slug '{data['region']}'"]}
+            if error is None and data['slug'] in self.seen_slugs:
+                error = {'slug': ['Duplicate slug in this import']}
+            if error is not None:
+                self.errors.append({'line': line_no, 'slug': (row or {}).get('slug'), 'errors': error})
+                continue
+            self.seen_slugs.add(data['slug'])
+            valid.append((line_no, data))
+
+        existing = set(
+            Attraction.objects.filter(slug__in=[data['slug'] for _, data in valid])
+            .values_list('slug', flat=True)
+        )
+        attractions, tips = [], {}
+        for line_no, data in valid:
+            if data['slug'] in existing:
+                self.errors.append({'line': line_no, 'slug': data['slug'], 'errors': {'slug': ['Attraction with this slug already exists']}})
+                continue
+            tips[data['slug']] = data.pop('tips', [])
+            data['region_id'] = self.region_ids[data.pop('region')]
+            data.setdefault('featured_image', '')
+            attractions.append(Attraction(created_by=self.user, **data))
+
+        if attractions:
+            self._write(attractions, tips)
+
+    def _normalize(self, row):
+        # Accept the export layout, which names the region column region_slug.
+        if 'region' not in row and 'region_slug' in row:
+            row = {**row, 'region': row['region_slug']}
+        return row
+
+    def _write(self, attractions, tips):
+        with transaction.atomic():
+            Attraction.objects.bulk_create(attractions)
+            # Not every backend (MySQL) returns primary keys from bulk_create.
+            ids = dict(
+                Attraction.objects.filter(slug__in=[a.slug for a in attractions])
+                .values_list('slug', 'id')
+            )
+            AttractionTip.objects.bulk_create([
+                AttractionTip(attraction_id=ids[slug], created_by=self.user, **tip)
+                for slug, slug_tips in tips.items() for tip in slug_tips
+            ])
+            tip_ids = AttractionTip.objects.filter(attraction_id__in=ids.values()).values_list('id', flat=True)
+            record_changes('attraction', ids.values())
+            record_changes('tip', tip_ids)
+        for attraction in attractions:
+            attraction.pk = ids[attraction.slug]
+        # Bump before notifying, so indexes updated in place are stamped with the new version.
+        bump_namespace('catalogue')
+        attractions_imported.send(sender=Attraction, attractions=attractions)
+        self.created += len(attractions)
@@ -0,0 +1,32 @@
+"""
+Management command to (re)compute similar-attraction recommendations.
+
+Run: python src/manage.py build_similar_attractions
+     python src/manage.py build_similar_attractions --top-k 20 --block-size 1024
+
+This also refits the TF-IDF vocabulary saved under RECOMMENDATION_DIR. Edits to
+attractions are applied incrementally in the background after they are saved,
+but an edit never pulls a replacement into a list, new terms are outside the
+vocabulary and new attractions are not stored, so schedule this nightly.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from app.attractions.recommendations import build_similarities
+
+
+class Command(BaseCommand):
+    help = "Compute the most similar attractions for every active attraction"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, help="Similar attractions stored per attraction")
+        parser.add_argument("--block-size", type=int, default=512, help="Rows scored per vectorized block")
+
+    def handle(self, *args, **options):
+        if options["block_size"] < 1 or (options["top_k"] is not None and options["top_k"] < 1):
+            raise CommandError("--block-size and --top-k must be positive")
+        started = time.perf_counter()
+        count = build_similarities(top_k=options["top_k"], block_size=options["block_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Similar attractions for {count} attractions computed in {time.perf_counter() - started:.2f}s"
+        ))
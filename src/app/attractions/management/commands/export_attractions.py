@@ -0,0 +1,30 @@
+"""
+Management command to export all active attractions as NDJSON or CSV.
+
+Run: python src/manage.py export_attractions > attractions.ndjson
+     python src/manage.py export_attractions --format csv --output attractions.csv
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from app.attractions.export import EXPORT_FORMATS, iter_export
+
+
+class Command(BaseCommand):
+    help = "Stream every active attraction with region, tips and image URLs as NDJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="ndjson")
+        parser.add_argument("--output", help="File to write to (default: stdout)")
+        parser.add_argument("--chunk-size", type=int, default=settings.EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        chunks = iter_export(options["format"], options["chunk_size"])
+        if not options["output"]:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+
+        with open(options["output"], "w", newline="", encoding="utf-8") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"✓ Exported to {options['output']}"))
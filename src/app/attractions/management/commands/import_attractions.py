@@ -0,0 +1,51 @@
+"""
+Management command to bulk import attractions from an NDJSON or CSV file.
+
+Run: python src/manage.py import_attractions attractions.ndjson
+     python src/manage.py import_attractions attractions.csv --user admin
+"""
+import codecs
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from app.attractions.importer import PARSERS, AttractionImporter
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Bulk import attractions from NDJSON or CSV with batched writes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import (.ndjson or .csv)")
+        parser.add_argument("--format", choices=list(PARSERS), help="Defaults to the file extension")
+        parser.add_argument("--chunk-size", type=int, default=settings.IMPORT_CHUNK_SIZE)
+        parser.add_argument("--user", help="Username recorded as creator (default: first superuser)")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        import_format = options["format"] or path.suffix.lstrip(".").lower()
+        if import_format not in PARSERS:
+            raise CommandError("Cannot tell the format from the extension; pass --format ndjson|csv")
+
+        if options["user"]:
+            user = User.objects.filter(username=options["user"]).first()
+            if not user:
+                raise CommandError(f"User '{options['user']}' not found")
+        else:
+            user = User.objects.filter(is_superuser=True).first()
+
+        importer = AttractionImporter(user=user, chunk_size=options["chunk_size"])
+        with path.open("rb") as f:
+            try:
+                report = importer.run(codecs.iterdecode(f, "utf-8"), import_format)
+            except UnicodeDecodeError:
+                raise CommandError(f"{path} is not UTF-8 encoded ({importer.created} attractions imported before it)")
+
+        for error in report["errors"]:
+            self.stdout.write(self.style.ERROR(f"  ! line {error['line']} ({error['slug']}): {error['errors']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✓ COMPLETE: {report['created']} created, {report['failed']} failed"
+        ))
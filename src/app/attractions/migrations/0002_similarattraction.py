@@ -0,0 +1,31 @@
+# Generated by Django 4.2.28 on 2026-10-19 17:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attractions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarAttraction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('attraction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_entries', to='attractions.attraction')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='attractions.attraction')),
+            ],
+            options={
+                'ordering': ['attraction', '-score'],
+                'indexes': [models.Index(fields=['attraction', '-score'], name='attractions_attract_dc36b7_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='similarattraction',
+            constraint=models.UniqueConstraint(fields=('attraction', 'similar'), name='unique_similar_attraction'),
+        ),
+    ]
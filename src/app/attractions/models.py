@@ -105,3 +105,22 @@ class AttractionTip(models.Model):
 
     def __str__(self):
         return f"{self.attraction.name} - {self.title}"
+
+
+class SimilarAttraction(models.Model):
+    """Precomputed content-based neighbours (see ``app.attractions.recommendations``)."""
+    attraction = models.ForeignKey(Attraction, on_delete=models.CASCADE, related_name='similar_entries')
+    similar = models.ForeignKey(Attraction, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['attraction', '-score']
+        indexes = [
+            models.Index(fields=['attraction', '-score']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['attraction', 'similar'], name='unique_similar_attraction'),
+        ]
+
+    def __str__(self):
+        return f"{self.attraction_id} ~ {self.similar_id} ({self.score:.3f})"
@@ -0,0 +1,413 @@
+"""
+Content-based "similar attractions".
+
+Each active attraction becomes a set of features, and the similarity of two
+attractions is a weighted sum of per-feature similarities:
+
+    text        TF-IDF of ``short_description`` (counted twice) + ``description``,
+                L2-normalized, cosine similarity
+    category    1 for the same category
+    difficulty  1 for the same difficulty level
+    region      1 for the same region
+    location    exp(-km / LOCATION_SCALE_KM) from the haversine distance
+
+``build_similarities`` (``manage.py build_similar_attractions``) fits the
+vocabulary and IDF, scores every attraction in row blocks with NumPy matrix
+products and stores the top K per attraction in ``SimilarAttraction``, which
+the ``/similar/`` endpoint reads with one indexed query. The fitted model is
+saved under ``RECOMMENDATION_DIR`` as ``.npy`` files opened memory-mapped (one
+versioned subdirectory per build, published through ``CURRENT`` like the
+distance matrix):
+
+    ids.npy         int64[n]       attraction ids, row order
+    text.npy        float32[n, V]  TF-IDF rows
+    idf.npy         float32[V]
+    category.npy, difficulty.npy, region.npy, coords.npy
+    active.npy      bool[n]        False once deleted or deactivated
+    floor.npy       float32[n]     lowest stored score of each full list, else -inf
+    meta.json       vocabulary and K
+
+Saving an attraction schedules ``refresh_attraction`` after the transaction
+commits, on a background worker (``RECOMMENDATION_REFRESH_ASYNC``). It reads
+that one attraction, projects it with the stored vocabulary and IDF, writes its
+row and scores it against the stored rows: a single matrix-vector product. Its
+own list is replaced. The other lists it enters or leaves are found from
+``floor`` and from the lists that already contain it, and only those are
+loaded. Terms outside the vocabulary are ignored and attractions created since
+the build are scored but not stored, so run the batch job nightly.
+"""
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+
+from .distances import haversine_km
+from .models import Attraction, SimilarAttraction
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines: single process, no locking
+    fcntl = None
+
+logger = logging.getLogger('app.recommendations')
+
+WEIGHTS = {'text': 0.5, 'category': 0.2, 'region': 0.1, 'difficulty': 0.05, 'location': 0.15}
+LOCATION_SCALE_KM = 150
+MIN_DOCUMENT_FREQUENCY = 2
+FIELDS = ('id', 'short_description', 'description', 'category', 'difficulty_level', 'region_id', 'latitude', 'longitude')
+
+_TOKEN = re.compile(r'[a-z]{3,}')
+STOP_WORDS = frozenset(
+    'the and for are but not you all any can had her was one our out has have his how its may new now '
+    'see way who did get let put say she too use with this that from they will into than them then there '
+    'their these those which while where when what been also more most some such only over very just '
+    'your about after before between through during each other both many well'.split()
+)
+
+_model = None
+_model_stamp = None
+
+
+def tokenize(text):
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def _terms(row):
+    return Counter(tokenize(f"{row['short_description']} {row['short_description']} {row['description']}"))
+
+
+class Projection:
+    """Features of attractions outside the model, shaped like model rows (leading dimension m)."""
+
+    def __init__(self, text, category, difficulty, region, coords):
+        self.text, self.category, self.difficulty, self.region, self.coords = text, category, difficulty, region, coords
+
+
+class SimilarityModel:
+    def __init__(self, path):
+        self.path = Path(path)
+        meta = json.loads((self.path / 'meta.json').read_text())
+        self.vocabulary = {term: j for j, term in enumerate(meta['vocabulary'])}
+        self.top_k = meta['top_k']
+        self.ids = np.load(self.path / 'ids.npy')
+        self.idf = np.load(self.path / 'idf.npy')
+        for name in ('text', 'category', 'difficulty', 'region', 'coords', 'active', 'floor'):
+            setattr(self, name, np.load(self.path / f'{name}.npy', mmap_mode='r+'))
+        self.positions = {int(attraction_id): i for i, attraction_id in enumerate(self.ids)}
+
+    @classmethod
+    def build(cls, root, rows, top_k, max_features):
+        """Fit the vocabulary over ``rows`` and save a new version under ``root``."""
+        root = Path(root)
+        path = root / f'v{time.time_ns()}'
+        path.mkdir(parents=True)
+        n = len(rows)
+        documents = [_terms(row) for row in rows]
+        document_frequency = Counter(term for document in documents for term in document)
+        vocabulary = [
+            term for term, df in document_frequency.most_common(max_features)
+            if df >= min(MIN_DOCUMENT_FREQUENCY, n)
+        ]
+        idf = np.array([math.log((1 + n) / (1 + document_frequency[t])) + 1 for t in vocabulary], dtype=np.float32)
+
+        (path / 'meta.json').write_text(json.dumps({'vocabulary': vocabulary, 'top_k': top_k}))
+        np.save(path / 'ids.npy', np.array([row['id'] for row in rows], dtype=np.int64))
+        np.save(path / 'idf.npy', idf)
+        text = np.lib.format.open_memmap(path / 'text.npy', mode='w+', dtype=np.float32, shape=(n, len(vocabulary)))
+        columns = {term: j for j, term in enumerate(vocabulary)}
+        for i, document in enumerate(documents):
+            text[i] = _tfidf(document, columns, idf)
+        text.flush()
+        del text
+        projected = _project_attributes(rows)
+        np.save(path / 'category.npy', projected.category)
+        np.save(path / 'difficulty.npy', projected.difficulty)
+        np.save(path / 'region.npy', projected.region)
+        np.save(path / 'coords.npy', projected.coords)
+        np.save(path / 'active.npy', np.ones(n, dtype=bool))
+        np.save(path / 'floor.npy', np.full(n, -np.inf, dtype=np.float32))
+
+        pointer = root / 'CURRENT.tmp'
+        pointer.write_text(path.name)
+        os.replace(pointer, root / 'CURRENT')
+        for old in sorted(p for p in root.glob('v*') if p.is_dir())[:-2]:
+            shutil.rmtree(old, ignore_errors=True)
+        return cls(path)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @contextmanager
+    def write_lock(self):
+        """Serializes refreshes (row writes and list edits) across threads and worker processes."""
+        with open(self.path.parent / 'LOCK', 'a') as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def project(self, rows):
+        """Features of ``rows`` (dicts with ``FIELDS``) using the stored vocabulary and IDF."""
+        projection = _project_attributes(rows)
+        projection.text = np.array([_tfidf(_terms(row), self.vocabulary, self.idf) for row in rows], dtype=np.float32)
+        return projection
+
+    def rows(self, positions):
+        return Projection(self.text[positions], self.category[positions], self.difficulty[positions],
+                          self.region[positions], self.coords[positions])
+
+    def scores(self, features):
+        """m x n similarity of ``features`` to every stored attraction; inactive columns are -inf."""
+        scores = WEIGHTS['text'] * (features.text @ self.text.T)
+        scores += WEIGHTS['category'] * (features.category[:, None] == self.category[None, :])
+        scores += WEIGHTS['difficulty'] * (features.difficulty[:, None] == self.difficulty[None, :])
+        scores += WEIGHTS['region'] * (features.region[:, None] == self.region[None, :])
+        km = haversine_km(features.coords[:, None, 0], features.coords[:, None, 1], self.coords[:, 0], self.coords[:, 1])
+        scores += WEIGHTS['location'] * np.exp(-km / LOCATION_SCALE_KM).astype(np.float32)
+        scores[:, ~np.asarray(self.active)] = -np.inf
+        return scores
+
+    def set_row(self, i, features):
+        self.text[i] = features.text[0]
+        self.category[i] = features.category[0]
+        self.difficulty[i] = features.difficulty[0]
+        self.region[i] = features.region[0]
+        self.coords[i] = features.coords[0]
+        self.active[i] = True
+
+    def flush(self):
+        for name in ('text', 'category', 'difficulty', 'region', 'coords', 'active', 'floor'):
+            getattr(self, name).flush()
+
+
+def _tfidf(document, columns, idf):
+    vector = np.zeros(len(idf), dtype=np.float32)
+    for term, count in document.items():
+        j = columns.get(term)
+        if j is not None:
+            vector[j] = count
+    vector *= idf
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _project_attributes(rows):
+    return Projection(
+        None,
+        np.array([row['category'] for row in rows], dtype='<U32'),
+        np.array([row['difficulty_level'] for row in rows], dtype='<U32'),
+        np.array([row['region_id'] for row in rows], dtype=np.int64),
+        np.array([(float(row['latitude']), float(row['longitude'])) for row in rows], dtype=np.float64).reshape(-1, 2),
+    )
+
+
+def _top(scores, k):
+    """Column positions of the ``k`` highest finite scores per row, best first."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((len(scores), 0), dtype=np.int64)
+    best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, best, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(best, order, axis=1)
+
+
+def get_model():
+    """The current model, reopened when a new build is published; ``None`` if never built."""
+    global _model, _model_stamp
+    pointer = Path(settings.RECOMMENDATION_DIR) / 'CURRENT'
+    try:
+        stamp = pointer.stat().st_mtime_ns
+    except FileNotFoundError:
+        _model = _model_stamp = None
+        return None
+    if stamp != _model_stamp:
+        _model = SimilarityModel(pointer.parent / pointer.read_text().strip())
+        _model_stamp = stamp
+    return _model
+
+
+def reset_model():
+    global _model, _model_stamp
+    _model = _model_stamp = None
+
+
+def build_similarities(top_k=None, block_size=512, max_features=None):
+    """Refit the model and recompute every attraction's list. Returns the number of attractions indexed."""
+    top_k = top_k or settings.RECOMMENDATION_TOP_K
+    rows = list(Attraction.objects.filter(is_active=True).order_by('id').values(*FIELDS))
+    model = SimilarityModel.build(
+        settings.RECOMMENDATION_DIR, rows, top_k, max_features or settings.RECOMMENDATION_MAX_FEATURES,
+    )
+    reset_model()
+    entries = []
+    with model.write_lock():
+        for start in range(0, len(model), block_size):
+            positions = np.arange(start, min(start + block_size, len(model)))
+            scores = model.scores(model.rows(positions))
+            scores[np.arange(len(positions)), positions] = -np.inf
+            for row, (i, best) in enumerate(zip(positions, _top(scores, min(top_k, len(model) - 1)))):
+                entries.extend(
+                    SimilarAttraction(attraction_id=int(model.ids[i]), similar_id=int(model.ids[j]), score=float(scores[row, j]))
+                    for j in best
+                )
+                if len(best) == top_k:
+                    model.floor[i] = scores[row, best[-1]]
+        model.flush()
+        with transaction.atomic():
+            SimilarAttraction.objects.all().delete()
+            SimilarAttraction.objects.bulk_create(entries, batch_size=1000)
+    return len(model)
+
+
+def refresh_attraction(attraction_id):
+    """Bring the stored lists up to date after ``attraction_id`` was saved or deleted."""
+    model = get_model()
+    if model is None:
+        return
+    with model.write_lock(), transaction.atomic():
+        row = Attraction.objects.filter(pk=attraction_id, is_active=True).values(*FIELDS).first()
+        i = model.positions.get(attraction_id)
+        if row is None:
+            _remove(model, attraction_id, i)
+        else:
+            _rescore(model, row, i)
+        model.flush()
+
+
+def _remove(model, attraction_id, i):
+    SimilarAttraction.objects.filter(Q(attraction_id=attraction_id) | Q(similar_id=attraction_id)).delete()
+    if i is None:
+        return
+    # A deleted row's entries are already gone (cascade), so the lists that held it are found from
+    # its stored features: those it scored at least the weakest entry of, now short of K.
+    candidates = (model.scores(model.rows([i]))[0] >= model.floor) & model.active
+    candidates[i] = False
+    model.active[i] = False
+    model.floor[i] = -np.inf
+    candidate_ids = model.ids[candidates].tolist()
+    sizes = Counter(
+        SimilarAttraction.objects.filter(attraction_id__in=candidate_ids).values_list('attraction_id', flat=True)
+    )
+    # Those lists are recomputed from their stored rows, one product each.
+    positions = np.array(
+        [model.positions[other] for other in candidate_ids if sizes[other] < model.top_k], dtype=np.int64,
+    )
+    if not len(positions):
+        return
+    scores = model.scores(model.rows(positions))
+    scores[np.arange(len(positions)), positions] = -np.inf
+    SimilarAttraction.objects.filter(attraction_id__in=model.ids[positions].tolist()).delete()
+    entries = []
+    for row, (j, best) in enumerate(zip(positions, _top(scores, model.top_k))):
+        best = [b for b in best if np.isfinite(scores[row, b])]
+        entries.extend(
+            SimilarAttraction(attraction_id=int(model.ids[j]), similar_id=int(model.ids[b]), score=float(scores[row, b]))
+            for b in best
+        )
+        model.floor[j] = scores[row, best[-1]] if len(best) == model.top_k else -np.inf
+    SimilarAttraction.objects.bulk_create(entries, batch_size=1000)
+
+
+def _rescore(model, row, i):
+    attraction_id = row['id']
+    features = model.project([row])
+    if i is not None:
+        model.set_row(i, features)
+    scores = model.scores(features)[0]
+    if i is not None:
+        scores[i] = -np.inf
+
+    best = [j for j in _top(scores[None, :], model.top_k)[0] if np.isfinite(scores[j])]
+    SimilarAttraction.objects.filter(attraction_id=attraction_id).delete()
+    SimilarAttraction.objects.bulk_create([
+        SimilarAttraction(attraction_id=attraction_id, similar_id=int(model.ids[j]), score=float(scores[j]))
+        for j in best
+    ])
+    if i is not None:
+        model.floor[i] = scores[best[-1]] if len(best) == model.top_k else -np.inf
+
+    # Scores are symmetric: scores[j] is also this attraction's score in j's list. Only lists that
+    # already contain it, or whose weakest entry it now beats, can change.
+    candidates = set(model.ids[np.flatnonzero(scores > model.floor)].tolist())
+    candidates.update(SimilarAttraction.objects.filter(similar_id=attraction_id).values_list('attraction_id', flat=True))
+    candidates = {other for other in candidates if other in model.positions and other != attraction_id}
+    lists = {other: [] for other in candidates}
+    for entry in SimilarAttraction.objects.filter(attraction_id__in=candidates).only(
+        'id', 'attraction_id', 'similar_id', 'score',
+    ):
+        lists[entry.attraction_id].append(entry)
+
+    to_create, to_update, to_delete = [], [], []
+    for other, entries in lists.items():
+        j = model.positions[other]
+        score = float(scores[j])
+        current = next((e for e in entries if e.similar_id == attraction_id), None)
+        if current is not None:
+            current.score = score
+            to_update.append(current)
+        elif len(entries) < model.top_k:
+            entries.append(SimilarAttraction(attraction_id=other, similar_id=attraction_id, score=score))
+            to_create.append(entries[-1])
+        else:
+            weakest = min(entries, key=lambda e: e.score)
+            if score <= weakest.score:
+                continue
+            entries.remove(weakest)
+            to_delete.append(weakest.pk)
+            entries.append(SimilarAttraction(attraction_id=other, similar_id=attraction_id, score=score))
+            to_create.append(entries[-1])
+        model.floor[j] = min(e.score for e in entries) if len(entries) >= model.top_k else -np.inf
+
+    SimilarAttraction.objects.filter(pk__in=to_delete).delete()
+    SimilarAttraction.objects.bulk_update(to_update, ['score'], batch_size=1000)
+    SimilarAttraction.objects.bulk_create(to_create, batch_size=1000)
+
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='recommendations')
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def schedule_refresh(attraction_id):
+    """Refresh ``attraction_id`` once the current transaction commits, off the request thread."""
+    if get_model() is None:
+        return  # nothing to keep up to date until `manage.py build_similar_attractions` has run
+    if not settings.RECOMMENDATION_REFRESH_ASYNC:
+        transaction.on_commit(lambda: refresh_attraction(attraction_id))
+        return
+    transaction.on_commit(lambda: _submit(attraction_id))
+
+
+def _submit(attraction_id):
+    with _pending_lock:
+        if attraction_id in _pending:
+            return  # already queued; it will read the latest row
+        _pending.add(attraction_id)
+    _executor.submit(_run, attraction_id)
+
+
+def _run(attraction_id):
+    with _pending_lock:
+        _pending.discard(attraction_id)
+    try:
+        refresh_attraction(attraction_id)
+    except Exception:
+        logger.exception('Similar-attraction refresh failed for attraction %s', attraction_id)
+    finally:
+        connections.close_all()
@@ -0,0 +1,43 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from app.core.cache import bump_namespace
+from .clustering import attraction_changed, schedule_rebuild
+from .distances import schedule_sync
+from .models import Attraction
+from .recommendations import schedule_refresh
+
+# Sent by the bulk importer, whose bulk_create sends no post_save: sender=Attraction, attractions=[saved instances].
+attractions_imported = Signal()
+
+
+@receiver([post_save, post_delete], sender=Attraction)
+def invalidate_catalogue_cache(sender, **kwargs):
+    bump_namespace('catalogue')
+
+
+@receiver([post_save, post_delete], sender=Attraction)
+def update_distance_matrix(sender, instance, **kwargs):
+    schedule_sync(instance.pk)
+
+
+@receiver(post_save, sender=Attraction)
+def update_map_clusters(sender, instance, **kwargs):
+    attraction_changed(instance)
+
+
+@receiver(post_delete, sender=Attraction)
+def remove_from_map_clusters(sender, instance, **kwargs):
+    attraction_changed(instance, deleted=True)
+
+
+@receiver([post_save, post_delete], sender=Attraction)
+def update_similar_attractions(sender, instance, **kwargs):
+    schedule_refresh(instance.pk)
+
+
+@receiver(attractions_imported, sender=Attraction)
+def index_imported_attractions(sender, attractions, **kwargs):
+    for attraction in attractions:
+        schedule_refresh(attraction.pk)
+    transaction.on_commit(schedule_rebuild)
@@ -1,10 +1,23 @@
-from django.test import TestCase
+import csv
+import json
+import tempfile
+import threading
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from unittest.mock import patch
+from app.core.testing import ScaledCatalogueMixin
 from app.regions.models import Region
-from .models import Attraction
+from app.search.index import get_index as get_suggestion_index, reset_index as reset_suggestion_index
+from . import clustering, recommendations
+from .clustering import get_index, reset_index
+from .distances import build_matrix, get_matrix, haversine_km, reset_matrix
+from .models import Attraction, SimilarAttraction
+from .recommendations import build_similarities, reset_model, tokenize
 
 User = get_user_model()
 
@@ -21,6 +34,15 @@ def make_attraction(region, user, name='Serengeti', slug='serengeti', featured=F
     )
 
 
+IMPORT_ROW = {
+    'region': 'arusha', 'category': 'lake', 'description': 'Soda lake.',
+    'short_description': 'Soda lake.', 'latitude': '-2.4167', 'longitude': '36.0500',
+    'difficulty_level': 'moderate', 'access_info': 'By road from Arusha.',
+    'best_time_to_visit': 'June-November', 'seasonal_availability': 'Year-round',
+    'estimated_duration': '1-2 days',
+}
+
+
 class AttractionsAPITest(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -50,6 +72,18 @@ class AttractionsAPITest(TestCase):
         response = self.client.get(f'{self.list_url}featured/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_featured_cache_refreshed_on_change(self):
+        response = self.client.get(f'{self.list_url}featured/')
+        self.assertEqual(response.json(), [])
+        make_attraction(self.region, self.user, name='Ngorongoro', slug='ngorongoro', featured=True)
+        response = self.client.get(f'{self.list_url}featured/')
+        self.assertEqual([a['slug'] for a in response.json()], ['ngorongoro'])
+
+    def test_attractions_by_region_compressed(self):
+        response = self.client.get(f'{self.list_url}by_region/?region=arusha', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
     def test_attractions_by_category(self):
         response = self.client.get(f'{self.list_url}by_category/?category=national_park')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -70,6 +104,473 @@ class AttractionsAPITest(TestCase):
         response = self.client.get(f'{self.list_url}?search=Serengeti')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_export_ndjson(self):
+        response = self.client.get(f'{self.list_url}export/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['slug'] for row in rows], ['serengeti'])
+        self.assertEqual(rows[0]['region_slug'], 'arusha')
+
+    def test_export_csv(self):
+        response = self.client.get(f'{self.list_url}export/?format=csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0]['name'], 'Serengeti')
+
+    def test_export_invalid_format(self):
+        response = self.client.get(f'{self.list_url}export/?format=xml')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_ndjson_reports_row_errors(self):
+        self.client.force_authenticate(user=self.user)
+        rows = [
+            {**IMPORT_ROW, 'name': 'Lake Natron', 'slug': 'lake-natron', 'tips': [{'title': 'Flamingos', 'description': 'Best June-Nov.'}]},
+            {**IMPORT_ROW, 'name': 'Nowhere', 'slug': 'nowhere', 'region': 'atlantis'},
+            {**IMPORT_ROW, 'name': 'Serengeti', 'slug': 'serengeti'},
+        ]
+        body = '\n'.join(json.dumps(row) for row in rows) + '\nnot json\n'
+        response = self.client.post(f'{self.list_url}import/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual([e['line'] for e in response.data['errors']], [2, 3, 4])
+        natron = Attraction.objects.get(slug='lake-natron')
+        self.assertEqual(natron.tips.count(), 1)
+        self.assertEqual(natron.created_by, self.user)
+
+    def test_import_csv_round_trip_from_export(self):
+        self.client.force_authenticate(user=self.user)
+        exported = b''.join(self.client.get(f'{self.list_url}export/?format=csv').streaming_content)
+        self.attraction.delete()
+        response = self.client.post(f'{self.list_url}import/', exported, content_type='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Attraction.objects.filter(slug='serengeti', region=self.region).exists())
+
+    def test_import_rejects_non_utf8(self):
+        self.client.force_authenticate(user=self.user)
+        body = 'slug,name\nzanzibar,Zanzíbar\n'.encode('latin-1')
+        response = self.client.post(f'{self.list_url}import/', body, content_type='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['created'], 0)
+
+    def test_import_updates_in_memory_indexes(self):
+        self.client.force_authenticate(user=self.user)
+        for reset in (reset_index, reset_suggestion_index):
+            reset()
+            self.addCleanup(reset)
+        suggestions = get_suggestion_index()
+        get_index()
+        body = json.dumps({**IMPORT_ROW, 'name': 'Lake Natron', 'slug': 'lake-natron'})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'{self.list_url}import/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([s.slug for s in suggestions.search('natron')], ['lake-natron'])
+        self.assertIs(get_suggestion_index(), suggestions)  # updated in place and current: no rebuild
+        natron = Attraction.objects.get(slug='lake-natron')
+        self.assertEqual(get_index().markers[natron.pk][0][1], 'lake-natron')
+
+    def test_import_unsupported_content_type(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(f'{self.list_url}import/', {'name': 'x'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_requires_auth(self):
+        response = self.client.post(f'{self.list_url}import/', '', content_type='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
     def test_create_attraction_requires_auth(self):
         response = self.client.post(self.list_url, {})
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+
+class AttractionFacetsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        user = User.objects.create_user(username='filter', email='filter@example.com', password='Pass1234!')
+        arusha = Region.objects.create(
+            name='Arusha', slug='arusha', description='Safari hub.', latitude='-3.3869', longitude='36.6830',
+        )
+        zanzibar = Region.objects.create(
+            name='Zanzibar', slug='zanzibar', description='Spice islands.', latitude='-6.1659', longitude='39.2026',
+        )
+        for slug, region, category, fee, guide in [
+            ('serengeti', arusha, 'national_park', '70.00', True),
+            ('tarangire', arusha, 'national_park', '45.00', False),
+            ('meru', arusha, 'mountain', '150.00', True),
+            ('nungwi', zanzibar, 'beach', None, False),
+            ('mnemba', zanzibar, 'island', '30.00', True),
+        ]:
+            attraction = make_attraction(region, user, name=slug.title(), slug=slug)
+            Attraction.objects.filter(pk=attraction.pk).update(category=category, entrance_fee=fee, requires_guide=guide)
+
+    def facets(self, **params):
+        response = self.client.get('/api/v1/attractions/', {**params, 'facets': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        counts = {
+            facet: {item['value']: item['count'] for item in items} for facet, items in response.data['facets'].items()
+        }
+        return response.data, counts
+
+    def test_filters_combine(self):
+        response = self.client.get('/api/v1/attractions/', {'region': 'arusha', 'fee': 'under_50,50_to_100'})
+        self.assertEqual(sorted(a['slug'] for a in response.data), ['serengeti', 'tarangire'])
+        response = self.client.get('/api/v1/attractions/', {'requires_guide': 'true', 'category': 'island,mountain'})
+        self.assertEqual(sorted(a['slug'] for a in response.data), ['meru', 'mnemba'])
+
+    def test_facet_counts_ignore_own_filter(self):
+        with self.assertNumQueries(4):
+            data, counts = self.facets(region='arusha')
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(len(data['results']), 3)
+        self.assertEqual(counts['region'], {'arusha': 3, 'zanzibar': 2})
+        self.assertEqual(counts['category'], {'national_park': 2, 'mountain': 1})
+        self.assertEqual(counts['fee'], {'under_50': 1, '50_to_100': 1, 'over_100': 1})
+        self.assertEqual(counts['requires_guide'], {True: 2, False: 1})
+
+        data, counts = self.facets(search='zanzibar', fee='free')
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(counts['fee'], {'free': 1, 'under_50': 1})
+        self.assertEqual(counts['category'], {'beach': 1})
+
+    def test_facets_cached_until_catalogue_changes(self):
+        self.facets(category='beach')
+        with self.assertNumQueries(3):  # results only
+            self.facets(category='beach')
+        Attraction.objects.get(slug='meru').save()
+        _, counts = self.facets(category='beach', difficulty='easy')
+        self.assertEqual(counts['difficulty'], {'easy': 1})
+        Attraction.objects.filter(slug='meru').update(difficulty_level='extreme')
+        Attraction.objects.get(slug='meru').save()
+        _, counts = self.facets(difficulty='easy')
+        self.assertEqual(counts['difficulty'], {'easy': 4, 'extreme': 1})
+
+    def test_unknown_filter_values(self):
+        self.assertEqual(self.client.get('/api/v1/attractions/', {'category': 'volcano'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/v1/attractions/', {'requires_permit': 'maybe'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+class AttractionClustersTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_index()
+        self.addCleanup(reset_index)
+        self.client = APIClient()
+        user = User.objects.create_user(username='mapper', email='map@example.com', password='Pass1234!')
+        region = Region.objects.create(
+            name='Arusha', slug='arusha', description='Safari hub.', latitude='-3.3869', longitude='36.6830',
+        )
+        self.serengeti = make_attraction(region, user)
+        make_attraction(region, user, name='Seronera', slug='seronera', featured=True)
+        Attraction.objects.filter(slug='seronera').update(latitude='-2.4500', longitude='34.8200')
+        self.zanzibar = make_attraction(region, user, name='Stone Town', slug='stone-town')
+        Attraction.objects.filter(slug='stone-town').update(latitude='-6.1630', longitude='39.1890')
+
+    def clusters(self, zoom, bbox=None):
+        params = {'zoom': zoom, **({'bbox': bbox} if bbox else {})}
+        response = self.client.get('/api/v1/attractions/clusters/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(response.data['clusters'], key=lambda c: c['count'])
+
+    def test_nearby_attractions_merge_at_low_zoom(self):
+        low = self.clusters(3)
+        self.assertEqual([c['count'] for c in low], [1, 2])
+        self.assertEqual(low[1]['attractions'][0]['slug'], 'seronera')  # featured represents the cluster
+        self.assertEqual([c['count'] for c in self.clusters(low[1]['expansion_zoom'] - 1)], [1, 2])
+        self.assertEqual([c['count'] for c in self.clusters(low[1]['expansion_zoom'])], [1, 1, 1])
+
+    def test_bbox_limits_results(self):
+        clusters = self.clusters(14, bbox='38,-7,40,-5')
+        self.assertEqual([c['attractions'][0]['slug'] for c in clusters], ['stone-town'])
+
+    def test_index_follows_catalogue_changes(self):
+        self.clusters(3)
+        index = get_index()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.serengeti.description = 'Updated.'
+            self.serengeti.save()
+            Region.objects.get(slug='arusha').save()
+        self.assertEqual(len(callbacks), 0)  # markers unchanged: no rebuild scheduled
+        self.assertIs(get_index(), index)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.serengeti.latitude, self.serengeti.longitude = '-6.1700', '39.2000'
+            self.serengeti.save()
+        self.assertIsNot(get_index(), index)
+        self.assertEqual([c['count'] for c in self.clusters(3)], [1, 2])
+        self.assertEqual(
+            {a['slug'] for c in self.clusters(3, bbox='38,-7,40,-5') for a in c['attractions']},
+            {'serengeti', 'stone-town'},
+        )
+
+    def test_deactivation_rebuilds_in_the_background(self):
+        index = get_index()
+        with override_settings(CATALOGUE_INDEX_REBUILD_ASYNC=True), patch.object(clustering, '_executor') as executor:
+            self.addCleanup(setattr, clustering, '_pending', False)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.zanzibar.is_active = False
+                self.zanzibar.save()
+                self.serengeti.delete()
+        executor.submit.assert_called_once_with(clustering._run)
+        self.assertIs(get_index(), index)  # queries are not held up by the rebuild
+
+        clustering.rebuild()
+        self.assertEqual([c['count'] for c in self.clusters(3)], [1])
+
+    def test_expired_index_refreshes_writes_from_other_processes(self):
+        index = get_index()
+        Attraction.objects.filter(pk=self.serengeti.pk).update(is_active=False)  # no signal, as in another process
+        self.assertIs(get_index(), index)
+        with override_settings(CATALOGUE_INDEX_MAX_AGE=0):
+            self.assertIs(get_index(), index)  # served while the refresh runs
+        self.assertIsNot(get_index(), index)
+        self.assertEqual([c['count'] for c in self.clusters(3)], [1, 1])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/v1/attractions/clusters/').status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/v1/attractions/clusters/', {'zoom': 3, 'bbox': '1,2,3'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DistanceMatrixTest(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_override = override_settings(DISTANCE_MATRIX_DIR=tmp.name, DISTANCE_MATRIX_NEIGHBOURS=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(reset_matrix)
+        reset_matrix()
+
+        user = User.objects.create_user(username='planner', email='plan@example.com', password='Pass1234!')
+        region = Region.objects.create(
+            name='Arusha', slug='arusha', description='Safari hub.', latitude='-3.3869', longitude='36.6830',
+        )
+        self.places = {}
+        for slug, lat, lon in [('serengeti', '-2.3333', '34.8333'), ('ngorongoro', '-3.2000', '35.5000'),
+                               ('arusha-np', '-3.2500', '36.8500'), ('stone-town', '-6.1630', '39.1890')]:
+            attraction = make_attraction(region, user, name=slug, slug=slug)
+            Attraction.objects.filter(pk=attraction.pk).update(latitude=lat, longitude=lon)
+            attraction.refresh_from_db()
+            self.places[slug] = attraction
+        self.matrix = build_matrix()
+
+    def nearest(self, slug, k=3):
+        return [(Attraction.objects.get(pk=pk).slug, km) for pk, km in get_matrix().nearest(self.places[slug].pk, k)]
+
+    def test_matrix_matches_haversine(self):
+        a, b = self.places['serengeti'], self.places['stone-town']
+        expected = haversine_km(float(a.latitude), float(a.longitude), float(b.latitude), float(b.longitude))
+        self.assertAlmostEqual(self.matrix.distance(a.pk, b.pk), expected, delta=0.01)
+        self.assertEqual(self.matrix.distances.dtype.name, 'float32')
+        self.assertEqual([slug for slug, _ in self.nearest('serengeti')], ['ngorongoro', 'arusha-np', 'stone-town'])
+
+    def test_move_updates_rows_incrementally(self):
+        zanzibar = self.places['stone-town']
+        zanzibar.latitude, zanzibar.longitude = '-2.3400', '34.8400'  # next to Serengeti
+        with self.captureOnCommitCallbacks(execute=True):
+            zanzibar.save()
+        self.assertEqual(self.nearest('serengeti', 1)[0][0], 'stone-town')
+        self.assertLess(self.nearest('serengeti', 1)[0][1], 2)
+        self.assertEqual(self.nearest('stone-town', 1)[0][0], 'serengeti')
+
+    def test_concurrent_moves_are_serialized(self):
+        serengeti, zanzibar = self.places['serengeti'], self.places['stone-town']
+        threads = [
+            threading.Thread(target=get_matrix().update_location, args=(zanzibar.pk, -2.34 - i / 1000, 34.84))
+            for i in range(8)
+        ] + [threading.Thread(target=get_matrix().update_location, args=(serengeti.pk, -2.3333, 34.8333 + i / 1000))
+             for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        matrix = get_matrix()
+        a, b = matrix.coords[matrix.positions[serengeti.pk]], matrix.coords[matrix.positions[zanzibar.pk]]
+        self.assertAlmostEqual(matrix.distance(serengeti.pk, zanzibar.pk), haversine_km(*a, *b), delta=0.01)
+        self.assertTrue((Path(settings.DISTANCE_MATRIX_DIR) / 'LOCK').exists())
+
+    def test_rolled_back_move_is_not_written(self):
+        zanzibar = self.places['stone-town']
+        zanzibar.latitude, zanzibar.longitude = '-2.3400', '34.8400'
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            zanzibar.save()
+        Attraction.objects.filter(pk=zanzibar.pk).update(latitude='-6.1630', longitude='39.1890')  # as if rolled back
+        self.assertEqual(self.nearest('serengeti')[-1][0], 'stone-town')  # nothing written before commit
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.nearest('serengeti')[-1][0], 'stone-town')  # the committed row is what gets written
+
+    def test_removed_attractions_are_skipped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.places['ngorongoro'].delete()
+        self.assertEqual([slug for slug, _ in self.nearest('serengeti')], ['arusha-np', 'stone-town'])
+
+    def test_nearby_endpoint_falls_back_for_new_attractions(self):
+        response = APIClient().get('/api/v1/attractions/serengeti/nearby/', {'limit': 2})
+        self.assertEqual([a['slug'] for a in response.data], ['ngorongoro', 'arusha-np'])
+
+        newcomer = make_attraction(self.places['serengeti'].region, None, name='Seronera', slug='seronera')
+        self.assertNotIn(newcomer.pk, get_matrix())
+        response = APIClient().get('/api/v1/attractions/seronera/nearby/', {'limit': 1})
+        self.assertEqual(response.data[0]['slug'], 'serengeti')
+
+
+
+@override_settings(RECOMMENDATION_TOP_K=2)
+class SimilarAttractionsTest(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_override = override_settings(RECOMMENDATION_DIR=tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(reset_model)
+        reset_model()
+
+        user = User.objects.create_user(username='curator', email='cur@example.com', password='Pass1234!')
+        region = Region.objects.create(
+            name='Arusha', slug='arusha', description='Safari hub.', latitude='-3.3869', longitude='36.6830',
+        )
+        self.places = {}
+        for slug, category, text, lat, lon in [
+            ('serengeti', 'national_park', 'Wildebeest migration and lions on the savannah.', '-2.3333', '34.8333'),
+            ('ngorongoro', 'national_park', 'Crater with lions, rhino and wildebeest on the savannah.', '-3.2000', '35.5000'),
+            ('tarangire', 'national_park', 'Elephants, baobabs and lions on the savannah.', '-3.8333', '36.0000'),
+            ('stone-town', 'cultural', 'Historic coral stone town, spice markets and carved doors.', '-6.1630', '39.1890'),
+            ('kilwa', 'cultural', 'Historic stone ruins of a sultanate and spice trade port.', '-8.9580', '39.5160'),
+        ]:
+            attraction = make_attraction(region, user, name=slug, slug=slug)
+            Attraction.objects.filter(pk=attraction.pk).update(
+                category=category, description=text, short_description=text, latitude=lat, longitude=lon,
+            )
+            attraction.refresh_from_db()
+            self.places[slug] = attraction
+        build_similarities()
+
+    def similar(self, slug):
+        return [entry.similar.slug for entry in self.places[slug].similar_entries.select_related('similar')]
+
+    def test_tokenize_drops_stop_words(self):
+        self.assertEqual(tokenize('The lions of the Serengeti, and 2 rhino'), ['lions', 'serengeti', 'rhino'])
+
+    def test_batch_keeps_top_k_by_content(self):
+        self.assertEqual(SimilarAttraction.objects.count(), 10)
+        self.assertEqual(set(self.similar('serengeti')), {'ngorongoro', 'tarangire'})
+        self.assertEqual(self.similar('stone-town')[0], 'kilwa')
+        scores = [entry.score for entry in self.places['serengeti'].similar_entries.all()]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_edit_refreshes_incrementally(self):
+        kilwa = self.places['kilwa']
+        kilwa.category = 'national_park'
+        kilwa.description = kilwa.short_description = 'Wildebeest migration with lions on the savannah.'
+        kilwa.latitude, kilwa.longitude = '-2.3400', '34.8400'
+        with patch('app.attractions.recommendations.SimilarityModel.build') as refit:
+            with self.captureOnCommitCallbacks(execute=True):
+                kilwa.save()
+        refit.assert_not_called()
+        self.assertEqual(self.similar('kilwa')[0], 'serengeti')
+        self.assertIn('kilwa', self.similar('serengeti'))
+        self.assertEqual(len(self.similar('serengeti')), 2)
+
+        kilwa.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            kilwa.save()
+        self.assertFalse(SimilarAttraction.objects.filter(similar=kilwa).exists())
+        self.assertFalse(kilwa.similar_entries.exists())
+
+    def test_delete_and_rollback(self):
+        self.assertEqual(self.similar('kilwa')[0], 'stone-town')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.places['stone-town'].delete()
+        self.assertEqual(len(self.similar('kilwa')), 2)  # refilled from the remaining attractions
+        self.assertNotIn('stone-town', self.similar('kilwa'))
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.places['kilwa'].save()
+        self.assertEqual(len(callbacks), 1)  # nothing runs until the transaction commits
+
+    @override_settings(RECOMMENDATION_REFRESH_ASYNC=True)
+    def test_refresh_runs_off_the_request_thread(self):
+        self.addCleanup(recommendations._pending.clear)
+        with patch.object(recommendations, '_executor') as executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.places['kilwa'].save()
+                self.places['kilwa'].save()
+        executor.submit.assert_called_once_with(recommendations._run, self.places['kilwa'].pk)
+
+    def test_similar_endpoint(self):
+        with self.assertNumQueries(1):
+            response = APIClient().get('/api/v1/attractions/stone-town/similar/', {'limit': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([a['slug'] for a in response.data], ['kilwa'])
+        self.assertEqual(
+            APIClient().get('/api/v1/attractions/missing/similar/').status_code, status.HTTP_404_NOT_FOUND,
+        )
+        self.assertEqual(
+            APIClient().get('/api/v1/attractions/stone-town/similar/', {'limit': 'x'}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+class AttractionsQueryBudgetTest(ScaledCatalogueMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.list_url = '/api/v1/attractions/'
+        self.attraction = Attraction.objects.select_related('region').order_by('id').first()
+        Attraction.objects.filter(pk=self.attraction.pk).update(is_featured=True)
+        self.user = User.objects.order_by('id').first()
+
+    def test_list_and_search(self):
+        with self.assertQueryBudget(3, max_time_ms=500):
+            response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json())
+        with self.assertQueryBudget(3, max_time_ms=500):
+            response = self.client.get(f'{self.list_url}?search={self.attraction.name.split()[0]}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json())
+        with self.assertQueryBudget(4, max_time_ms=500):
+            response = self.client.get(f'{self.list_url}?category={self.attraction.category}&fee=free,under_50&facets=1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json()['facets'])
+
+    def test_detail(self):
+        with self.assertQueryBudget(4):
+            response = self.client.get(f'{self.list_url}{self.attraction.slug}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['tips']), 2)
+
+    def test_featured_category_and_region(self):
+        with self.assertQueryBudget(3):
+            response = self.client.get(f'{self.list_url}featured/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json())
+        with self.assertQueryBudget(3):
+            response = self.client.get(f'{self.list_url}by_category/?category={self.attraction.category}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json())
+        with self.assertQueryBudget(3):
+            response = self.client.get(f'{self.list_url}by_region/?region={self.attraction.region.slug}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json())
+
+    def test_export(self):
+        with self.assertQueryBudget(4):
+            response = self.client.get(f'{self.list_url}export/?format=ndjson')
+            body = b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(body.splitlines()), Attraction.objects.filter(is_active=True).count())
+
+    def test_import(self):
+        self.client.force_authenticate(user=self.user)
+        region = self.attraction.region.slug
+        body = '\n'.join(
+            json.dumps({**IMPORT_ROW, 'region': region, 'name': f'Lake {i}', 'slug': f'budget-lake-{i}'})
+            for i in range(10)
+        )
+        with self.assertQueryBudget(10):
+            response = self.client.post(f'{self.list_url}import/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -2,9 +2,14 @@ from django.urls import path
 from .views import (
     attraction_list_create,
     attraction_detail,
+    attraction_clusters,
+    attraction_nearby,
+    attraction_similar,
     featured_attractions,
     attractions_by_category,
     attractions_by_region,
+    attractions_export,
+    attractions_import,
 )
 
 urlpatterns = [
@@ -12,5 +17,10 @@ urlpatterns = [
     path('featured/', featured_attractions, name='attraction-featured'),
     path('by_category/', attractions_by_category, name='attraction-by-category'),
     path('by_region/', attractions_by_region, name='attraction-by-region'),
+    path('clusters/', attraction_clusters, name='attraction-clusters'),
+    path('export/', attractions_export, name='attraction-export'),
+    path('import/', attractions_import, name='attraction-import'),
     path('<slug:slug>/', attraction_detail, name='attraction-detail'),
+    path('<slug:slug>/nearby/', attraction_nearby, name='attraction-nearby'),
+    path('<slug:slug>/similar/', attraction_similar, name='attraction-similar'),
 ]
@@ -1,17 +1,30 @@
+import codecs
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from django.core.cache import cache
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from django.conf import settings
+from django.db.models import Prefetch
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_safe
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample, OpenApiResponse
-from .models import Attraction
+from app.core.cache import cached_json_response, hash_key_part, namespace_key
+from app.core.perf import timed
+from .clustering import MAX_ZOOM, get_index
+from .distances import nearest_attractions
+from .export import EXPORT_FORMATS, iter_export
+from .facets import FilterError, cached_facet_counts, filters_q, parse_filters, search_q
+from .importer import AttractionImporter
+from .models import Attraction, AttractionTip, SimilarAttraction
 from .serializers import (
     AttractionListSerializer,
     AttractionDetailSerializer,
     AttractionCreateUpdateSerializer
 )
 
-BASE_QUERYSET = Attraction.objects.filter(is_active=True).select_related('region', 'created_by').prefetch_related('images', 'tips')
+BASE_QUERYSET = Attraction.objects.filter(is_active=True).select_related('region', 'created_by').prefetch_related(
+    'images', Prefetch('tips', queryset=AttractionTip.objects.select_related('created_by'))
+)
 
 
 @extend_schema(
@@ -22,11 +35,22 @@ BASE_QUERYSET = Attraction.objects.filter(is_active=True).select_related('region
         '| Parameter | Type | Description |\n'
         '|-----------|------|-------------|\n'
         '| `search` | string | Filter by name, description, short description, or region name |\n'
-        '| `ordering` | string | Sort by any field. Prefix with `-` for descending (e.g. `-created_at`) |\n\n'
+        '| `ordering` | string | Sort by any field. Prefix with `-` for descending (e.g. `-created_at`) |\n'
+        '| `category` | string | Comma-separated categories (e.g. `beach,island`) |\n'
+        '| `difficulty` | string | Comma-separated difficulty levels |\n'
+        '| `region` | string | Comma-separated region slugs |\n'
+        '| `requires_guide` | boolean | `true` or `false` |\n'
+        '| `requires_permit` | boolean | `true` or `false` |\n'
+        '| `fee` | string | Comma-separated fee bands: `free`, `under_50`, `50_to_100`, `over_100` |\n'
+        '| `facets` | boolean | `1` to wrap the results as `{count, facets, results}` with counts per filter value |\n\n'
+        'Filters combine with AND; comma-separated values of one filter combine with OR. Each facet\'s counts '
+        'ignore that facet\'s own filter, so they show how many results selecting another value would give. '
+        'Facet counts are cached and refreshed as soon as any attraction or region changes.\n\n'
         '**POST** — Create a new attraction. Requires authentication.\n\n'
         '**curl GET example:**\n'
         '```bash\n'
         'curl "https://cf89615f228bb45cc805447510de80.pythonanywhere.com/api/v1/attractions/?search=kilimanjaro"\n'
+        'curl "https://cf89615f228bb45cc805447510de80.pythonanywhere.com/api/v1/attractions/?category=beach,island&fee=free&facets=1"\n'
         '```\n\n'
         '**curl POST example:**\n'
         '```bash\n'
@@ -43,12 +67,37 @@ BASE_QUERYSET = Attraction.objects.filter(is_active=True).select_related('region
     parameters=[
         OpenApiParameter('search', description='Filter by name, description, short description or region', required=False, type=str),
         OpenApiParameter('ordering', description='Sort results by field. Prefix with `-` for descending (e.g. `name`, `-created_at`)', required=False, type=str),
+        OpenApiParameter('category', description='Comma-separated categories', required=False, type=str),
+        OpenApiParameter('difficulty', description='Comma-separated difficulty levels', required=False, type=str),
+        OpenApiParameter('region', description='Comma-separated region slugs', required=False, type=str),
+        OpenApiParameter('requires_guide', description='`true` or `false`', required=False, type=bool),
+        OpenApiParameter('requires_permit', description='`true` or `false`', required=False, type=bool),
+        OpenApiParameter('fee', description='Comma-separated fee bands: `free`, `under_50`, `50_to_100`, `over_100`', required=False, type=str),
+        OpenApiParameter('facets', description='`1` to include facet counts', required=False, type=bool),
     ],
     request=AttractionCreateUpdateSerializer,
     responses={
-        200: OpenApiResponse(response=AttractionListSerializer(many=True), description='List of active attractions.'),
+        200: OpenApiResponse(
+            response=AttractionListSerializer(many=True),
+            description='List of active attractions; with `facets=1`, an object with `count`, `facets` and `results`.',
+            examples=[
+                OpenApiExample(
+                    'With facets',
+                    response_only=True,
+                    value={
+                        'count': 12,
+                        'facets': {
+                            'category': [{'value': 'beach', 'label': 'Beach', 'count': 9}, {'value': 'island', 'label': 'Island', 'count': 3}],
+                            'fee': [{'value': 'free', 'label': 'Free', 'count': 12}, {'value': 'under_50', 'label': 'Under $50', 'count': 4}],
+                            'requires_guide': [{'value': False, 'label': 'No', 'count': 10}, {'value': True, 'label': 'Yes', 'count': 2}],
+                        },
+                        'results': ['...'],
+                    },
+                )
+            ],
+        ),
         201: OpenApiResponse(response=AttractionCreateUpdateSerializer, description='Attraction created successfully.'),
-        400: OpenApiResponse(description='Validation error — check required fields.'),
+        400: OpenApiResponse(description='Unknown filter value (GET) or validation error (POST).'),
         401: OpenApiResponse(description='Authentication required for POST.'),
     },
     examples=[
@@ -80,18 +129,21 @@ BASE_QUERYSET = Attraction.objects.filter(is_active=True).select_related('region
 @permission_classes([IsAuthenticatedOrReadOnly])
 def attraction_list_create(request):
     if request.method == 'GET':
-        attractions = BASE_QUERYSET
+        try:
+            filters = parse_filters(request.query_params)
+        except FilterError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         search = request.query_params.get('search')
-        if search:
-            attractions = attractions.filter(name__icontains=search) | \
-                          attractions.filter(description__icontains=search) | \
-                          attractions.filter(short_description__icontains=search) | \
-                          attractions.filter(region__name__icontains=search)
+        attractions = BASE_QUERYSET.filter(search_q(search), filters_q(filters))
         ordering = request.query_params.get('ordering')
         if ordering:
             attractions = attractions.order_by(ordering)
         serializer = AttractionListSerializer(attractions, many=True)
-        return Response(serializer.data)
+        with timed('serialize'):
+            data = serializer.data
+        if request.query_params.get('facets') not in ('1', 'true'):
+            return Response(data)
+        return Response({**cached_facet_counts(search, filters), 'results': data})
     serializer = AttractionCreateUpdateSerializer(data=request.data)
     if serializer.is_valid():
         serializer.save(created_by=request.user)
@@ -145,7 +197,9 @@ def attraction_detail(request, slug):
 
     if request.method == 'GET':
         serializer = AttractionDetailSerializer(attraction)
-        return Response(serializer.data)
+        with timed('serialize'):
+            data = serializer.data
+        return Response(data)
     elif request.method in ['PUT', 'PATCH']:
         serializer = AttractionCreateUpdateSerializer(attraction, data=request.data, partial=request.method == 'PATCH')
         if serializer.is_valid():
@@ -162,7 +216,8 @@ def attraction_detail(request, slug):
     summary='Featured attractions',
     description=(
         'Returns up to 6 attractions marked as featured (`is_featured=true`).\n\n'
-        'Results are cached in memory for **1 hour** — changes in the admin panel may take up to 1 hour to reflect here.\n\n'
+        'Results are cached for **1 hour** and refreshed as soon as any attraction or region changes. '
+        'Responses are served gzip/brotli compressed when the client sends `Accept-Encoding`.\n\n'
         '**curl example:**\n'
         '```bash\n'
         'curl https://cf89615f228bb45cc805447510de80.pythonanywhere.com/api/v1/attractions/featured/\n'
@@ -175,16 +230,12 @@ def attraction_detail(request, slug):
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def featured_attractions(request):
-    cache_key = 'featured_attractions'
-    featured = cache.get(cache_key)
-
-    if not featured:
+    def build():
         featured_qs = BASE_QUERYSET.filter(is_featured=True)[:6]
-        serializer = AttractionListSerializer(featured_qs, many=True)
-        cache.set(cache_key, serializer.data, 3600)
-        return Response(serializer.data)
+        return AttractionListSerializer(featured_qs, many=True).data
 
-    return Response(featured)
+    cache_key = namespace_key('catalogue', 'featured')
+    return cached_json_response(request, cache_key, build, settings.CATALOGUE_CACHE_TIMEOUT)
 
 
 @extend_schema(
@@ -231,6 +282,7 @@ def attractions_by_category(request):
     description=(
         'Returns all active attractions within a region, identified by its `slug`.\n\n'
         'Use `GET /api/v1/regions/` to list all available region slugs.\n\n'
+        'Results are cached and refreshed as soon as any attraction or region changes.\n\n'
         '**curl example:**\n'
         '```bash\n'
         'curl "https://cf89615f228bb45cc805447510de80.pythonanywhere.com/api/v1/attractions/by_region/?region=arusha"\n'
@@ -256,6 +308,277 @@ def attractions_by_region(request):
     if not region_slug:
         return Response({'error': 'Region parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-    attractions = BASE_QUERYSET.filter(region__slug=region_slug)
-    serializer = AttractionListSerializer(attractions, many=True)
-    return Response(serializer.data)
+    def build():
+        attractions = BASE_QUERYSET.filter(region__slug=region_slug)
+        return AttractionListSerializer(attractions, many=True).data
+
+    cache_key = namespace_key('catalogue', 'by_region', hash_key_part(region_slug))
+    return cached_json_response(request, cache_key, build, settings.CATALOGUE_CACHE_TIMEOUT)
+
+
+@extend_schema(
+    tags=['Attractions'],
+    summary='Clustered map markers',
+    description=(
+        'Returns attraction markers for a map viewport, already clustered for the given zoom level. '
+        'Each marker has a `count` (1 for a single attraction), up to 3 representative attractions '
+        '(featured first) and, for clusters, the `expansion_zoom` at which it splits apart.\n\n'
+        'Clusters come from an in-memory index that is rebuilt in the background when a marker moves, appears '
+        'or disappears; changes made through other server processes show up within `CATALOGUE_INDEX_MAX_AGE` '
+        'seconds (default 300).\n\n'
+        '**curl example:**\n'
+        '```bash\n'
+        'curl "https://cf89615f228bb45cc805447510de80.pythonanywhere.com/api/v1/attractions/clusters/?bbox=29.3,-11.8,40.5,-0.9&zoom=6"\n'
+        '```'
+    ),
+    parameters=[
+        OpenApiParameter(
+            'bbox',
+            description='Viewport as `min_lon,min_lat,max_lon,max_lat`. Defaults to the whole map.',
+            required=False,
+            type=str,
+        ),
+        OpenApiParameter('zoom', description=f'Map zoom level, 0-{MAX_ZOOM + 1} (higher values show single attractions).', required=True, type=int),
+    ],
+    responses={
+        200: OpenApiResponse(
+            description='Markers in the viewport.',
+            examples=[
+                OpenApiExample(
+                    'Clusters',
+                    value={
+                        'zoom': 6,
+                        'clusters': [
+                            {
+                                'latitude': -3.245,
+                                'longitude': 36.012,
+                                'count': 14,
+                                'expansion_zoom': 7,
+                                'attractions': [
+                                    {'slug': 'serengeti-national-park', 'name': 'Serengeti National Park', 'category': 'national_park'},
+                                ],
+                            }
+                        ],
+                    },
+                )
+            ],
+        ),
+        400: OpenApiResponse(description='`zoom` is missing or `bbox` is malformed.'),
+    },
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def attraction_clusters(request):
+    try:
+        zoom = int(request.query_params['zoom'])
+    except (KeyError, ValueError):
+        return Response({'error': 'zoom parameter is required and must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    bbox = request.query_params.get('bbox', '-180,-85,180,85')
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(value) for value in bbox.split(','))
+    except ValueError:
+        return Response({'error': 'bbox must be min_lon,min_lat,max_lon,max_lat'}, status=status.HTTP_400_BAD_REQUEST)
+    if min_lon > max_lon or min_lat > max_lat:
+        return Response({'error': 'bbox minimums must not exceed maximums'}, status=status.HTTP_400_BAD_REQUEST)
+
+    clusters = get_index().query((min_lon, min_lat, max_lon, max_lat), zoom)
+    return Response({'zoom': zoom, 'clusters': [cluster.as_dict() for cluster in clusters]})
+
+
+@extend_schema(
+    tags=['Attractions'],
+    summary='Nearby attractions',
+    description=(
+        'Returns the active attractions closest to this one by great-circle distance, nearest first.\n\n'
+        '**curl example:**\n'
+        '```bash\n'
+        'curl "https://cf89615f228bb45cc805447510de80.pythonanywhere.com/api/v1/attractions/serengeti-national-park/nearby/?limit=5"\n'
+        '```'
+    ),
+    parameters=[
+        OpenApiParameter('limit', description='Number of attractions to return (1-50, default 10).', required=False, type=int),
+    ],
+    responses={
+        200: OpenApiResponse(
+            description='Nearby attractions with their distance in km.',
+            examples=[
+                OpenApiExample(
+                    'Nearby',
+                    value=[{'slug': 'ngorongoro-crater', 'name': 'Ngorongoro Crater', 'category': 'wildlife', 'distance_km': 97.4}],
+                )
+            ],
+        ),
+        404: OpenApiResponse(description='Attraction not found.'),
+    },
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def attraction_nearby(request, slug):
+    try:
+        attraction = Attraction.objects.get(slug=slug, is_active=True)
+    except Attraction.DoesNotExist:
+        return Response({'error': 'Attraction not found'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    nearest = nearest_attractions(attraction, limit)
+    found = Attraction.objects.filter(is_active=True).only('slug', 'name', 'category').in_bulk(
+        [pk for pk, _ in nearest]
+    )
+    return Response([
+        {
+            'slug': found[pk].slug,
+            'name': found[pk].name,
+            'category': found[pk].category,
+            'distance_km': round(km, 1),
+        }
+        for pk, km in nearest if pk in found
+    ])
+
+
+
+@extend_schema(
+    tags=['Attractions'],
+    summary='Similar attractions',
+    description=(
+        'Returns the active attractions most similar to this one, best match first. Similarity combines '
+        'the descriptions (TF-IDF), category, difficulty, region and distance, and is precomputed by '
+        '`manage.py build_similar_attractions`; the list is empty until that has run.\n\n'
+        '**curl example:**\n'
+        '```bash\n'
+        'curl "https://cf89615f228bb45cc805447510de80.pythonanywhere.com/api/v1/attractions/serengeti-national-park/similar/?limit=5"\n'
+        '```'
+    ),
+    parameters=[
+        OpenApiParameter('limit', description='Number of attractions to return (1-50, default 10).', required=False, type=int),
+    ],
+    responses={
+        200: OpenApiResponse(
+            description='Similar attractions with a score between 0 and 1.',
+            examples=[
+                OpenApiExample(
+                    'Similar',
+                    value=[{'slug': 'ngorongoro-crater', 'name': 'Ngorongoro Crater', 'category': 'wildlife', 'score': 0.742}],
+                )
+            ],
+        ),
+        404: OpenApiResponse(description='Attraction not found.'),
+    },
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def attraction_similar(request, slug):
+    try:
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # One query on the (attraction, -score) index; only an empty result needs a second one.
+    entries = list(
+        SimilarAttraction.objects.filter(
+            attraction__slug=slug, attraction__is_active=True, similar__is_active=True,
+        ).select_related('similar').only('score', 'similar__slug', 'similar__name', 'similar__category')
+        .order_by('-score')[:limit]
+    )
+    if not entries and not Attraction.objects.filter(slug=slug, is_active=True).exists():
+        return Response({'error': 'Attraction not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response([
+        {
+            'slug': entry.similar.slug,
+            'name': entry.similar.name,
+            'category': entry.similar.category,
+            'score': round(entry.score, 3),
+        }
+        for entry in entries
+    ])
+
+# A plain Django view rather than @api_view: DRF reserves the `format` query
+# parameter for renderer negotiation, and the body is streamed, not rendered.
+@require_safe
+def attractions_export(request):
+    """
+    Stream every active attraction with its region, tips and image URLs.
+
+    GET /api/v1/attractions/export/?format=ndjson (default) or ?format=csv
+    """
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse(
+            {'error': f"Format must be one of: {', '.join(EXPORT_FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    response = StreamingHttpResponse(
+        iter_export(export_format, settings.EXPORT_CHUNK_SIZE),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="attractions.{export_format}"'
+    return response
+
+
+_IMPORT_CONTENT_TYPES = {content_type: fmt for fmt, content_type in EXPORT_FORMATS.items()}
+
+
+@extend_schema(
+    tags=['Attractions'],
+    summary='Bulk import attractions',
+    description=(
+        'Create many attractions in one request from NDJSON or CSV. Requires authentication.\n\n'
+        'Send the file as the raw body with `Content-Type: application/x-ndjson` or `text/csv`, '
+        'or as a multipart upload in a `file` field named `*.ndjson` / `*.csv`.\n\n'
+        'Columns are the same as the POST body of `/api/v1/attractions/`, except `region` is the region **slug**. '
+        'Optional `tips` is a list of `{"title", "description"}` objects (a JSON string in CSV). '
+        'Files produced by `/api/v1/attractions/export/` can be imported unchanged.\n\n'
+        'Valid rows are created; invalid rows and slugs that already exist are skipped and reported by line number.\n\n'
+        '**curl example:**\n'
+        '```bash\n'
+        'curl -X POST https://cf89615f228bb45cc805447510de80.pythonanywhere.com/api/v1/attractions/import/ \\\n'
+        '  -H "Authorization: Bearer <access_token>" \\\n'
+        '  -H "Content-Type: application/x-ndjson" \\\n'
+        '  --data-binary @attractions.ndjson\n'
+        '```'
+    ),
+    request={'application/x-ndjson': str, 'text/csv': str},
+    responses={
+        201: OpenApiResponse(
+            description='At least one attraction was created.',
+            examples=[OpenApiExample('Import report', value={
+                'created': 998, 'failed': 2,
+                'errors': [{'line': 14, 'slug': 'lake-natron', 'errors': {'region': ["Unknown region slug 'arusa'"]}}],
+            })],
+        ),
+        400: OpenApiResponse(description='Unsupported content type, the file is not UTF-8, or no row could be imported.'),
+        401: OpenApiResponse(description='Authentication required.'),
+    },
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def attractions_import(request):
+    content_type = request.content_type.split(';')[0].strip()
+    if content_type == 'multipart/form-data':
+        upload = request.FILES.get('file')
+        import_format = upload and upload.name.rsplit('.', 1)[-1].lower()
+        source = upload
+    else:
+        import_format = _IMPORT_CONTENT_TYPES.get(content_type)
+        source = request.stream or []
+
+    if import_format not in EXPORT_FORMATS:
+        return Response(
+            {'error': 'Send application/x-ndjson or text/csv, or upload a .ndjson/.csv file'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    importer = AttractionImporter(user=request.user, chunk_size=settings.IMPORT_CHUNK_SIZE)
+    try:
+        report = importer.run(codecs.iterdecode(source, 'utf-8'), import_format)
+    except UnicodeDecodeError:
+        # Chunks before the undecodable bytes are already committed; say how many.
+        return Response(
+            {'error': 'The file must be UTF-8 encoded', 'created': importer.created},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class CoreConfig(AppConfig):
+    name = 'app.core'
+
+    def ready(self):
+        from .metrics import record_connection
+        connection_created.connect(record_connection, dispatch_uid='core_record_connection')
@@ -0,0 +1,457 @@
+"""
+HTTP benchmark harness for the public API.
+
+The app is served from a background thread (a pooled WSGI server, so worker
+threads and their database connections are reused the way a gthread/uWSGI
+worker would reuse them) against either a freshly generated test database or
+the configured one. Open-Meteo is replaced by a local stub so weather routes
+are measured without network noise. Each route is warmed once, its query
+count is taken through the test client, and then it is driven at every
+requested concurrency level to collect p50/p95/p99 latency, throughput,
+errors and database connections opened per request (which shows whether
+persistent connections are actually being reused). Results are plain JSON so a run can be stored as a baseline and
+compared against later runs.
+"""
+import json
+import platform
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple
+from urllib.parse import parse_qs, urlparse
+
+import django
+import requests
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.servers.basehttp import WSGIRequestHandler, WSGIServer
+from django.db import DatabaseError, connection, transaction
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from app.attractions.models import Attraction
+from app.core.synthetic import SYNTHETIC_PASSWORD
+from app.weather.models import WeatherCache
+from app.weather.services import WeatherService
+
+DEFAULT_CONCURRENCY = (1, 8)
+DEFAULT_REQUESTS = 50
+DEFAULT_THRESHOLD = 0.15
+# Latency differences below this are noise on any machine, whatever the ratio.
+MIN_LATENCY_DELTA_MS = 1.0
+
+
+class Route(NamedTuple):
+    name: str
+    method: str
+    path: str
+    body: dict = None
+    auth: bool = False
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of ``values`` (``pct`` in 0-100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+class StubOpenMeteo:
+    """Minimal Open-Meteo stand-in answering ``current`` and ``daily`` queries."""
+
+    def __init__(self):
+        self.calls = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.calls += 1
+                body = json.dumps(stub.payload(parse_qs(urlparse(self.path).query))).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}/v1/forecast'
+
+    @staticmethod
+    def payload(params):
+        if 'daily' in params:
+            days = int(params.get('forecast_days', ['7'])[0])
+            today = date.today()
+            return {'daily': {
+                'time': [(today + timedelta(days=i)).isoformat() for i in range(days)],
+                'temperature_2m_max': [29.5] * days,
+                'temperature_2m_min': [19.0] * days,
+                'precipitation_sum': [1.2] * days,
+                'rain_sum': [1.2] * days,
+                'weather_code': [2] * days,
+            }}
+        return {'current': {
+            'time': timezone.now().strftime('%Y-%m-%dT%H:%M'),
+            'temperature_2m': 26.4,
+            'relative_humidity_2m': 68,
+            'apparent_temperature': 28.1,
+            'precipitation': 0.0,
+            'rain': 0.0,
+            'weather_code': 2,
+            'cloud_cover': 40,
+            'wind_speed_10m': 11.2,
+        }}
+
+    def __enter__(self):
+        self.original_url = WeatherService.BASE_URL
+        WeatherService.BASE_URL = self.url
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        WeatherService.BASE_URL = self.original_url
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class PooledWSGIServer(WSGIServer):
+    """WSGI server that hands requests to a fixed pool of reusable threads."""
+
+    def __init__(self, *args, workers=8, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bench-worker')
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        self.pool.shutdown(wait=True)
+        super().server_close()
+
+
+class LiveServer:
+    def __init__(self, workers=8):
+        self.httpd = PooledWSGIServer(('127.0.0.1', 0), _QuietHandler, workers=workers)
+        self.httpd.set_app(WSGIHandler())
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}'
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def default_routes(username, password=SYNTHETIC_PASSWORD):
+    """One representative request per read route in ``cofig/urls.py``, plus login."""
+    attraction = (
+        Attraction.objects.filter(is_active=True).select_related('region').order_by('id').first()
+    )
+    if attraction is None:
+        raise ValueError('No active attractions to benchmark; generate a catalogue first.')
+    weather = WeatherCache.objects.order_by('id').first()
+    search = attraction.name.split()[0]
+
+    routes = [
+        Route('schema', 'GET', '/api/schema/'),
+        Route('attraction-list', 'GET', '/api/v1/attractions/'),
+        Route('attraction-search', 'GET', f'/api/v1/attractions/?search={search}'),
+        Route('attraction-detail', 'GET', f'/api/v1/attractions/{attraction.slug}/'),
+        Route('attraction-featured', 'GET', '/api/v1/attractions/featured/'),
+        Route('attraction-by-category', 'GET',
+              f'/api/v1/attractions/by_category/?category={attraction.category}'),
+        Route('attraction-by-region', 'GET',
+              f'/api/v1/attractions/by_region/?region={attraction.region.slug}'),
+        Route('attraction-clusters', 'GET', '/api/v1/attractions/clusters/?bbox=29.3,-11.8,40.5,-0.9&zoom=7'),
+        Route('search-suggest', 'GET', f'/api/v1/search/suggest/?q={search[:4]}'),
+        Route('region-list', 'GET', '/api/v1/regions/'),
+        Route('region-detail', 'GET', f'/api/v1/regions/{attraction.region.slug}/'),
+        Route('weather-list', 'GET', '/api/v1/weather/'),
+        Route('weather-current', 'GET', f'/api/v1/weather/current/?attraction={attraction.slug}'),
+        Route('weather-forecast', 'GET', f'/api/v1/weather/forecast/?attraction={attraction.slug}'),
+        Route('weather-seasonal', 'GET', f'/api/v1/weather/seasonal/?attraction={attraction.slug}'),
+        Route('sync', 'GET', '/api/v1/sync/'),
+        Route('login', 'POST', '/api/v1/auth/login/', {'username': username, 'password': password}),
+        Route('profile', 'GET', '/api/v1/auth/profile/', auth=True),
+    ]
+    if weather is not None:
+        routes.append(Route('weather-detail', 'GET', f'/api/v1/weather/{weather.pk}/'))
+    return routes
+
+
+def latency_stats(latencies, errors, elapsed):
+    """
+    Summarize successful request ``latencies`` (ms). Failures are only counted
+    in ``errors``: a fast 500 must not pull the percentiles down.
+    """
+    return {
+        'requests': len(latencies) + errors,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50), 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99), 2) if latencies else None,
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+    }
+
+
+class ConnectionCounter:
+    """Counts database connections opened by any thread while active."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def _opened(self, sender, connection, **kwargs):
+        with self._lock:
+            self.count += 1
+
+    def __enter__(self):
+        connection_created.connect(self._opened, weak=False, dispatch_uid='benchmark_connections')
+        return self
+
+    def __exit__(self, *exc):
+        connection_created.disconnect(dispatch_uid='benchmark_connections')
+
+
+class BenchmarkRunner:
+    def __init__(self, routes, concurrency=DEFAULT_CONCURRENCY, requests_per_level=DEFAULT_REQUESTS,
+                 workers=None, mixed=None, log=None):
+        self.routes = routes
+        self.concurrency = tuple(concurrency)
+        self.requests_per_level = requests_per_level
+        self.workers = workers or max(self.concurrency)
+        self.mixed = mixed
+        self.log = log or (lambda *args: None)
+        self.token = None
+
+    def _headers(self, route):
+        return {'Authorization': f'Bearer {self.token}'} if route.auth and self.token else {}
+
+    def count_queries(self, route):
+        client = Client()
+        extra = {'HTTP_AUTHORIZATION': f'Bearer {self.token}'} if route.auth and self.token else {}
+        with CaptureQueriesContext(connection) as ctx:
+            if route.method == 'POST':
+                response = client.post(route.path, route.body, content_type='application/json', **extra)
+            else:
+                response = client.get(route.path, **extra)
+        return len(ctx.captured_queries), response.status_code
+
+    def _login(self, base_url):
+        login = next((r for r in self.routes if r.name == 'login'), None)
+        if login is None:
+            return
+        response = requests.post(base_url + login.path, json=login.body, timeout=30)
+        if response.ok:
+            self.token = response.json().get('access')
+
+    def _drive(self, session_factory, base_url, route, concurrency, connections):
+        per_worker = max(1, self.requests_per_level // concurrency)
+        latencies, errors = [], []
+
+        def worker():
+            session = session_factory()
+            local, failed = [], 0
+            for _ in range(per_worker):
+                started = time.perf_counter()
+                try:
+                    response = session.request(route.method, base_url + route.path, json=route.body,
+                                               headers=self._headers(route), timeout=60)
+                    response.content
+                    ok = response.status_code < 400
+                except requests.RequestException:
+                    ok = False
+                if ok:
+                    local.append((time.perf_counter() - started) * 1000)
+                else:
+                    failed += 1
+            session.close()
+            return local, failed
+
+        opened = connections.count
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for local, failed in pool.map(lambda _: worker(), range(concurrency)):
+                latencies.extend(local)
+                errors.append(failed)
+        elapsed = time.perf_counter() - started
+        opened = connections.count - opened
+
+        stats = latency_stats(latencies, sum(errors), elapsed)
+        return {**stats, 'connections_per_request': round(opened / stats['requests'], 3)}
+
+    def _mixed(self, base_url, readers, writers, duration):
+        """
+        Readers fetch attraction and weather detail pages over HTTP while
+        writers refresh WeatherCache rows in-process, the way the weather
+        updater does, for ``duration`` seconds. Lock contention shows up as
+        write errors ("database is locked") and as read latency.
+        """
+        attractions = list(Attraction.objects.filter(is_active=True).order_by('id')[:200])
+        weather_ids = list(WeatherCache.objects.order_by('id').values_list('id', flat=True)[:200])
+        paths = [f'/api/v1/attractions/{a.slug}/' for a in attractions] + \
+                [f'/api/v1/weather/{pk}/' for pk in weather_ids]
+        deadline = time.perf_counter() + duration
+
+        def reader(offset):
+            session, local, failed, i = requests.Session(), [], 0, offset
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = session.get(base_url + paths[i % len(paths)], timeout=60)
+                    ok = response.status_code < 400
+                except requests.RequestException:
+                    ok = False
+                if ok:
+                    local.append((time.perf_counter() - started) * 1000)
+                else:
+                    failed += 1
+                i += 1
+            session.close()
+            return local, failed
+
+        def writer(offset):
+            local, failed, i = [], 0, offset
+            try:
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        with transaction.atomic():
+                            WeatherService.update_attraction_weather_cache(attractions[i % len(attractions)])
+                    except DatabaseError:
+                        failed += 1
+                    else:
+                        local.append((time.perf_counter() - started) * 1000)
+                    i += 7
+            finally:
+                connection.close()
+            return local, failed
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=readers + writers) as pool:
+            read_futures = [pool.submit(reader, n * 13) for n in range(readers)]
+            write_futures = [pool.submit(writer, n) for n in range(writers)]
+            reads = [future.result() for future in read_futures]
+            writes = [future.result() for future in write_futures]
+        elapsed = time.perf_counter() - started
+
+        return {
+            side: latency_stats([ms for local, _ in results for ms in local],
+                                sum(failed for _, failed in results), elapsed)
+            for side, results in (('reads', reads), ('writes', writes))
+        }
+
+    def run(self):
+        results, scenarios = {}, {}
+        with StubOpenMeteo() as stub, LiveServer(workers=self.workers) as server, \
+                ConnectionCounter() as connections:
+            self._login(server.url)
+            for route in self.routes:
+                queries, status = self.count_queries(route)
+                # Warm caches so every level measures steady state.
+                requests.request(route.method, server.url + route.path, json=route.body,
+                                 headers=self._headers(route), timeout=60)
+                levels = {}
+                for concurrency in self.concurrency:
+                    levels[str(concurrency)] = self._drive(
+                        requests.Session, server.url, route, concurrency, connections,
+                    )
+                results[route.name] = {
+                    'method': route.method,
+                    'path': route.path,
+                    'status': status,
+                    'queries': queries,
+                    'levels': levels,
+                }
+                self.log(route.name, results[route.name])
+            if self.mixed:
+                scenarios['mixed-read-weather-write'] = self._mixed(server.url, **self.mixed)
+                self.log('mixed-read-weather-write', scenarios['mixed-read-weather-write'])
+            upstream_calls = stub.calls
+
+        return {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'host': socket.gethostname(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'attractions': Attraction.objects.count(),
+                'concurrency': list(self.concurrency),
+                'requests_per_level': self.requests_per_level,
+                'workers': self.workers,
+                'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+                'upstream_calls': upstream_calls,
+            },
+            'routes': results,
+            'scenarios': scenarios,
+        }
+
+
+def _compare_stats(label, old, new, threshold):
+    regressions = []
+    old_p95, new_p95 = old.get('p95_ms'), new.get('p95_ms')
+    # p95 is None when no request of the level succeeded: a regression now, nothing to compare against before.
+    if old_p95 is not None and new_p95 is None:
+        regressions.append(f'{label}: p95 {old_p95}ms -> no successful requests')
+    elif old_p95 is not None and new_p95 > old_p95 * (1 + threshold) and new_p95 - old_p95 > MIN_LATENCY_DELTA_MS:
+        regressions.append(f'{label}: p95 {old_p95}ms -> {new_p95}ms')
+    old_rps, new_rps = old['throughput_rps'], new['throughput_rps']
+    if old_rps and new_rps is not None and new_rps < old_rps * (1 - threshold):
+        regressions.append(f'{label}: throughput {old_rps} -> {new_rps} req/s')
+    old_cpr, new_cpr = old.get('connections_per_request'), new.get('connections_per_request')
+    if old_cpr is not None and new_cpr is not None and new_cpr - old_cpr >= 0.1:
+        regressions.append(f'{label}: connections/request {old_cpr} -> {new_cpr}')
+    if new['errors'] > old['errors']:
+        regressions.append(f"{label}: errors {old['errors']} -> {new['errors']}")
+    return regressions
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Return human-readable regressions of ``current`` against ``baseline``.
+
+    A route (or scenario side) regresses when its p95 latency grows, or its
+    throughput drops, by more than ``threshold``, or when it issues more
+    queries, errors or new database connections per request than before.
+    Anything missing from either run is ignored.
+    """
+    regressions = []
+    for name, old in baseline.get('routes', {}).items():
+        new = current.get('routes', {}).get(name)
+        if new is None:
+            continue
+        if new['queries'] > old['queries']:
+            regressions.append(f"{name}: queries {old['queries']} -> {new['queries']}")
+        for level, old_stats in old['levels'].items():
+            if level in new['levels']:
+                regressions += _compare_stats(f'{name} @ c={level}', old_stats, new['levels'][level], threshold)
+    for name, old in baseline.get('scenarios', {}).items():
+        new = current.get('scenarios', {}).get(name, {})
+        for side, old_stats in old.items():
+            if side in new:
+                regressions += _compare_stats(f'{name} {side}', old_stats, new[side], threshold)
+    return regressions
@@ -0,0 +1,89 @@
+"""
+Cache helpers shared by the API apps.
+
+Namespaces
+    Keys built with ``namespace_key`` embed a version number. Bumping the
+    namespace (e.g. from a post_save signal) makes every key in it miss at
+    once without having to know or delete the individual keys.
+
+Pre-compressed payloads
+    ``cached_json_response`` stores the rendered JSON body together with its
+    gzip/brotli encodings, so compression happens once per cache fill and each
+    hit only picks the variant the client accepts.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+
+from .compression import SUPPORTED_ENCODINGS, choose_encoding, compress
+from .perf import timed
+
+
+def _version_key(namespace):
+    return f'{namespace}:version'
+
+
+def namespace_version(namespace):
+    # Seeded from the clock so a version key evicted from the cache can never
+    # restart at a number that older entries were stored under.
+    return cache.get_or_set(_version_key(namespace), lambda: int(time.time() * 1000), None)
+
+
+def bump_namespace(namespace):
+    try:
+        return cache.incr(_version_key(namespace))
+    except ValueError:
+        return namespace_version(namespace)
+
+
+def namespace_key(namespace, *parts):
+    return ':'.join([namespace, f'v{namespace_version(namespace)}', *map(str, parts)])
+
+
+def hash_key_part(value):
+    """Make arbitrary user input (search terms, query params) safe for a cache key."""
+    return hashlib.md5(str(value).encode()).hexdigest()
+
+
+def build_payload(content, content_type='application/json'):
+    payload = {
+        'content_type': content_type,
+        'etag': 'W/"%s"' % hashlib.md5(content).hexdigest(),
+        'identity': content,
+    }
+    for encoding in SUPPORTED_ENCODINGS:
+        encoded = compress(content, encoding, cached=True)
+        if len(encoded) < len(content):
+            payload[encoding] = encoded
+    return payload
+
+
+def payload_response(request, payload, status=200):
+    available = [encoding for encoding in SUPPORTED_ENCODINGS if encoding in payload]
+    encoding = choose_encoding(request, available)
+    response = HttpResponse(payload[encoding or 'identity'], content_type=payload['content_type'], status=status)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['ETag'] = payload['etag']
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return get_conditional_response(request, etag=payload['etag'], response=response)
+
+
+def cached_json_response(request, key, build, timeout):
+    """
+    Serve ``build()`` (any JSON-serializable data) from the cache under ``key``,
+    rendering and compressing it only when the entry is missing.
+    """
+    payload = cache.get(key)
+    if payload is None:
+        with timed('serialize'):
+            data = build()
+        with timed('render'):
+            content = JSONRenderer().render(data)
+        payload = build_payload(content)
+        cache.set(key, payload, timeout)
+    return payload_response(request, payload)
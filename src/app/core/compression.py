@@ -0,0 +1,94 @@
+"""
+Negotiated response compression.
+
+gzip is always available; brotli is used when the optional ``brotli`` package
+is installed and the client prefers it. Cached payloads are compressed once
+when the cache is filled (see ``app.core.cache``) and are passed through here
+untouched because they already carry a Content-Encoding.
+"""
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip still works without it
+    brotli = None
+
+# Per-request compression has to be cheap; pre-compressed cache entries are
+# only built once per fill, so they can afford the maximum quality.
+BROTLI_DYNAMIC_QUALITY = 5
+BROTLI_CACHED_QUALITY = 11
+
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+
+def choose_encoding(request, available=SUPPORTED_ENCODINGS):
+    """
+    Pick the best of ``available`` encodings from the request's Accept-Encoding
+    header, honouring q-values. Returns None when only identity is acceptable.
+    """
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if not header:
+        return None
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(content, encoding, cached=False):
+    if encoding == 'br':
+        quality = BROTLI_CACHED_QUALITY if cached else BROTLI_DYNAMIC_QUALITY
+        return brotli.compress(content, quality=quality)
+    if encoding == 'gzip':
+        return compress_string(content)
+    raise ValueError(f'Unsupported encoding: {encoding}')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that answers with brotli when the client prefers it.
+
+    Brotli is only applied to GET/HEAD responses: anything else (logins,
+    registrations) falls back to Django's gzip path, which keeps its BREACH
+    mitigation for responses that may contain secrets.
+    """
+
+    def process_response(self, request, response):
+        if (
+            brotli is None
+            or request.method not in ('GET', 'HEAD')
+            or response.streaming
+            or response.has_header('Content-Encoding')
+            or len(response.content) < 200
+            or choose_encoding(request) != 'br'
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed_content = compress(response.content, 'br')
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response.headers['Content-Length'] = str(len(response.content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
@@ -0,0 +1,54 @@
+"""
+SQLite backend tuned for serving traffic (the PythonAnywhere profile).
+
+Stock SQLite uses a rollback journal, so one writer (e.g. a weather cache
+update) blocks every reader, and each new connection starts with a tiny page
+cache. On connect this backend applies:
+
+- ``journal_mode=WAL``: readers no longer block on, or block, the writer
+- ``synchronous=NORMAL``: safe with WAL; fsync at checkpoints only
+- ``mmap_size`` / ``cache_size``: keep hot pages in memory across requests
+- ``busy_timeout``: wait for the write lock instead of failing immediately
+- ``temp_store=MEMORY``: sorts and temp B-trees stay off disk
+
+Override any of them with a ``PRAGMAS`` dict in the database settings.
+``TRANSACTION_MODE = 'IMMEDIATE'`` makes ``atomic()`` take the write lock up
+front (``BEGIN IMMEDIATE``), so a read-then-write transaction cannot fail with
+"database is locked" on lock upgrade, which ``busy_timeout`` does not cover.
+"""
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,  # negative = KiB, i.e. ~20 MB
+    'busy_timeout': 5000,  # ms
+    'temp_store': 'MEMORY',
+}
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+_PRAGMA_VALUE = re.compile(r'^-?\w+$')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def pragmas(self):
+        pragmas = {**DEFAULT_PRAGMAS, **self.settings_dict.get('PRAGMAS', {})}
+        for name, value in pragmas.items():
+            if not (name.isidentifier() and _PRAGMA_VALUE.match(str(value))):
+                raise ImproperlyConfigured(f'Invalid SQLite pragma: {name}={value!r}')
+        return pragmas
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas().items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict.get('TRANSACTION_MODE', 'DEFERRED').upper()
+        if mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(f'Invalid SQLite TRANSACTION_MODE: {mode}')
+        self.cursor().execute(f'BEGIN {mode}')
@@ -0,0 +1,81 @@
+"""
+Read-replica routing.
+
+``ReplicaPinningMiddleware`` decides per request whether reads may go to a
+replica: only safe-method requests from clients that have not written
+recently. ``ReadReplicaRouter`` then sends ORM reads to a random alias from
+``DATABASE_REPLICAS`` while that flag is set, and everything else (writes,
+reads in unsafe requests, management commands, signals) to ``default``.
+
+Read-your-writes: after an unsafe request the client is pinned to the
+primary for ``DATABASE_REPLICA_PIN_SECONDS``, by a cookie for browsers and by
+a cache entry keyed on the hashed ``Authorization`` header for API clients,
+which comfortably outlasts normal replication lag.
+"""
+import hashlib
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'db_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+def _pin_key(request):
+    authorization = request.headers.get('Authorization')
+    if not authorization:
+        return None
+    return f'dbpin:{hashlib.sha256(authorization.encode()).hexdigest()}'
+
+
+def is_pinned(request):
+    if request.COOKIES.get(PIN_COOKIE):
+        return True
+    key = _pin_key(request)
+    return key is not None and cache.get(key) is not None
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and _read_from_replica.get():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaPinningMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        safe = request.method in SAFE_METHODS
+        token = _read_from_replica.set(safe and not is_pinned(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_from_replica.reset(token)
+
+        if not safe:
+            seconds = settings.DATABASE_REPLICA_PIN_SECONDS
+            key = _pin_key(request)
+            if key is not None:
+                cache.set(key, 1, seconds)
+            response.set_cookie(PIN_COOKIE, '1', max_age=seconds, httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,161 @@
+"""
+Management command to benchmark every API route over real HTTP.
+
+Run: python src/manage.py benchmark --output bench/baseline.json
+     python src/manage.py benchmark --attractions 20000 --concurrency 1,8,32 --requests 200
+     python src/manage.py benchmark --compare bench/baseline.json --threshold 0.2
+     python src/manage.py benchmark --conn-max-age 0 --output bench/no-persistent.json
+     python src/manage.py benchmark --mixed --routes region-list --readers 8 --writers 4 --duration 20
+     python src/manage.py benchmark --use-existing-db --username alice --password secret
+
+By default a throwaway test database is created (a temporary file for SQLite,
+``test_<name>`` elsewhere), filled with a deterministic synthetic catalogue and
+destroyed afterwards, so runs are comparable across machines and commits.
+"""
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from app.core.benchmark import (
+    DEFAULT_REQUESTS,
+    DEFAULT_THRESHOLD,
+    BenchmarkRunner,
+    compare,
+    default_routes,
+)
+from app.core.slowlog import reset_store
+from app.core.synthetic import SYNTHETIC_PASSWORD, SYNTHETIC_PREFIX, CatalogueGenerator
+
+
+class Command(BaseCommand):
+    help = "Benchmark API routes (latency percentiles, throughput, query counts) and compare to a baseline"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--attractions", type=int, default=2000,
+                            help="Synthetic attractions to generate into the throwaway database")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--use-existing-db", action="store_true",
+                            help="Benchmark the configured database as-is instead of a generated one")
+        parser.add_argument("--username", default=f"{SYNTHETIC_PREFIX}user-0000000")
+        parser.add_argument("--password", default=SYNTHETIC_PASSWORD)
+        parser.add_argument("--concurrency", default="1,8", help="Comma-separated concurrency levels")
+        parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS,
+                            help="Requests per route per concurrency level")
+        parser.add_argument("--workers", type=int, help="Server threads (default: highest concurrency)")
+        parser.add_argument("--conn-max-age", type=int,
+                            help="Override DATABASES CONN_MAX_AGE for the run (0 = new connection per request)")
+        parser.add_argument("--mixed", action="store_true",
+                            help="Also run the mixed read / weather-write concurrency scenario")
+        parser.add_argument("--readers", type=int, default=8, help="HTTP reader threads for --mixed")
+        parser.add_argument("--writers", type=int, default=2, help="Weather writer threads for --mixed")
+        parser.add_argument("--duration", type=float, default=10, help="Seconds to run --mixed for")
+        parser.add_argument("--routes", help="Comma-separated route names to run (default: all)")
+        parser.add_argument("--output", help="Write results as JSON to this file")
+        parser.add_argument("--compare", help="Baseline JSON to compare the results against")
+        parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                            help="Relative p95/throughput change counted as a regression")
+
+    def handle(self, *args, **options):
+        try:
+            concurrency = [int(level) for level in options["concurrency"].split(",")]
+        except ValueError:
+            raise CommandError("--concurrency must be a comma-separated list of integers")
+
+        baseline = None
+        if options["compare"]:
+            try:
+                baseline = json.loads(Path(options["compare"]).read_text())
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read baseline: {e}")
+
+        old_config = tmp_path = None
+        if not options["use_existing_db"]:
+            if connection.vendor == "sqlite":
+                fd, tmp_path = tempfile.mkstemp(prefix="benchmark-", suffix=".sqlite3")
+                os.close(fd)
+                connection.settings_dict["TEST"]["NAME"] = tmp_path
+            self.stdout.write("Creating benchmark database...")
+            old_config = setup_databases(verbosity=0, interactive=False, aliases={"default"})
+
+        try:
+            if old_config is not None:
+                generator = CatalogueGenerator(seed=options["seed"], record_changelog=True)
+                generator.generate_users(10)
+                generator.generate_attractions(options["attractions"])
+                self.stdout.write(f"Generated {options['attractions']} attractions.")
+            cache.clear()
+            if options["conn_max_age"] is not None:
+                connection.settings_dict["CONN_MAX_AGE"] = options["conn_max_age"]
+
+            routes = default_routes(options["username"], options["password"])
+            if options["routes"]:
+                wanted = set(options["routes"].split(","))
+                unknown = wanted - {route.name for route in routes}
+                if unknown:
+                    raise CommandError(f"Unknown routes: {', '.join(sorted(unknown))}")
+                routes = [route for route in routes if route.name in wanted]
+
+            runner = BenchmarkRunner(
+                routes,
+                concurrency=concurrency,
+                requests_per_level=options["requests"],
+                workers=options["workers"],
+                mixed=options["mixed"] and {
+                    "readers": options["readers"],
+                    "writers": options["writers"],
+                    "duration": options["duration"],
+                },
+                log=self._log_result,
+            )
+            hosts = list(settings.ALLOWED_HOSTS) + ["testserver", "127.0.0.1"]
+            # Throttles would turn the login route into a stream of 429s.
+            rest_framework = {**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {}}
+            # Slow requests are still captured (that cost is part of what is measured) but not kept.
+            reset_store()
+            with override_settings(DEBUG=False, ALLOWED_HOSTS=hosts, REST_FRAMEWORK=rest_framework,
+                                   SLOW_LOG_FILE=os.devnull):
+                results = runner.run()
+            reset_store()
+        finally:
+            if old_config is not None:
+                teardown_databases(old_config, verbosity=0)
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        if options["output"]:
+            output = Path(options["output"])
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_text(json.dumps(results, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"✓ Results written to {output}"))
+
+        if baseline is not None:
+            regressions = compare(baseline, results, options["threshold"])
+            if regressions:
+                for line in regressions:
+                    self.stdout.write(self.style.ERROR(f"  ✗ {line}"))
+                raise CommandError(f"{len(regressions)} regression(s) against {options['compare']}")
+            self.stdout.write(self.style.SUCCESS("✓ No regressions against baseline"))
+
+    def _log_result(self, name, result):
+        if "levels" not in result:
+            sides = "  ".join(
+                f"{side}: p50 {stats['p50_ms']}ms p95 {stats['p95_ms']}ms {stats['throughput_rps']}/s"
+                + (f" ({stats['errors']} errors)" if stats["errors"] else "")
+                for side, stats in result.items()
+            )
+            self.stdout.write(f"  {name:<24} {sides}")
+            return
+        levels = "  ".join(
+            f"c={level}: p50 {stats['p50_ms']}ms p95 {stats['p95_ms']}ms "
+            f"p99 {stats['p99_ms']}ms {stats['throughput_rps']} req/s "
+            f"{stats['connections_per_request']} conn/req"
+            + (f" ({stats['errors']} errors)" if stats["errors"] else "")
+            for level, stats in result["levels"].items()
+        )
+        self.stdout.write(f"  {name:<24} {result['queries']:>3} queries  {levels}")
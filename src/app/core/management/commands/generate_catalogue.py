@@ -0,0 +1,61 @@
+"""
+Management command to generate a large synthetic catalogue for scale testing.
+
+Run: python src/manage.py generate_catalogue --attractions 100000
+     python src/manage.py generate_catalogue --attractions 1000000 --users 50000 --seed 7
+     python src/manage.py generate_catalogue --clear
+
+Use a dedicated database: synthetic rows are mixed into whatever is there.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from app.core.synthetic import CatalogueGenerator
+
+
+class Command(BaseCommand):
+    help = "Generate a deterministic synthetic catalogue (attractions, images, tips, weather, users)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--attractions", type=int, default=10000)
+        parser.add_argument("--images-per", type=int, default=2, help="Images per attraction")
+        parser.add_argument("--tips-per", type=int, default=2, help="Tips per attraction (max 6)")
+        parser.add_argument("--weather-ratio", type=float, default=1.0,
+                            help="Fraction of attractions that get a weather cache row")
+        parser.add_argument("--no-seasonal", action="store_true", help="Skip seasonal weather patterns")
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--skip-changelog", action="store_true",
+                            help="Do not write sync change-log entries (faster; /sync/ will not see the rows)")
+        parser.add_argument("--clear", action="store_true", help="Delete previously generated rows first")
+
+    def handle(self, *args, **options):
+        generator = CatalogueGenerator(
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            record_changelog=not options["skip_changelog"],
+            log=self.stdout.write,
+        )
+        started = time.monotonic()
+
+        if options["clear"]:
+            self.stdout.write("Clearing synthetic data...")
+            generator.clear()
+            self.stdout.write(self.style.WARNING("Synthetic data cleared."))
+
+        if options["users"]:
+            self.stdout.write(f"\n[1/2] Generating {options['users']} users...")
+            generator.generate_users(options["users"])
+
+        if options["attractions"]:
+            self.stdout.write(f"\n[2/2] Generating {options['attractions']} attractions...")
+            generator.generate_attractions(
+                options["attractions"],
+                images_per=options["images_per"],
+                tips_per=options["tips_per"],
+                weather_ratio=options["weather_ratio"],
+                seasonal=not options["no_seasonal"],
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"\n✓ COMPLETE in {time.monotonic() - started:.1f}s"))
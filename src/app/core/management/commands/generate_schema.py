@@ -0,0 +1,22 @@
+"""
+Management command to build the static OpenAPI schema served at /api/schema/.
+
+Run as part of every deploy (next to collectstatic):
+    python src/manage.py generate_schema
+"""
+from django.core.management.base import BaseCommand
+from app.core.schema import write_schema
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema once and write it to the versioned schema file"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            help="Write to this path instead of OPENAPI_SCHEMA_DIR/openapi-<version>.json",
+        )
+
+    def handle(self, *args, **options):
+        path = write_schema(options["file"])
+        self.stdout.write(self.style.SUCCESS(f"✓ Schema written to {path}"))
@@ -0,0 +1,90 @@
+"""
+Management command to summarize captured slow queries.
+
+Run: python src/manage.py slow_queries
+     python src/manage.py slow_queries --top 5 --sort count
+     python src/manage.py slow_queries --view attraction-list-create --explain
+     python src/manage.py slow_queries --requests
+"""
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from app.core.slowlog import iter_records
+
+SORT_KEYS = {
+    'total': lambda group: group['total_ms'],
+    'count': lambda group: group['count'],
+    'max': lambda group: group['max_ms'],
+    'mean': lambda group: group['total_ms'] / group['count'],
+}
+
+
+class Command(BaseCommand):
+    help = "Summarize the slow-query store by normalized query fingerprint"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", help="Store to read (default: SLOW_LOG_FILE)")
+        parser.add_argument("--top", type=int, default=10)
+        parser.add_argument("--sort", choices=sorted(SORT_KEYS), default="total")
+        parser.add_argument("--view", help="Only queries issued by this route name")
+        parser.add_argument("--explain", action="store_true", help="Show the plan of the slowest explained sample")
+        parser.add_argument("--requests", action="store_true",
+                            help="Summarize slow requests per route instead of queries")
+
+    def handle(self, *args, **options):
+        if not options["file"] and not settings.SLOW_LOG_FILE:
+            raise CommandError("SLOW_LOG_FILE is empty, so slow requests go to stderr; set it or pass --file")
+        records = [
+            record for record in iter_records(options["file"])
+            if not options["view"] or record.get("view") == options["view"]
+        ]
+        if not records:
+            self.stdout.write(self.style.WARNING("No slow requests recorded."))
+            return
+        if options["requests"]:
+            self._requests(records, options["top"])
+        else:
+            self._queries(records, options)
+
+    def _queries(self, records, options):
+        groups = defaultdict(lambda: {
+            "count": 0, "total_ms": 0.0, "max_ms": 0.0, "views": Counter(), "plan": None,
+        })
+        for record in records:
+            for query in record.get("slow_queries", []):
+                group = groups[query["fingerprint"]]
+                group["count"] += 1
+                group["total_ms"] += query["duration_ms"]
+                group["views"][record.get("view")] += 1
+                group["max_ms"] = max(group["max_ms"], query["duration_ms"])
+                # Only a sample of requests is explained: keep the slowest query that has a plan.
+                if query.get("explain") and (group["plan"] is None or query["duration_ms"] >= group["plan"]["duration_ms"]):
+                    group["plan"] = query
+
+        ranked = sorted(groups.items(), key=lambda item: SORT_KEYS[options["sort"]](item[1]), reverse=True)
+        self.stdout.write(f"{len(groups)} fingerprints from {len(records)} requests\n")
+        for rank, (fp, group) in enumerate(ranked[:options["top"]], start=1):
+            view, _ = group["views"].most_common(1)[0]
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"#{rank}  {group['count']}x  total {group['total_ms']:.1f}ms  "
+                f"mean {group['total_ms'] / group['count']:.1f}ms  max {group['max_ms']:.1f}ms  [{view}]"
+            ))
+            self.stdout.write(f"    {fp}")
+            if options["explain"] and group["plan"]:
+                self.stdout.write(f"    plan of a {group['plan']['duration_ms']:.1f}ms run:")
+                for line in group["plan"]["explain"]:
+                    self.stdout.write(f"      {line}")
+
+    def _requests(self, records, top):
+        groups = defaultdict(list)
+        for record in records:
+            groups[(record["method"], record.get("view"))].append(record)
+        ranked = sorted(groups.items(), key=lambda item: sum(r["duration_ms"] for r in item[1]), reverse=True)
+        for (method, view), items in ranked[:top]:
+            durations = sorted(r["duration_ms"] for r in items)
+            self.stdout.write(
+                f"  {method:<6} {view or '-':<28} {len(items):>5}x  "
+                f"max {durations[-1]:.1f}ms  median {durations[len(durations) // 2]:.1f}ms  "
+                f"avg queries {sum(r['queries'] for r in items) / len(items):.1f}"
+            )
@@ -0,0 +1,34 @@
+"""
+Management command to copy the primary SQLite database into each replica.
+
+Stands in for replication when trying the read-replica router locally:
+
+    DATABASE_REPLICAS=/tmp/replica1.sqlite3 python src/manage.py sync_sqlite_replicas
+
+Uses SQLite's online backup API, so it is safe while the app is running.
+"""
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = "Copy the default SQLite database into every DATABASE_REPLICAS alias"
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("DATABASE_REPLICAS is empty")
+        if connections["default"].vendor != "sqlite":
+            raise CommandError("Only SQLite replicas can be synced; use real replication for MySQL")
+
+        source = connections["default"]
+        source.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            target = sqlite3.connect(connections[alias].settings_dict["NAME"])
+            try:
+                source.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(self.style.SUCCESS(f"✓ {alias} <- default"))
@@ -0,0 +1,106 @@
+"""
+Prometheus metrics.
+
+Exposed at ``/metrics`` in the Prometheus text format. Under a pre-forking
+server (gunicorn, uWSGI) each worker keeps its own counters, so set
+``PROMETHEUS_MULTIPROC_DIR`` to an empty, writable directory before the
+workers start: prometheus_client then backs every metric with a memory-mapped
+file there and the endpoint aggregates all of them through
+``MultiProcessCollector``. With gunicorn, also call
+``prometheus_client.multiprocess.mark_process_dead(worker.pid)`` from the
+``child_exit`` hook and wipe the directory on deploy.
+
+Set ``METRICS_TOKEN`` to require ``Authorization: Bearer <token>`` on scrapes.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+HTTP_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+REQUEST_LATENCY = Histogram(
+    'api_request_duration_seconds', 'API request latency by route name',
+    ['route', 'method', 'status'],
+)
+CACHE_REQUESTS = Counter(
+    'api_cache_requests_total', 'Cache lookups by key namespace and result',
+    ['namespace', 'result'],
+)
+UPSTREAM_REQUESTS = Counter(
+    'api_upstream_requests_total', 'Calls to upstream services by outcome',
+    ['service', 'outcome'],
+)
+UPSTREAM_LATENCY = Histogram(
+    'api_upstream_duration_seconds', 'Upstream call latency', ['service'],
+)
+DB_CONNECTIONS = Counter(
+    'api_db_connections_opened_total', 'Database connections opened', ['alias'],
+)
+JWT_AUTH_LATENCY = Histogram(
+    'api_jwt_authentication_duration_seconds', 'Time spent authenticating JWT bearer tokens',
+    buckets=FAST_BUCKETS,
+)
+
+
+def cache_namespace(key):
+    """``catalogue:v12:featured`` -> ``catalogue``; keys without a namespace count as ``other``."""
+    namespace, sep, _ = str(key).partition(':')
+    return namespace if sep else 'other'
+
+
+def record_cache_lookup(key, hit):
+    CACHE_REQUESTS.labels(cache_namespace(key), 'hit' if hit else 'miss').inc()
+
+
+def record_request(route, method, status, seconds):
+    method = method if method in HTTP_METHODS else 'other'
+    REQUEST_LATENCY.labels(route, method, str(status)[0] + 'xx').observe(seconds)
+
+
+@contextmanager
+def track_upstream(service):
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        UPSTREAM_LATENCY.labels(service).observe(time.perf_counter() - started)
+        UPSTREAM_REQUESTS.labels(service, outcome).inc()
+
+
+def record_connection(sender, connection, **kwargs):
+    DB_CONNECTIONS.labels(connection.alias).inc()
+
+
+def render_metrics():
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        route = (match.view_name if match else None) or 'unmatched'
+        record_request(route, request.method, response.status_code, time.perf_counter() - started)
+        return response
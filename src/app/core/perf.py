@@ -0,0 +1,168 @@
+"""
+Per-request performance instrumentation.
+
+``PerformanceMiddleware`` samples a fraction of requests (``PERF_SAMPLE_RATE``,
+0 disables it). For a sampled request it opens a ``RequestMetrics`` in a
+context variable, and the instrumentation points below add to it:
+
+- database time and query count, through ``connection.execute_wrapper``
+- cache hits and misses, through ``InstrumentedLocMemCache``
+- upstream (Open-Meteo) calls, through ``timed('upstream')`` in WeatherService
+- serialization and JSON rendering, through ``timed('serialize')`` /
+  ``timed('render')`` and ``TimedJSONRenderer``
+
+The totals are returned in a ``Server-Timing`` header and logged as one JSON
+line on the ``app.perf`` logger. Requests that are not sampled never touch the
+context variable, so every hook reduces to a ``None`` check.
+"""
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+from rest_framework.renderers import JSONRenderer
+from . import metrics as prometheus
+
+logger = logging.getLogger('app.perf')
+
+_current = ContextVar('request_metrics', default=None)
+_MISSING = object()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.upstream_calls = 0
+        self.durations = {'db': 0.0, 'upstream': 0.0, 'serialize': 0.0, 'render': 0.0}
+
+    def add(self, name, ms):
+        self.durations[name] = self.durations.get(name, 0.0) + ms
+
+    @property
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def as_dict(self, total_ms):
+        return {
+            'total_ms': round(total_ms, 2),
+            'queries': self.queries,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'upstream_calls': self.upstream_calls,
+            **{f'{name}_ms': round(ms, 2) for name, ms in self.durations.items()},
+        }
+
+    def server_timing(self, total_ms):
+        d = self.durations
+        return ', '.join([
+            f'db;dur={d["db"]:.2f};desc="{self.queries} queries"',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'upstream;dur={d["upstream"]:.2f};desc="{self.upstream_calls} calls"',
+            f'serialize;dur={d["serialize"]:.2f}',
+            f'render;dur={d["render"]:.2f}',
+            f'total;dur={total_ms:.2f}',
+        ])
+
+
+def current_metrics():
+    return _current.get()
+
+
+@contextmanager
+def timed(name):
+    """Add the block's wall time to ``name`` on the current request, if sampled."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(name, (time.perf_counter() - started) * 1000)
+        if name == 'upstream':
+            metrics.upstream_calls += 1
+
+
+def record_cache_lookup(key, hit):
+    prometheus.record_cache_lookup(key, hit)
+    request_metrics = _current.get()
+    if request_metrics is not None:
+        if hit:
+            request_metrics.cache_hits += 1
+        else:
+            request_metrics.cache_misses += 1
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.add('db', (time.perf_counter() - started) * 1000)
+
+
+class InstrumentedLocMemCache(LocMemCache):
+    """LocMemCache that reports hits and misses (per request and to Prometheus)."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        record_cache_lookup(key, value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None):
+        found = super().get_many(keys, version)
+        for key in keys:
+            record_cache_lookup(key, key in found)
+        return found
+
+
+class TimedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('render'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class PerformanceMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.PERF_SAMPLE_RATE
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(_db_wrapper))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        total_ms = metrics.total_ms
+        if settings.PERF_SERVER_TIMING:
+            response['Server-Timing'] = metrics.server_timing(total_ms)
+        match = getattr(request, 'resolver_match', None)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            **metrics.as_dict(total_ms),
+        }))
+        return response
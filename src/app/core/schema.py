@@ -0,0 +1,67 @@
+"""
+Static OpenAPI schema.
+
+drf-spectacular builds the schema by introspecting every view, including the
+long ``extend_schema`` descriptions, which makes ``/api/schema/`` our slowest
+endpoint when it is generated per request. Instead the schema is rendered once
+into a file named after the API version and served from memory afterwards.
+
+Regenerate it after changing any view:
+
+    python src/manage.py generate_schema
+"""
+from pathlib import Path
+
+from django.conf import settings
+from drf_spectacular.settings import spectacular_settings
+from rest_framework.renderers import JSONRenderer
+
+from .cache import build_payload
+
+_schema = None
+
+
+def get_schema_path():
+    return Path(settings.OPENAPI_SCHEMA_DIR) / f'openapi-{spectacular_settings.VERSION}.json'
+
+
+def generate_schema():
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return JSONRenderer().render(schema, renderer_context={})
+
+
+def write_schema(path=None):
+    path = Path(path or get_schema_path())
+    content = generate_schema()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    reset_schema()
+    return path
+
+
+def load_schema():
+    """
+    Return the schema as a pre-compressed payload (see ``app.core.cache``),
+    reading the file once per process. If the file has not been built yet it
+    is generated and written now.
+    """
+    global _schema
+    if _schema is None:
+        path = get_schema_path()
+        try:
+            content = path.read_bytes()
+        except FileNotFoundError:
+            content = generate_schema()
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(content)
+            except OSError:
+                pass
+        _schema = build_payload(content, content_type='application/vnd.oai.openapi+json')
+    return _schema
+
+
+def reset_schema():
+    global _schema
+    _schema = None
@@ -0,0 +1,176 @@
+"""
+Slow query / slow request capture.
+
+``SlowQueryMiddleware`` times every query of a request through
+``connection.execute_wrapper``. Queries slower than ``SLOW_QUERY_MS`` are kept
+with their SQL and parameters. For a ``SLOW_QUERY_EXPLAIN_RATE`` fraction of
+the requests that have any, once the response is ready (so the wrapper is no
+longer installed and the view's transaction is closed) each slow SELECT is
+re-run under ``EXPLAIN`` using the backend's own prefix; the others are stored
+without a plan, so a burst of slow requests does not double the load. A request
+is written to the store when it has slow queries or took longer than
+``SLOW_REQUEST_MS``.
+
+The store is one JSON line per request, appended to ``SLOW_LOG_FILE`` (stderr
+if that is empty). A ``RotatingFileHandler`` rolls it over at
+``SLOW_LOG_MAX_BYTES`` into ``slow.jsonl.1`` ... ``SLOW_LOG_BACKUPS``. Rollover
+is not coordinated between processes, so deployments with several workers set
+``SLOW_LOG_MAX_BYTES`` to 0: the file is then opened through a
+``WatchedFileHandler`` and rotated by logrotate, which it follows.
+``manage.py slow_queries`` groups the file and its rotated copies by query
+fingerprint.
+"""
+import json
+import logging
+import random
+import re
+import time
+from contextlib import ExitStack
+from logging.handlers import RotatingFileHandler, WatchedFileHandler
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+_store = None
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Normalize SQL so queries differing only in literals or IN-list length group together."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _PLACEHOLDER_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        if settings.SLOW_LOG_FILE:
+            path = Path(settings.SLOW_LOG_FILE)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if settings.SLOW_LOG_MAX_BYTES:
+                handler = RotatingFileHandler(
+                    path, maxBytes=settings.SLOW_LOG_MAX_BYTES, backupCount=settings.SLOW_LOG_BACKUPS,
+                    encoding='utf-8',
+                )
+            else:
+                handler = WatchedFileHandler(path, encoding='utf-8')
+        else:
+            handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger = logging.getLogger('app.slowlog')
+        logger.handlers = [handler]
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        _store = logger
+    return _store
+
+
+def reset_store():
+    global _store
+    if _store is not None:
+        for handler in _store.handlers:
+            handler.close()
+        _store.handlers = []
+    _store = None
+
+
+def iter_records(path=None):
+    """Records from the store file, oldest rotated copy first."""
+    path = Path(path or settings.SLOW_LOG_FILE)
+    files = [path.with_name(f'{path.name}.{n}') for n in range(settings.SLOW_LOG_BACKUPS, 0, -1)] + [path]
+    for file in files:
+        if not file.exists():
+            continue
+        with file.open(encoding='utf-8') as fh:
+            for line in fh:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def explain(alias, sql, params):
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            return [' '.join(str(col) for col in row) for row in cursor.fetchall()]
+    except DatabaseError as e:
+        return [f'EXPLAIN failed: {e}']
+
+
+class QueryRecorder:
+    def __init__(self, alias, threshold_ms):
+        self.alias = alias
+        self.threshold_ms = threshold_ms
+        self.count = 0
+        self.total_ms = 0.0
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            self.count += 1
+            self.total_ms += duration
+            if self.threshold_ms and duration >= self.threshold_ms:
+                self.slow.append((sql, params, many, duration))
+
+
+class SlowQueryMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        query_ms, request_ms = settings.SLOW_QUERY_MS, settings.SLOW_REQUEST_MS
+        if not query_ms and not request_ms:
+            return self.get_response(request)
+
+        recorders = [QueryRecorder(conn.alias, query_ms) for conn in connections.all()]
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for recorder in recorders:
+                stack.enter_context(connections[recorder.alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration = (time.perf_counter() - started) * 1000
+
+        with_plan = random.random() < settings.SLOW_QUERY_EXPLAIN_RATE
+        slow_queries = [
+            {
+                'alias': recorder.alias,
+                'duration_ms': round(ms, 2),
+                'sql': sql,
+                'params': None if many else params,
+                'fingerprint': fingerprint(sql),
+                'explain': explain(recorder.alias, sql, params) if with_plan and not many else None,
+            }
+            for recorder in recorders
+            for sql, params, many, ms in recorder.slow
+        ]
+        if slow_queries or (request_ms and duration >= request_ms):
+            match = getattr(request, 'resolver_match', None)
+            get_store().info(json.dumps({
+                'timestamp': timezone.now().isoformat(),
+                'method': request.method,
+                'path': request.get_full_path(),
+                'view': match.view_name if match else None,
+                'status': response.status_code,
+                'duration_ms': round(duration, 2),
+                'queries': sum(recorder.count for recorder in recorders),
+                'db_ms': round(sum(recorder.total_ms for recorder in recorders), 2),
+                'slow_queries': slow_queries,
+            }, default=str))
+        return response
@@ -0,0 +1,250 @@
+"""
+Synthetic large-catalogue generator for scale testing.
+
+Everything is derived from a single ``random.Random(seed)``, so the same seed
+and sizes always produce the same catalogue. Attractions and users are written
+with ``bulk_create`` in batches; the far more numerous child rows (images,
+tips, weather, change log) go through a plain ``executemany``. Synthetic
+attractions get zero-padded slugs (``syn-0000042-...``) so each batch's
+primary keys can be read back with one range query on backends that do not
+return them from bulk inserts (MySQL).
+"""
+import json
+import math
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+from app.attractions.management.commands.seed_attractions import REGIONS_31
+from app.attractions.models import Attraction, AttractionImage, AttractionTip
+from app.core.cache import bump_namespace
+from app.regions.models import Region
+from app.sync.models import ChangeLog
+from app.weather.models import SeasonalWeatherPattern, WeatherCache
+
+User = get_user_model()
+
+SYNTHETIC_PREFIX = 'syn-'
+SYNTHETIC_PASSWORD = 'Pass1234!'
+
+# Mainland Tanzania plus Zanzibar and Pemba
+TANZANIA_BOUNDS = {
+    'min_lat': -11.75, 'max_lat': -0.99,
+    'min_lon': 29.33, 'max_lon': 40.45,
+}
+
+NAME_PREFIXES = [
+    'Great', 'Hidden', 'Upper', 'Lower', 'Old', 'Red', 'Black', 'Golden', 'Silver', 'Misty',
+    'Northern', 'Southern', 'Eastern', 'Western', 'Little', 'Sacred', 'Twin', 'Lost', 'Blue', 'Green',
+]
+NAME_PLACES = [
+    'Baobab', 'Acacia', 'Kopje', 'Simba', 'Tembo', 'Twiga', 'Chui', 'Nyati', 'Kiboko', 'Mamba',
+    'Maasai', 'Swahili', 'Msitu', 'Mlima', 'Ziwa', 'Mto', 'Pwani', 'Jua', 'Mwezi', 'Nyota',
+]
+CATEGORY_FEATURES = {
+    'mountain': ['Peak', 'Ridge', 'Summit', 'Highlands'],
+    'beach': ['Beach', 'Bay', 'Shore', 'Sands'],
+    'wildlife': ['Game Reserve', 'Plains', 'Wildlife Corridor', 'Conservancy'],
+    'cultural': ['Cultural Village', 'Boma', 'Heritage Centre', 'Market'],
+    'historical': ['Ruins', 'Fort', 'Old Town', 'Rock Art Site'],
+    'adventure': ['Gorge', 'Canyon Trail', 'Rapids', 'Cave'],
+    'national_park': ['National Park', 'Reserve', 'Sanctuary', 'Crater'],
+    'island': ['Island', 'Atoll', 'Islet', 'Sandbank'],
+    'waterfall': ['Falls', 'Cascades', 'Waterfall', 'Springs'],
+    'lake': ['Lake', 'Lagoon', 'Crater Lake', 'Wetlands'],
+    'other': ['Viewpoint', 'Gardens', 'Hot Springs', 'Forest'],
+}
+DURATIONS = ['2 hours', '3-4 hours', 'Half day', '1 day', '1-2 days', '2-3 days', '3-5 days', '5-7 days']
+BEST_TIMES = ['June-October', 'January-February, June-October', 'Year-round', 'July-March', 'December-March']
+AIRPORTS = [
+    ('Julius Nyerere International (DAR)', Decimal('-6.878'), Decimal('39.202')),
+    ('Kilimanjaro International (JRO)', Decimal('-3.429'), Decimal('37.074')),
+    ('Abeid Amani Karume International (ZNZ)', Decimal('-6.222'), Decimal('39.225')),
+    ('Mwanza Airport (MWZ)', Decimal('-2.444'), Decimal('32.932')),
+    ('Arusha Airport (ARK)', Decimal('-3.368'), Decimal('36.633')),
+    ('Songwe Airport (MBI)', Decimal('-8.919'), Decimal('33.274')),
+]
+TIP_TITLES = ['Go early', 'Bring water', 'Hire a local guide', 'Pack layers', 'Carry cash', 'Book ahead']
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+
+def _insert_rows(model, field_names, rows):
+    """
+    Plain ``executemany`` insert. Building model instances and compiling them
+    through the ORM costs several times more than the database write itself,
+    which matters at millions of child rows; callers pass DB-ready values.
+    """
+    if not rows:
+        return
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(name).column) for name in field_names)
+    placeholders = ', '.join(['%s'] * len(field_names))
+    with connection.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({placeholders})', rows)
+
+
+def _clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+class CatalogueGenerator:
+    def __init__(self, seed=42, batch_size=5000, record_changelog=True, log=None):
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.record_changelog = record_changelog
+        self.log = log or (lambda message: None)
+
+    def ensure_regions(self):
+        Region.objects.bulk_create(
+            [Region(slug=slug, name=name, description=desc, latitude=lat, longitude=lon)
+             for slug, name, desc, lat, lon in REGIONS_31],
+            ignore_conflicts=True,
+        )
+        return list(Region.objects.order_by('slug').values_list('id', 'latitude', 'longitude'))
+
+    def generate_users(self, count):
+        password = make_password(SYNTHETIC_PASSWORD)
+        start = User.objects.filter(username__startswith=f'{SYNTHETIC_PREFIX}user-').count()
+        for offset in range(0, count, self.batch_size):
+            User.objects.bulk_create([
+                User(
+                    username=f'{SYNTHETIC_PREFIX}user-{i:07d}',
+                    email=f'{SYNTHETIC_PREFIX}user-{i:07d}@example.com',
+                    password=password,
+                    is_tour_operator=self.random.random() < 0.1,
+                )
+                for i in range(start + offset, start + min(offset + self.batch_size, count))
+            ])
+        self.log(f'  ✓ {count} users (password: {SYNTHETIC_PASSWORD})')
+
+    def generate_attractions(self, count, images_per=2, tips_per=2, weather_ratio=1.0, seasonal=True):
+        regions = self.ensure_regions()
+        creator = User.objects.filter(is_superuser=True).first()
+        start = Attraction.objects.filter(slug__startswith=SYNTHETIC_PREFIX).count()
+        created = 0
+        for offset in range(0, count, self.batch_size):
+            first = start + offset
+            last = start + min(offset + self.batch_size, count)
+            with transaction.atomic():
+                attractions = [self._attraction(i, regions, creator) for i in range(first, last)]
+                Attraction.objects.bulk_create(attractions)
+                rows = list(
+                    Attraction.objects.filter(
+                        slug__gte=f'{SYNTHETIC_PREFIX}{first:07d}',
+                        slug__lt=f'{SYNTHETIC_PREFIX}{last:07d}',
+                    ).order_by('slug').values_list('id', 'slug', 'latitude', 'altitude')
+                )
+                self._children(rows, creator, images_per, tips_per, weather_ratio, seasonal)
+            created += len(rows)
+            self.log(f'  ✓ {created}/{count} attractions')
+        bump_namespace('catalogue')
+
+    def _attraction(self, i, regions, creator):
+        rnd = self.random
+        region_id, region_lat, region_lon = rnd.choice(regions)
+        category = rnd.choice(list(CATEGORY_FEATURES))
+        name = f'{rnd.choice(NAME_PREFIXES)} {rnd.choice(NAME_PLACES)} {rnd.choice(CATEGORY_FEATURES[category])}'
+        lat = _clamp(float(region_lat) + rnd.gauss(0, 0.6), TANZANIA_BOUNDS['min_lat'], TANZANIA_BOUNDS['max_lat'])
+        lon = _clamp(float(region_lon) + rnd.gauss(0, 0.6), TANZANIA_BOUNDS['min_lon'], TANZANIA_BOUNDS['max_lon'])
+        airport, airport_lat, airport_lon = min(
+            AIRPORTS, key=lambda a: _haversine_km(lat, lon, float(a[1]), float(a[2]))
+        )
+        altitude = rnd.randint(0, 5895) if category == 'mountain' else rnd.randint(0, 2200)
+        fee = rnd.choice([None, 0, 10, 25, 50, 70, 100, 150])
+        return Attraction(
+            name=name,
+            slug=f'{SYNTHETIC_PREFIX}{i:07d}-{slugify(name)}',
+            region_id=region_id,
+            category=category,
+            description=f'{name} is a synthetic {category.replace("_", " ")} generated for scale testing. ' * 4,
+            short_description=f'Synthetic {category.replace("_", " ")} near {airport.split(" (")[0]}.',
+            latitude=Decimal(f'{lat:.6f}'),
+            longitude=Decimal(f'{lon:.6f}'),
+            altitude=altitude,
+            difficulty_level=rnd.choice(Attraction.DIFFICULTY_CHOICES)[0],
+            access_info=f'By road from {airport.split(" (")[0]}.',
+            nearest_airport=airport,
+            distance_from_airport=Decimal(f'{_haversine_km(lat, lon, float(airport_lat), float(airport_lon)):.2f}'),
+            best_time_to_visit=rnd.choice(BEST_TIMES),
+            seasonal_availability='Year-round',
+            estimated_duration=rnd.choice(DURATIONS),
+            entrance_fee=None if fee is None else Decimal(fee),
+            requires_guide=rnd.random() < 0.4,
+            requires_permit=rnd.random() < 0.2,
+            featured_image='',
+            created_by=creator,
+            is_featured=rnd.random() < 0.01,
+        )
+
+    def _children(self, rows, creator, images_per, tips_per, weather_ratio, seasonal):
+        rnd = self.random
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        creator_id = creator.pk if creator else None
+        images, tips, weather, patterns = [], [], [], []
+        for attraction_id, slug, lat, altitude in rows:
+            base_temp = 30 - (altitude or 0) * 0.0065
+            for n in range(images_per):
+                images.append((attraction_id, f'synthetic/{slug}-{n}', f'View {n + 1}', n, now))
+            for title in rnd.sample(TIP_TITLES, min(tips_per, len(TIP_TITLES))):
+                tips.append((attraction_id, title, f'{title} when visiting.', creator_id, now))
+            if rnd.random() < weather_ratio:
+                weather.append((
+                    attraction_id,
+                    Decimal(f'{base_temp + rnd.uniform(-3, 3):.2f}'),
+                    Decimal(f'{base_temp + rnd.uniform(-4, 2):.2f}'),
+                    Decimal(f'{rnd.uniform(0, 12):.2f}'),
+                    Decimal(f'{rnd.uniform(0, 10):.2f}'),
+                    rnd.choice([0, 1, 2, 3, 61, 80, 95]),
+                    rnd.randint(0, 100),
+                    Decimal(f'{rnd.uniform(0, 30):.2f}'),
+                    rnd.randint(30, 95),
+                    json.dumps({str(m): round(base_temp + 2 * math.cos((m - 2) * math.pi / 6), 1) for m in range(1, 13)}),
+                    json.dumps({str(m): round(max(0.0, 120 * math.sin((m - 2) * math.pi / 6)), 1) for m in range(1, 13)}),
+                    now,
+                ))
+            if seasonal:
+                for season, start, end, rain in (('long_rain', 3, 5, 250), ('dry', 6, 10, 15), ('short_rain', 11, 12, 120)):
+                    patterns.append((
+                        attraction_id, season, start, end,
+                        Decimal(f'{base_temp + rnd.uniform(-2, 2):.2f}'),
+                        Decimal(f'{rain * rnd.uniform(0.5, 1.5):.2f}'),
+                        f'Typical {season.replace("_", " ")} conditions.',
+                    ))
+
+        _insert_rows(AttractionImage, ['attraction', 'image', 'caption', 'order', 'uploaded_at'], images)
+        _insert_rows(AttractionTip, ['attraction', 'title', 'description', 'created_by', 'created_at'], tips)
+        _insert_rows(WeatherCache, [
+            'attraction', 'temperature', 'apparent_temperature', 'precipitation', 'rain', 'weather_code',
+            'cloud_cover', 'wind_speed', 'humidity', 'monthly_temperature', 'monthly_precipitation', 'last_updated',
+        ], weather)
+        _insert_rows(SeasonalWeatherPattern, [
+            'attraction', 'season_type', 'start_month', 'end_month', 'avg_temperature', 'avg_rainfall', 'description',
+        ], patterns)
+
+        if self.record_changelog:
+            attraction_ids = [row[0] for row in rows]
+            image_ids = AttractionImage.objects.filter(attraction_id__in=attraction_ids).values_list('id', flat=True)
+            tip_ids = AttractionTip.objects.filter(attraction_id__in=attraction_ids).values_list('id', flat=True)
+            _insert_rows(ChangeLog, ['kind', 'object_id', 'action', 'changed_at'], [
+                (kind, object_id, 'upsert', now)
+                for kind, ids in (('attraction', attraction_ids), ('image', image_ids), ('tip', tip_ids))
+                for object_id in ids
+            ])
+
+    def clear(self):
+        """Delete previously generated rows (through the ORM, so sync tombstones are written)."""
+        while True:
+            ids = list(Attraction.objects.filter(slug__startswith=SYNTHETIC_PREFIX).values_list('id', flat=True)[:1000])
+            if not ids:
+                break
+            Attraction.objects.filter(id__in=ids).delete()
+        User.objects.filter(username__startswith=f'{SYNTHETIC_PREFIX}user-').delete()
@@ -0,0 +1,95 @@
+"""
+Test helpers for query budgets, and the project test runner.
+
+``assertQueryBudget`` is the budget counterpart of ``assertNumQueries``: the
+block may issue *at most* ``max_queries`` queries (and, optionally, spend at
+most ``max_time_ms`` in the database). On failure the message lists every
+captured statement, so an N+1 shows up as the repeated SQL rather than a bare
+count. Budgets are meant to be checked against ``ScaledCatalogueMixin`` data,
+where a per-row query would blow far past any constant budget.
+
+``IsolatedTestRunner`` (``TEST_RUNNER``) points file-backed state at a
+scratch directory for the whole run, so tests never write into the real
+distance matrix, recommendation model or slow-query log, and applies
+recommendation refreshes and map cluster rebuilds synchronously on commit.
+"""
+import tempfile
+from pathlib import Path
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings
+from app.core.synthetic import CatalogueGenerator
+
+SCALED_ATTRACTIONS = 30
+
+
+class QueryBudget(CaptureQueriesContext):
+    def __init__(self, test_case, max_queries, max_time_ms=None, using=DEFAULT_DB_ALIAS):
+        super().__init__(connections[using])
+        self.test_case = test_case
+        self.max_queries = max_queries
+        self.max_time_ms = max_time_ms
+
+    @property
+    def total_time_ms(self):
+        return sum(float(query['time']) for query in self.captured_queries) * 1000
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        problems = []
+        if len(self) > self.max_queries:
+            problems.append(f'{len(self)} queries executed, budget is {self.max_queries}')
+        if self.max_time_ms is not None and self.total_time_ms > self.max_time_ms:
+            problems.append(f'{self.total_time_ms:.1f}ms spent in the database, budget is {self.max_time_ms}ms')
+        if problems:
+            statements = '\n'.join(
+                f"{i}. ({query['time']}s) {query['sql']}" for i, query in enumerate(self.captured_queries, start=1)
+            )
+            self.test_case.fail('; '.join(problems) + f'\nCaptured queries were:\n{statements}')
+
+
+class QueryBudgetMixin:
+    def assertQueryBudget(self, max_queries, max_time_ms=None, using=DEFAULT_DB_ALIAS):
+        return QueryBudget(self, max_queries, max_time_ms=max_time_ms, using=using)
+
+
+class ScaledCatalogueMixin(QueryBudgetMixin):
+    """Seeds a synthetic catalogue once per class and clears the cache before each test."""
+
+    scaled_attractions = SCALED_ATTRACTIONS
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        generator = CatalogueGenerator(seed=7)
+        generator.generate_users(1)
+        generator.generate_attractions(cls.scaled_attractions)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+class IsolatedTestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._scratch = tempfile.TemporaryDirectory(prefix='tanzania-tests-')
+        scratch = Path(self._scratch.name)
+        self._settings = override_settings(
+            DISTANCE_MATRIX_DIR=str(scratch / 'distances'),
+            RECOMMENDATION_DIR=str(scratch / 'recommendations'),
+            RECOMMENDATION_REFRESH_ASYNC=False,
+            CATALOGUE_INDEX_REBUILD_ASYNC=False,
+            SYNC_SETTLE_SECONDS=0,
+            SLOW_LOG_FILE=str(scratch / 'slow.jsonl'),
+        )
+        self._settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._settings.disable()
+        self._scratch.cleanup()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,458 @@
+import gzip
+import json
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+from io import StringIO
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework import status
+from app.attractions.models import Attraction, AttractionTip
+from app.sync.models import ChangeLog
+from app.weather.models import WeatherCache
+from .benchmark import compare, latency_stats, percentile
+from prometheus_client import REGISTRY
+import requests
+from .cache import build_payload, payload_response
+from .compression import CompressionMiddleware, brotli, choose_encoding
+from .schema import get_schema_path, reset_schema
+from .synthetic import SYNTHETIC_PREFIX, TANZANIA_BOUNDS, CatalogueGenerator
+from .db.routers import PIN_COOKIE, ReadReplicaRouter, ReplicaPinningMiddleware
+from .db.backends.sqlite3.base import DatabaseWrapper as TunedSQLiteWrapper
+from .slowlog import fingerprint, iter_records, reset_store
+from .testing import QueryBudgetMixin
+from .throttling import SlidingWindowThrottle
+
+
+class SchemaAPITest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.schema_dir = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(OPENAPI_SCHEMA_DIR=self.schema_dir.name)
+        self.settings_override.enable()
+        reset_schema()
+
+    def tearDown(self):
+        reset_schema()
+        self.settings_override.disable()
+        self.schema_dir.cleanup()
+
+    def test_schema_served_with_cache_headers(self):
+        response = self.client.get('/api/schema/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('max-age=', response['Cache-Control'])
+        self.assertIn('ETag', response)
+        self.assertIn('openapi', json.loads(response.content))
+
+    def test_schema_not_modified(self):
+        etag = self.client.get('/api/schema/')['ETag']
+        response = self.client.get('/api/schema/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_schema_written_on_first_load(self):
+        self.client.get('/api/schema/')
+        self.assertTrue(get_schema_path().exists())
+
+    def test_generate_schema_command(self):
+        path = Path(self.schema_dir.name) / 'custom.json'
+        call_command('generate_schema', file=str(path), stdout=open('/dev/null', 'w'))
+        self.assertIn('paths', json.loads(path.read_bytes()))
+
+
+class CompressionTest(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.body = json.dumps([{'description': 'Great wildlife reserve. ' * 20}]).encode()
+
+    def test_choose_encoding_honours_quality(self):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='br;q=0.5, gzip')
+        self.assertEqual(choose_encoding(request), 'gzip')
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertIsNone(choose_encoding(request))
+
+    def test_middleware_gzip(self):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        middleware = CompressionMiddleware(lambda r: HttpResponse(self.body, content_type='application/json'))
+        response = middleware(request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    def test_middleware_brotli(self):
+        if brotli is None:
+            self.skipTest('brotli is not installed')
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip, br')
+        middleware = CompressionMiddleware(lambda r: HttpResponse(self.body, content_type='application/json'))
+        response = middleware(request)
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.body)
+
+    def test_payload_served_precompressed(self):
+        payload = build_payload(self.body)
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = payload_response(request, payload)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIs(response.content, payload['gzip'])
+        response = payload_response(self.factory.get('/'), payload)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, self.body)
+
+    def test_payload_not_modified(self):
+        payload = build_payload(self.body)
+        request = self.factory.get('/', HTTP_IF_NONE_MATCH=payload['etag'])
+        self.assertEqual(payload_response(request, payload).status_code, 304)
+
+
+class SyntheticCatalogueTest(TestCase):
+    def generate(self, seed):
+        generator = CatalogueGenerator(seed=seed, batch_size=20)
+        generator.generate_attractions(50, images_per=1, tips_per=2)
+        return list(Attraction.objects.filter(slug__startswith=SYNTHETIC_PREFIX).order_by('slug').values_list('slug', 'latitude', 'longitude'))
+
+    def test_generates_related_rows_inside_tanzania(self):
+        rows = self.generate(seed=1)
+        self.assertEqual(len(rows), 50)
+        for _, lat, lon in rows:
+            self.assertTrue(TANZANIA_BOUNDS['min_lat'] <= lat <= TANZANIA_BOUNDS['max_lat'])
+            self.assertTrue(TANZANIA_BOUNDS['min_lon'] <= lon <= TANZANIA_BOUNDS['max_lon'])
+        self.assertEqual(AttractionTip.objects.count(), 100)
+        self.assertEqual(WeatherCache.objects.count(), 50)
+        self.assertEqual(ChangeLog.objects.filter(kind='attraction').count(), 50)
+
+    def test_deterministic_by_seed(self):
+        first = self.generate(seed=7)
+        CatalogueGenerator().clear()
+        self.assertEqual(self.generate(seed=7), first)
+
+
+class BenchmarkCompareTest(SimpleTestCase):
+    def _run(self, p95=10.0, rps=100.0, queries=3, errors=0):
+        return {'routes': {'attraction-list': {
+            'queries': queries,
+            'levels': {'8': {'p95_ms': p95, 'throughput_rps': rps, 'errors': errors}},
+        }}}
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7.0], 95), 7.0)
+        self.assertIsNone(percentile([], 50))
+
+    def test_latency_stats_exclude_failures(self):
+        stats = latency_stats([10.0, 20.0], errors=2, elapsed=1.0)
+        self.assertEqual((stats['requests'], stats['errors'], stats['p50_ms']), (4, 2, 10.0))
+        self.assertEqual(stats['throughput_rps'], 2.0)
+        self.assertIsNone(latency_stats([], errors=3, elapsed=1.0)['p95_ms'])
+
+    def test_within_threshold_is_not_a_regression(self):
+        self.assertEqual(compare(self._run(), self._run(p95=11.0, rps=90.0), threshold=0.15), [])
+
+    def test_flags_latency_throughput_queries_and_errors(self):
+        regressions = compare(self._run(), self._run(p95=20.0, rps=50.0, queries=4, errors=2))
+        self.assertEqual(len(regressions), 4)
+        self.assertIn('queries 3 -> 4', regressions[0])
+
+    def test_flags_new_connections_per_request(self):
+        old, new = self._run(), self._run()
+        old['routes']['attraction-list']['levels']['8']['connections_per_request'] = 0.0
+        new['routes']['attraction-list']['levels']['8']['connections_per_request'] = 1.0
+        self.assertEqual(compare(old, new), ['attraction-list @ c=8: connections/request 0.0 -> 1.0'])
+
+    def test_levels_without_successful_requests(self):
+        failed = self._run(p95=None, rps=0.0, errors=5)
+        self.assertIn('attraction-list @ c=8: p95 10.0ms -> no successful requests', compare(self._run(), failed))
+        self.assertEqual(compare(failed, self._run(errors=5)), [])
+
+    def test_ignores_routes_missing_from_current_run(self):
+        self.assertEqual(compare(self._run(), {'routes': {}}), [])
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    def test_within_budget(self):
+        with self.assertQueryBudget(1):
+            list(Attraction.objects.all())
+
+    def test_schema_is_query_free(self):
+        with self.assertQueryBudget(0):
+            response = self.client.get('/api/schema/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.content)
+
+    def test_over_budget_lists_sql(self):
+        with self.assertRaises(AssertionError) as ctx:
+            with self.assertQueryBudget(1):
+                list(Attraction.objects.all())
+                list(WeatherCache.objects.all())
+        self.assertIn('2 queries executed, budget is 1', str(ctx.exception))
+        self.assertIn('weather_weathercache', str(ctx.exception))
+
+
+class PerformanceMiddlewareTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    @override_settings(PERF_SAMPLE_RATE=0.0)
+    def test_not_sampled(self):
+        response = self.client.get('/api/v1/regions/')
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(PERF_SAMPLE_RATE=1.0)
+    def test_server_timing_and_log_line(self):
+        with self.assertLogs('app.perf', level='INFO') as logs:
+            response = self.client.get('/api/v1/regions/')
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('total;dur=', response['Server-Timing'])
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'region-list-create')
+        self.assertGreaterEqual(record['queries'], 1)
+        self.assertGreaterEqual(record['cache_misses'], 1)
+
+        with self.assertLogs('app.perf', level='INFO') as logs:
+            self.client.get('/api/v1/regions/')
+        self.assertGreaterEqual(json.loads(logs.records[0].getMessage())['cache_hits'], 1)
+
+    @override_settings(PERF_SAMPLE_RATE=1.0)
+    def test_serializer_time_of_uncached_views(self):
+        for url in ('/api/v1/attractions/', '/api/v1/weather/'):
+            with self.subTest(url=url), self.assertLogs('app.perf', level='INFO') as logs:
+                self.client.get(url)
+            self.assertGreater(json.loads(logs.records[0].getMessage())['serialize_ms'], 0)
+
+    @override_settings(PERF_SAMPLE_RATE=1.0)
+    def test_upstream_call_timed(self):
+        upstream = Mock(status_code=200)
+        upstream.json.return_value = {'current': {'temperature_2m': 21.0, 'weather_code': 0}}
+        with patch('app.weather.services.requests.get', return_value=upstream), \
+                self.assertLogs('app.perf', level='INFO') as logs:
+            response = self.client.get('/api/v1/weather/current/?lat=-3.07&lon=37.36')
+        self.assertIn('upstream;dur=', response['Server-Timing'])
+        self.assertEqual(json.loads(logs.records[0].getMessage())['upstream_calls'], 1)
+
+
+class MetricsEndpointTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_request_and_cache_metrics(self):
+        before = self.sample('api_request_duration_seconds_count',
+                             route='region-list-create', method='GET', status='2xx')
+        misses = self.sample('api_cache_requests_total', namespace='catalogue', result='miss')
+        self.client.get('/api/v1/regions/')
+        self.assertEqual(self.sample('api_request_duration_seconds_count',
+                                     route='region-list-create', method='GET', status='2xx'), before + 1)
+        self.assertGreater(self.sample('api_cache_requests_total', namespace='catalogue', result='miss'), misses)
+
+        with override_settings(INTERNAL_IPS=['127.0.0.1']):
+            response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b'api_request_duration_seconds_bucket{le="0.005",method="GET",route="region-list-create"',
+                      response.content)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_token_required(self):
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_TOKEN='', INTERNAL_IPS=[])
+    def test_closed_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_404_NOT_FOUND)
+        with override_settings(INTERNAL_IPS=['10.0.0.5']):
+            self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.5').status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_upstream_errors_counted(self):
+        from app.weather.services import WeatherService
+        before = self.sample('api_upstream_requests_total', service='open-meteo', outcome='error')
+        with patch('app.weather.services.requests.get', side_effect=requests.ConnectionError('down')):
+            self.assertIn('error', WeatherService.fetch_current_weather(-1.5, 35.5))
+        self.assertEqual(self.sample('api_upstream_requests_total', service='open-meteo', outcome='error'), before + 1)
+
+
+class SlowQueryLogTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(reset_store)
+        self.log_file = str(Path(self.tmp.name) / 'slow.jsonl')
+        reset_store()
+        cache.clear()
+
+    def test_fingerprint_normalizes_literals_and_in_lists(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x'  LIMIT 21"),
+            fingerprint("SELECT * FROM t WHERE id IN (%s) AND name = 'yy' LIMIT 5"),
+        )
+
+    def test_slow_queries_captured_with_explain(self):
+        with override_settings(SLOW_QUERY_MS=0.000001, SLOW_REQUEST_MS=0, SLOW_LOG_FILE=self.log_file,
+                               SLOW_QUERY_EXPLAIN_RATE=1):
+            self.client.get('/api/v1/attractions/?search=lake')
+            records = list(iter_records())
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['view'], 'attraction-list-create')
+        query = records[0]['slow_queries'][0]
+        self.assertIn('%lake%', query['params'])
+        self.assertTrue(query['explain'])
+
+        out = StringIO()
+        call_command('slow_queries', file=self.log_file, explain=True, stdout=out)
+        self.assertIn('attraction-list-create', out.getvalue())
+
+    def test_plans_only_for_sampled_requests(self):
+        with override_settings(SLOW_QUERY_MS=0.000001, SLOW_REQUEST_MS=0, SLOW_LOG_FILE=self.log_file,
+                               SLOW_QUERY_EXPLAIN_RATE=0):
+            with patch('app.core.slowlog.explain') as explain:
+                self.client.get('/api/v1/regions/')
+            records = list(iter_records())
+        explain.assert_not_called()
+        self.assertIsNone(records[0]['slow_queries'][0]['explain'])
+
+    def test_empty_log_file_goes_to_stderr(self):
+        with override_settings(SLOW_QUERY_MS=0.000001, SLOW_REQUEST_MS=0, SLOW_LOG_FILE=''), \
+                patch('sys.stderr', new_callable=StringIO) as stderr:
+            self.client.get('/api/v1/regions/')
+        self.assertEqual(json.loads(stderr.getvalue().splitlines()[0])['view'], 'region-list-create')
+        with override_settings(SLOW_LOG_FILE=''), self.assertRaises(CommandError):
+            call_command('slow_queries', stdout=StringIO())
+
+    def test_store_rolls_over_and_backups_are_read(self):
+        with override_settings(SLOW_QUERY_MS=0.000001, SLOW_REQUEST_MS=0, SLOW_LOG_FILE=self.log_file,
+                               SLOW_LOG_MAX_BYTES=1, SLOW_LOG_BACKUPS=2):
+            for _ in range(3):
+                cache.clear()
+                self.client.get('/api/v1/regions/')
+            self.assertTrue(Path(f'{self.log_file}.2').exists())
+            self.assertEqual(len(list(iter_records())), 3)
+            out = StringIO()
+            call_command('slow_queries', requests=True, stdout=out)
+        self.assertIn('3x', out.getvalue())
+
+    def test_fast_requests_not_recorded(self):
+        with override_settings(SLOW_QUERY_MS=60000, SLOW_REQUEST_MS=60000, SLOW_LOG_FILE=self.log_file):
+            self.client.get('/api/v1/regions/')
+            self.assertEqual(list(iter_records()), [])
+
+
+@unittest.skipUnless(connection.settings_dict['ENGINE'] == 'app.core.db.backends.sqlite3', 'tuned SQLite backend only')
+class SQLiteBackendTest(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_connect(self):
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('busy_timeout'), connection.pragmas()['busy_timeout'])
+        self.assertEqual(self.pragma('temp_store'), 2)  # MEMORY
+
+    def test_rejects_unsafe_pragma_values(self):
+        wrapper = TunedSQLiteWrapper({**connection.settings_dict, 'PRAGMAS': {'cache_size': '1; DROP TABLE x'}})
+        with self.assertRaises(ImproperlyConfigured):
+            wrapper.pragmas()
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReadReplicaRoutingTest(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = ReadReplicaRouter()
+        cache.clear()
+
+    def route(self, request):
+        seen = {}
+
+        def view(request):
+            seen['db'] = self.router.db_for_read(Attraction)
+            return HttpResponse()
+
+        response = ReplicaPinningMiddleware(view)(request)
+        return seen['db'], response
+
+    def test_safe_requests_read_from_replica(self):
+        db, _ = self.route(self.factory.get('/api/v1/attractions/'))
+        self.assertEqual(db, 'replica1')
+        self.assertEqual(self.router.db_for_read(Attraction), 'default')  # outside a request
+
+    def test_write_pins_client_to_primary(self):
+        auth = {'HTTP_AUTHORIZATION': 'Bearer token-a'}
+        db, response = self.route(self.factory.post('/api/v1/attractions/', **auth))
+        self.assertEqual(db, 'default')
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        self.assertEqual(self.route(self.factory.get('/api/v1/attractions/', **auth))[0], 'default')
+        other = {'HTTP_AUTHORIZATION': 'Bearer token-b'}
+        self.assertEqual(self.route(self.factory.get('/api/v1/attractions/', **other))[0], 'replica1')
+
+        request = self.factory.get('/api/v1/attractions/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self.route(request)[0], 'default')
+
+    def test_no_replicas_configured(self):
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.route(self.factory.get('/'))[0], 'default')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica1', 'attractions'))
+        self.assertTrue(self.router.allow_migrate('default', 'attractions'))
+
+
+class ClockedThrottle(SlidingWindowThrottle):
+    scope = 'test'
+    now = 1000.0
+
+    def timer(self):
+        return self.now
+
+
+@override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'test': '3/min'}})
+class SlidingWindowThrottleTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.request = Mock(user=None, META={'REMOTE_ADDR': '10.0.0.1'})
+        ClockedThrottle.now = 1200.0  # start of a window
+
+    def allow(self):
+        self.throttle = ClockedThrottle()
+        return self.throttle.allow_request(self.request, None)
+
+    def test_limits_and_reports_retry_after(self):
+        self.assertEqual([self.allow() for _ in range(4)], [True, True, True, False])
+        self.assertEqual(self.throttle.wait(), 60 + 20)  # until the window's weight drops below 2/3
+        ClockedThrottle.now += 80
+        self.assertTrue(self.allow())
+
+    def test_rejected_requests_are_not_counted(self):
+        [self.allow() for _ in range(10)]
+        ClockedThrottle.now += 60
+        self.assertFalse(self.allow())  # previous window still counts 3, not 10
+        ClockedThrottle.now += 20
+        self.assertTrue(self.allow())
+
+    def test_clients_are_counted_separately(self):
+        [self.allow() for _ in range(3)]
+        self.request.META['REMOTE_ADDR'] = '10.0.0.2'
+        self.assertTrue(self.allow())
+
+    @override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {}})
+    def test_missing_rate_disables_scope(self):
+        self.assertTrue(all(self.allow() for _ in range(10)))
+
+
+class IsolatedTestRunnerTest(SimpleTestCase):
+    def test_file_backed_state_is_outside_the_project(self):
+        project = Path(settings.BASE_DIR).resolve()
+        for directory in (settings.DISTANCE_MATRIX_DIR, settings.RECOMMENDATION_DIR):
+            self.assertNotIn(project, Path(directory).resolve().parents)
@@ -0,0 +1,120 @@
+"""
+Cache-backed request throttles.
+
+Rates come from ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']`` keyed by scope
+(``'10/min'``, ``'100/hour'``...); a missing or ``None`` rate disables the
+scope. They are read per request, so ``override_settings`` applies.
+
+Each client is limited by a sliding-window counter, which behaves like a token
+bucket of ``num_requests`` tokens refilled over ``duration``: the count of the
+current fixed window plus the previous window's count weighted by how much of
+it still overlaps. Unlike a stored bucket (read, refill, write back) it only
+needs ``cache.add``/``cache.incr``, which are atomic within one cache, so
+concurrent threads cannot both spend the last token. A rejected request gives
+its increment back, so clients that honour ``Retry-After`` are not penalised.
+
+Counters live in the default cache. With the configured per-process LocMem
+cache every worker process counts on its own, so a client can make up to
+(number of workers) x the configured rate; switch ``CACHES`` to a shared
+backend (Redis, Memcached, database) for an exact limit.
+
+Anonymous clients are keyed by IP. ``NUM_PROXIES`` (0 by default) says how
+many trusted proxies append to ``X-Forwarded-For``; with 0 the header is
+ignored and ``REMOTE_ADDR`` is used, so rotating a forged header gains nothing.
+"""
+import hashlib
+import math
+import time
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    cache = cache
+    cache_format = 'throttle:%(scope)s:%(ident)s:%(window)s'
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_idents(self, request):
+        """Client identities to count this request against; all must be under the limit."""
+        if request.user and request.user.is_authenticated:
+            return [f'user:{request.user.pk}']
+        return [f'ip:{self.get_ident(request)}']
+
+    def allow_request(self, request, view):
+        # The rate is looked up per request rather than once in __init__.
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        now = self.timer()
+        window = int(now // self.duration)
+        remaining = self.duration * (window + 1) - now
+        self.wait_seconds = 0
+        counted = []
+        for ident in self.get_idents(request):
+            key = self.cache_format % {'scope': self.scope, 'ident': ident, 'window': window}
+            previous = self.cache.get(
+                self.cache_format % {'scope': self.scope, 'ident': ident, 'window': window - 1}, 0,
+            )
+            self.cache.add(key, 0, self.duration * 2)
+            try:
+                current = self.cache.incr(key)
+            except ValueError:
+                # Evicted between add and incr.
+                self.cache.set(key, 1, self.duration * 2)
+                current = 1
+            counted.append(key)
+            if previous * remaining / self.duration + current > self.num_requests:
+                self.wait_seconds = max(self.wait_seconds, self._retry_after(previous, current - 1, remaining))
+
+        if self.wait_seconds:
+            for key in counted:
+                try:
+                    self.cache.decr(key)
+                except ValueError:
+                    pass
+            return False
+        return True
+
+    def _retry_after(self, previous, current, remaining):
+        """Seconds until one more request fits under the limit."""
+        room = self.num_requests - current - 1
+        if room >= 0 and previous:
+            seconds = remaining - room * self.duration / previous
+        else:
+            # Only once the current window has become the (decaying) previous one.
+            seconds = remaining + max(0, current + 1 - self.num_requests) * self.duration / max(current, 1)
+        return max(1, math.ceil(seconds))
+
+    def wait(self):
+        return self.wait_seconds
+
+    def timer(self):
+        return time.time()
+
+
+class LoginRateThrottle(SlidingWindowThrottle):
+    """Per client IP and per attempted username, so neither spraying nor a botnet on one account gets far."""
+    scope = 'login'
+
+    def get_idents(self, request):
+        idents = [f'ip:{self.get_ident(request)}']
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if isinstance(username, str) and username:
+            digest = hashlib.sha256(username.lower().encode()).hexdigest()[:32]
+            idents.append(f'username:{digest}')
+        return idents
+
+
+class RegisterRateThrottle(SlidingWindowThrottle):
+    scope = 'register'
+
+
+class WeatherRateThrottle(SlidingWindowThrottle):
+    """Caps the Open-Meteo calls a single client can cause through the weather proxy."""
+    scope = 'weather'
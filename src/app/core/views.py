@@ -0,0 +1,30 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.cache import cache_control, never_cache
+from django.views.decorators.http import require_safe
+from .cache import payload_response
+from .metrics import render_metrics
+from .schema import load_schema
+
+
+@require_safe
+@cache_control(public=True, max_age=settings.OPENAPI_SCHEMA_MAX_AGE)
+def openapi_schema(request):
+    return payload_response(request, load_schema())
+
+
+@require_safe
+@never_cache
+def metrics(request):
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+            return JsonResponse({'error': 'Invalid metrics token'}, status=401)
+    elif request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS:
+        # No token configured: closed, except to addresses listed explicitly. Loopback is not trusted
+        # by default because a local reverse proxy makes every client look like 127.0.0.1.
+        return JsonResponse({'error': 'Not found'}, status=404)
+    content, content_type = render_metrics()
+    return HttpResponse(content, content_type=content_type)
@@ -0,0 +1,5 @@
+from django.apps import AppConfig
+
+
+class ItinerariesConfig(AppConfig):
+    name = 'app.itineraries'
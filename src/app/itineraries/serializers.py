@@ -0,0 +1,22 @@
+from rest_framework import serializers
+from .services import AIRPORTS, airport_code
+
+MAX_STOPS = 50
+
+
+class PlanRequestSerializer(serializers.Serializer):
+    attractions = serializers.ListField(child=serializers.SlugField(), min_length=1, max_length=MAX_STOPS)
+    start = serializers.CharField(required=False, allow_blank=True)
+    round_trip = serializers.BooleanField(default=True)
+    days = serializers.IntegerField(required=False, min_value=1)
+
+    def validate_attractions(self, value):
+        return list(dict.fromkeys(value))
+
+    def validate_start(self, value):
+        if not value:
+            return None
+        code = value.upper() if value.upper() in AIRPORTS else airport_code(value)
+        if code is None:
+            raise serializers.ValidationError(f"Unknown airport. Use one of: {', '.join(sorted(AIRPORTS))}")
+        return code
@@ -0,0 +1,197 @@
+"""
+Itinerary planning.
+
+Stops are ordered by a nearest-neighbour tour improved with 2-opt over the
+great-circle distances of ``app.attractions.distances`` (the precomputed
+matrix where available). The start point is node 0: an airport, or, when no
+start is given, a virtual node at distance zero from every stop so that the
+route may begin anywhere. The ordered route is then laid out on a timeline of
+``ACTIVE_HOURS_PER_DAY`` hour days, using each stop's ``estimated_duration``
+and road travel time between stops.
+"""
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+from app.attractions.distances import get_matrix, haversine_km
+
+ACTIVE_HOURS_PER_DAY = 8
+ROAD_SPEED_KMH = 50
+DEFAULT_STOP_DAYS = 1.0
+
+# Airports referenced by attractions' ``nearest_airport``: IATA -> (name, latitude, longitude)
+AIRPORTS = {
+    'ARK': ('Arusha Airport', -3.3677, 36.6333),
+    'BKB': ('Bukoba Airport', -1.3320, 31.8212),
+    'DAR': ('Julius Nyerere International Airport', -6.8781, 39.2026),
+    'JRO': ('Kilimanjaro International Airport', -3.4294, 37.0745),
+    'MBI': ('Songwe Airport', -8.9194, 33.2736),
+    'MFA': ('Mafia Airport', -7.9135, 39.6686),
+    'MWZ': ('Mwanza Airport', -2.4445, 32.9327),
+    'PEM': ('Pemba Airport', -5.2573, 39.8114),
+    'SEU': ('Seronera Airstrip', -2.4606, 34.8225),
+    'TKQ': ('Kigoma Airport', -4.8862, 29.6709),
+    'ZNZ': ('Abeid Amani Karume International Airport', -6.2220, 39.2249),
+}
+
+_IATA = re.compile(r'\b([A-Z]{3})\b')
+_AMOUNT = re.compile(r'(\d+(?:\.\d+)?)(?:\s*[–-]\s*(\d+(?:\.\d+)?))?\s*(hour|hr|day)', re.IGNORECASE)
+
+
+def airport_code(text):
+    """The first known IATA code in ``text`` (``'Arusha Airport (ARK)'`` -> ``'ARK'``), or ``None``."""
+    for code in _IATA.findall(text or ''):
+        if code in AIRPORTS:
+            return code
+    return None
+
+
+def parse_duration_days(text):
+    """
+    Days to spend at a stop from free-text ``estimated_duration``: ``'3–5 days'``
+    -> 4, ``'2–3 hours'`` -> 0.3125, ``'Half to full day'`` -> 0.75. Unparseable
+    text counts as one day.
+    """
+    text = (text or '').lower()
+    match = _AMOUNT.search(text)
+    if match:
+        low = float(match.group(1))
+        high = float(match.group(2) or low)
+        amount = (low + high) / 2
+        return amount if match.group(3) == 'day' else amount / ACTIVE_HOURS_PER_DAY
+    half, full = 'half' in text, 'full' in text
+    if half and full:
+        return 0.75
+    if half:
+        return 0.5
+    return DEFAULT_STOP_DAYS
+
+
+def nearest_neighbour_tour(distances, first=None):
+    """Greedy tour from node 0 (then ``first``, if given) visiting every node once."""
+    n = len(distances)
+    tour, unvisited = [0], set(range(1, n))
+    if first is not None:
+        tour.append(first)
+        unvisited.remove(first)
+    while unvisited:
+        row = distances[tour[-1]]
+        nearest = min(unvisited, key=row.__getitem__)
+        tour.append(nearest)
+        unvisited.remove(nearest)
+    return tour
+
+
+def two_opt(tour, distances, fixed_end=False):
+    """
+    Reverse segments while that shortens the path. Node ``tour[0]`` stays first;
+    with ``fixed_end`` the last node stays last too (e.g. back at the airport).
+    """
+    n = len(tour)
+    last = n - 2 if fixed_end else n - 1
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, last):
+            for j in range(i + 1, last + 1):
+                a, b, c = tour[i - 1], tour[i], tour[j]
+                removed = distances[a][b]
+                added = distances[a][c]
+                if j + 1 < n:
+                    d = tour[j + 1]
+                    removed += distances[c][d]
+                    added += distances[b][d]
+                if added < removed - 1e-9:
+                    tour[i:j + 1] = tour[i:j + 1][::-1]
+                    improved = True
+    return tour
+
+
+class ItineraryPlanner:
+    @classmethod
+    def distance_matrix(cls, attractions, start=None):
+        """(m + 1) x (m + 1) km between the start (node 0) and the attractions (nodes 1..m)."""
+        ids = [attraction.pk for attraction in attractions]
+        coordinates = {a.pk: (float(a.latitude), float(a.longitude)) for a in attractions}
+        matrix = get_matrix()
+        if matrix is not None:
+            stops = matrix.submatrix(ids, coordinates)
+        else:
+            points = np.array([coordinates[pk] for pk in ids])
+            stops = haversine_km(points[:, None, 0], points[:, None, 1], points[None, :, 0], points[None, :, 1])
+
+        distances = np.zeros((len(ids) + 1, len(ids) + 1), dtype=np.float64)
+        distances[1:, 1:] = stops
+        if start is not None:
+            points = np.array([coordinates[pk] for pk in ids])
+            distances[0, 1:] = distances[1:, 0] = haversine_km(start[0], start[1], points[:, 0], points[:, 1])
+        return distances
+
+    @classmethod
+    def plan(cls, attractions, start_code=None, round_trip=True, days=None):
+        start = AIRPORTS[start_code] if start_code else None
+        round_trip = round_trip and start is not None
+        distances = cls.distance_matrix(attractions, start[1:] if start else None)
+
+        # Plain lists: element access in the 2-opt loop is much faster than on arrays.
+        table = distances.tolist()
+        if start:
+            tour = nearest_neighbour_tour(table)
+        else:
+            # Any stop can come first: keep the best greedy tour over all of them.
+            tour = min(
+                (nearest_neighbour_tour(table, first) for first in range(1, len(table))),
+                key=lambda t: sum(table[a][b] for a, b in zip(t, t[1:])),
+            )
+        if round_trip:
+            tour.append(0)
+        tour = two_opt(tour, table, fixed_end=round_trip)
+
+        # Without a start, node 0 is at distance zero, so the first leg is free.
+        stops, hours, previous, total_km = [], 0.0, tour[0], 0.0
+        for node in tour[1:]:
+            km = table[previous][node]
+            total_km += km
+            hours += km / ROAD_SPEED_KMH
+            previous = node
+            if node == 0:
+                break
+            attraction = attractions[node - 1]
+            stay = parse_duration_days(attraction.estimated_duration) * ACTIVE_HOURS_PER_DAY
+            day_start = math.floor(hours / ACTIVE_HOURS_PER_DAY) * ACTIVE_HOURS_PER_DAY
+            if stay < ACTIVE_HOURS_PER_DAY and hours + stay > day_start + ACTIVE_HOURS_PER_DAY:
+                hours = day_start + ACTIVE_HOURS_PER_DAY  # does not fit today: start tomorrow morning
+            stops.append({
+                'slug': attraction.slug,
+                'name': attraction.name,
+                'day': math.floor(hours / ACTIVE_HOURS_PER_DAY) + 1,
+                'distance_from_previous_km': round(km, 1),
+                'estimated_duration': attraction.estimated_duration,
+                'duration_days': round(stay / ACTIVE_HOURS_PER_DAY, 2),
+            })
+            hours += stay
+
+        total_days = max(1, math.ceil(hours / ACTIVE_HOURS_PER_DAY - 1e-9))
+        by_day = {}
+        for stop in stops:
+            by_day.setdefault(stop['day'], []).append(stop['slug'])
+        return {
+            'start': {
+                'code': start_code, 'name': start[0], 'latitude': start[1], 'longitude': start[2],
+            } if start else None,
+            'round_trip': round_trip,
+            'total_distance_km': round(total_km, 1),
+            'total_days': total_days,
+            'days_budget': days,
+            'fits_budget': None if days is None else total_days <= days,
+            'stops': stops,
+            'days': [{'day': day, 'stops': slugs} for day, slugs in sorted(by_day.items())],
+        }
+
+    @classmethod
+    def default_start(cls, attractions):
+        """The airport named most often in the stops' ``nearest_airport``."""
+        codes = Counter(filter(None, (airport_code(a.nearest_airport) for a in attractions)))
+        return codes.most_common(1)[0][0] if codes else None
@@ -0,0 +1,89 @@
+import time
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from app.attractions.distances import haversine_km
+from app.attractions.models import Attraction
+from app.core.testing import ScaledCatalogueMixin
+from .services import airport_code, nearest_neighbour_tour, parse_duration_days, two_opt
+
+User = get_user_model()
+
+
+class PlannerHelpersTest(SimpleTestCase):
+    def test_parse_duration_days(self):
+        self.assertEqual(parse_duration_days('3–5 days'), 4)
+        self.assertEqual(parse_duration_days('2-3 hours'), 2.5 / 8)
+        self.assertEqual(parse_duration_days('Full day (6–8 hours)'), 7 / 8)
+        self.assertEqual(parse_duration_days('Half to full day'), 0.75)
+        self.assertEqual(parse_duration_days('Half day'), 0.5)
+        self.assertEqual(parse_duration_days('Multi-day dive trips'), 1)
+
+    def test_airport_code(self):
+        self.assertEqual(airport_code('Seronera Airstrip (inside park) / Kilimanjaro International (JRO)'), 'JRO')
+        self.assertIsNone(airport_code('Somewhere (XYZ)'))
+
+    def test_two_opt_untangles_crossing(self):
+        # Points on a line, visited out of order by a bad initial tour.
+        positions = [0, 1, 2, 3, 4]
+        distances = [[abs(a - b) for b in positions] for a in positions]
+        self.assertEqual(nearest_neighbour_tour(distances), [0, 1, 2, 3, 4])
+        self.assertEqual(two_opt([0, 3, 1, 2, 4], distances), [0, 1, 2, 3, 4])
+        self.assertEqual(two_opt([0, 3, 2, 1, 4, 0], distances, fixed_end=True)[-1], 0)
+
+
+class ItineraryPlanTest(ScaledCatalogueMixin, TestCase):
+    scaled_attractions = 50
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.operator = User.objects.create_user(
+            username='operator', email='op@example.com', password='SecurePass123', is_tour_operator=True,
+        )
+        self.slugs = list(Attraction.objects.order_by('?').values_list('slug', flat=True))
+
+    def plan(self, **body):
+        self.client.force_authenticate(user=self.operator)
+        return self.client.post('/api/v1/itineraries/plan/', body, format='json')
+
+    def test_requires_tour_operator(self):
+        tourist = User.objects.create_user(username='tourist', email='t@example.com', password='SecurePass123')
+        self.client.force_authenticate(user=tourist)
+        response = self.client.post('/api/v1/itineraries/plan/', {'attractions': self.slugs[:3]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_plans_fifty_stops_quickly(self):
+        started = time.perf_counter()
+        response = self.plan(attractions=self.slugs, start='JRO', days=60)
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(stop['slug'] for stop in response.data['stops']), sorted(self.slugs))
+        self.assertEqual(response.data['start']['code'], 'JRO')
+        self.assertEqual(
+            sum(len(day['stops']) for day in response.data['days']), len(self.slugs),
+        )
+        days = [stop['day'] for stop in response.data['stops']]
+        self.assertEqual(days, sorted(days))
+
+    def test_optimized_order_beats_request_order(self):
+        slugs = self.slugs[:20]
+        optimized = self.plan(attractions=slugs, start='', round_trip=False).data
+        self.assertIsNone(optimized['start'])
+        coordinates = {a.slug: (float(a.latitude), float(a.longitude)) for a in Attraction.objects.filter(slug__in=slugs)}
+        as_requested = sum(
+            haversine_km(*coordinates[a], *coordinates[b]) for a, b in zip(slugs, slugs[1:])
+        )
+        self.assertLess(optimized['total_distance_km'], as_requested)
+        self.assertEqual(optimized['stops'][0]['distance_from_previous_km'], 0)
+
+    def test_default_start_and_budget(self):
+        response = self.plan(attractions=self.slugs[:5], days=1)
+        self.assertIsNotNone(response.data['start'])
+        self.assertFalse(response.data['fits_budget'])
+
+    def test_unknown_attraction(self):
+        response = self.plan(attractions=[self.slugs[0], 'nowhere'])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], 'Unknown attractions: nowhere')
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import plan_itinerary
+
+urlpatterns = [
+    path('plan/', plan_itinerary, name='itinerary-plan'),
+]
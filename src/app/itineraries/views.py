@@ -0,0 +1,81 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiResponse
+from app.accounts.permissions import IsTourOperator
+from app.attractions.models import Attraction
+from .serializers import MAX_STOPS, PlanRequestSerializer
+from .services import ROAD_SPEED_KMH, ItineraryPlanner
+
+_PLAN_EXAMPLE = {
+    'start': {'code': 'JRO', 'name': 'Kilimanjaro International Airport', 'latitude': -3.4294, 'longitude': 37.0745},
+    'round_trip': True,
+    'total_distance_km': 742.3,
+    'total_days': 6,
+    'days_budget': 7,
+    'fits_budget': True,
+    'stops': [
+        {
+            'slug': 'arusha-national-park',
+            'name': 'Arusha National Park',
+            'day': 1,
+            'distance_from_previous_km': 41.2,
+            'estimated_duration': 'Full day',
+            'duration_days': 1.0,
+        },
+    ],
+    'days': [{'day': 1, 'stops': ['arusha-national-park']}],
+}
+
+
+@extend_schema(
+    tags=['Itineraries'],
+    summary='Plan an optimized itinerary',
+    description=(
+        'Orders a set of attractions into a short driving route (nearest neighbour + 2-opt over '
+        'great-circle distances) and lays it out over days using each attraction\'s `estimated_duration` '
+        f'and {ROAD_SPEED_KMH} km/h road travel between stops.\n\n'
+        '**Tour operators only.**\n\n'
+        f'- `attractions`: 1-{MAX_STOPS} attraction slugs, in any order\n'
+        '- `start`: airport IATA code (e.g. `JRO`) or a `nearest_airport` value; defaults to the airport '
+        'most of the stops list as nearest. Send an empty string to start at the first stop.\n'
+        '- `round_trip`: return to the start airport (default `true`)\n'
+        '- `days`: optional day budget; `fits_budget` reports whether the plan fits\n\n'
+        '**curl example:**\n'
+        '```bash\n'
+        'curl -X POST https://cf89615f228bb45cc805447510de80.pythonanywhere.com/api/v1/itineraries/plan/ \\\n'
+        '  -H "Authorization: Bearer <access_token>" \\\n'
+        '  -H "Content-Type: application/json" \\\n'
+        '  -d \'{"attractions":["serengeti-national-park","ngorongoro-crater","arusha-national-park"],"start":"JRO","days":7}\'\n'
+        '```'
+    ),
+    request=PlanRequestSerializer,
+    responses={
+        200: OpenApiResponse(description='The planned itinerary.', examples=[OpenApiExample('Plan', value=_PLAN_EXAMPLE)]),
+        400: OpenApiResponse(
+            description='Invalid request or unknown attraction slugs.',
+            examples=[OpenApiExample('Unknown slugs', value={'error': 'Unknown attractions: mount-meru'})],
+        ),
+        403: OpenApiResponse(description='The user is not a tour operator.'),
+    },
+)
+@api_view(['POST'])
+@permission_classes([IsTourOperator])
+def plan_itinerary(request):
+    serializer = PlanRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
+
+    slugs = data['attractions']
+    found = Attraction.objects.filter(is_active=True, slug__in=slugs).only(
+        'slug', 'name', 'latitude', 'longitude', 'estimated_duration', 'nearest_airport',
+    ).in_bulk(field_name='slug')
+    missing = [slug for slug in slugs if slug not in found]
+    if missing:
+        return Response({'error': f"Unknown attractions: {', '.join(missing)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    attractions = [found[slug] for slug in slugs]
+    start = data['start'] if 'start' in data else ItineraryPlanner.default_start(attractions)
+    plan = ItineraryPlanner.plan(attractions, start_code=start, round_trip=data['round_trip'], days=data.get('days'))
+    return Response(plan)
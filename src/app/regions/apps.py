@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class RegionsConfig(AppConfig):
     name = 'app.regions'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -11,4 +11,6 @@ class RegionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
     def get_attraction_count(self, obj):
-        return obj.attractions.count()
+        # Annotated querysets (see regions.views.BASE_QUERYSET) carry the count already.
+        count = getattr(obj, 'attraction_count', None)
+        return obj.attractions.count() if count is None else count
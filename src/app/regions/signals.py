@@ -0,0 +1,9 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from app.core.cache import bump_namespace
+from .models import Region
+
+
+@receiver([post_save, post_delete], sender=Region)
+def invalidate_catalogue_cache(sender, **kwargs):
+    bump_namespace('catalogue')
@@ -2,6 +2,7 @@ from django.test import TestCase
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from app.core.testing import ScaledCatalogueMixin
 from .models import Region
 
 User = get_user_model()
@@ -50,3 +51,17 @@ class RegionsAPITest(TestCase):
         self.client.force_authenticate(user=self.user)
         response = self.client.delete(f'{self.list_url}kilimanjaro/')
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class RegionsQueryBudgetTest(ScaledCatalogueMixin, TestCase):
+    def test_list_and_detail(self):
+        client = APIClient()
+        with self.assertQueryBudget(1):
+            response = client.get('/api/v1/regions/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sum(region['attraction_count'] for region in response.json()), self.scaled_attractions)
+        slug = response.json()[0]['slug']
+        with self.assertQueryBudget(1):
+            response = client.get(f'/api/v1/regions/{slug}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['slug'], slug)
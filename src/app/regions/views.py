@@ -2,10 +2,15 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from django.conf import settings
+from django.db.models import Count
 from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiResponse
+from app.core.cache import cached_json_response, namespace_key
 from .models import Region
 from .serializers import RegionSerializer
 
+BASE_QUERYSET = Region.objects.annotate(attraction_count=Count('attractions'))
+
 _REGION_EXAMPLE = {
     'id': 1,
     'name': 'Arusha',
@@ -72,9 +77,11 @@ _REGION_EXAMPLE = {
 @permission_classes([IsAuthenticatedOrReadOnly])
 def region_list_create(request):
     if request.method == 'GET':
-        regions = Region.objects.all()
-        serializer = RegionSerializer(regions, many=True)
-        return Response(serializer.data)
+        def build():
+            return RegionSerializer(BASE_QUERYSET.all(), many=True).data
+
+        cache_key = namespace_key('catalogue', 'regions')
+        return cached_json_response(request, cache_key, build, settings.CATALOGUE_CACHE_TIMEOUT)
     serializer = RegionSerializer(data=request.data)
     if serializer.is_valid():
         serializer.save()
@@ -129,7 +136,7 @@ def region_list_create(request):
 @permission_classes([IsAuthenticatedOrReadOnly])
 def region_detail(request, slug):
     try:
-        region = Region.objects.get(slug=slug)
+        region = BASE_QUERYSET.get(slug=slug)
     except Region.DoesNotExist:
         return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
 
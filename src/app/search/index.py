@@ -0,0 +1,270 @@
+"""
+Type-ahead suggestions for attraction and region names.
+
+Names are normalized (lowercase, accents and punctuation stripped) and every
+word-start suffix is inserted into a prefix trie, so ``crat`` finds
+"Ngorongoro Crater". Each node keeps the ``LIMIT`` best suggestions of its
+subtree (regions, then featured attractions, then the rest, alphabetically),
+so an exact prefix lookup is a walk of ``len(q)`` nodes.
+
+When the prefix yields fewer than ``LIMIT`` suggestions, typos are tolerated
+with a bounded edit-distance walk of the trie (Levenshtein plus swapped
+neighbours): one edit for 3-5 characters, two beyond that, with the first
+character taken as typed. Rows of the
+edit-distance table are computed per node and branches are pruned as soon as
+every cell exceeds the bound.
+
+The index lives in process memory, like the map cluster index. Signals apply
+saves and deletes made by this process in place. Writes made by other worker
+processes are only seen through the ``catalogue`` namespace version when the
+cache is shared between them (not the default LocMem cache), so the index is
+also rebuilt once it is ``CATALOGUE_INDEX_MAX_AGE`` seconds old. Only the first
+build runs in a request; later rebuilds run on a background worker
+(``CATALOGUE_INDEX_REBUILD_ASYNC``) while lookups keep using the old trie.
+"""
+import heapq
+import logging
+import re
+import threading
+import time
+import unicodedata
+from bisect import insort
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+from app.attractions.models import Attraction
+from app.core.cache import namespace_version
+from app.regions.models import Region
+
+LIMIT = 10
+MAX_KEY_LENGTH = 32
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+# Ordered so that the best suggestion sorts first.
+Suggestion = namedtuple('Suggestion', 'weight key kind slug name pk')
+
+logger = logging.getLogger('app.search')
+
+_lock = threading.Lock()
+_index = None
+_pending = False
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode().lower()
+    return _NON_WORD.sub(' ', text).strip()
+
+
+def max_edits(query):
+    if len(query) < 3:
+        return 0
+    return 1 if len(query) <= 5 else 2
+
+
+def region_suggestion(region):
+    return Suggestion(0, normalize(region.name), 'region', region.slug, region.name, region.pk)
+
+
+def attraction_suggestion(attraction):
+    return Suggestion(1 if attraction.is_featured else 2, normalize(attraction.name), 'attraction',
+                      attraction.slug, attraction.name, attraction.pk)
+
+
+class _Node:
+    __slots__ = ('children', 'entries', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.entries = set()  # suggestions whose key ends here
+        self.top = []  # best LIMIT suggestions of the subtree, sorted
+
+
+class SuggestionIndex:
+    def __init__(self, suggestions=(), version=None):
+        self.root = _Node()
+        self.version = version
+        self.built_at = time.monotonic()
+        self.visited = 0  # trie nodes expanded by the typo walk of the last search
+        self.suggestions = {}  # (kind, pk) -> Suggestion
+        for suggestion in suggestions:
+            self.add(suggestion)
+
+    def __len__(self):
+        return len(self.suggestions)
+
+    @staticmethod
+    def keys(suggestion):
+        words = suggestion.key.split()
+        return {' '.join(words[i:])[:MAX_KEY_LENGTH] for i in range(len(words))}
+
+    def _path(self, key, create=False):
+        node, path = self.root, [self.root]
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[char] = _Node()
+            node = child
+            path.append(node)
+        return path
+
+    def add(self, suggestion):
+        """Insert or replace the suggestion for ``(kind, pk)``."""
+        self.remove(suggestion.kind, suggestion.pk)
+        self.suggestions[suggestion.kind, suggestion.pk] = suggestion
+        for key in self.keys(suggestion):
+            path = self._path(key, create=True)
+            path[-1].entries.add(suggestion)
+            for node in path:
+                if suggestion in node.top:
+                    continue
+                if len(node.top) < LIMIT or suggestion < node.top[-1]:
+                    insort(node.top, suggestion)
+                    del node.top[LIMIT:]
+
+    def remove(self, kind, pk):
+        suggestion = self.suggestions.pop((kind, pk), None)
+        if suggestion is None:
+            return
+        paths = [(key, self._path(key)) for key in self.keys(suggestion)]
+        for _, path in paths:
+            path[-1].entries.discard(suggestion)
+        for key, path in paths:
+            # Bottom-up: a node's top is the best of its own entries and its children's tops.
+            for depth in range(len(path) - 1, -1, -1):
+                node = path[depth]
+                if suggestion not in node.top:
+                    continue
+                candidates = set(node.entries)
+                for child in node.children.values():
+                    candidates.update(child.top)
+                node.top = heapq.nsmallest(LIMIT, candidates)
+                if depth and not node.top:
+                    path[depth - 1].children.pop(key[depth - 1], None)
+
+    def search(self, query, limit=LIMIT):
+        query = ' '.join(normalize(query).split())[:MAX_KEY_LENGTH]
+        self.visited = 0
+        if not query:
+            return []
+        path = self._path(query)
+        results = list(path[-1].top[:limit]) if path else []
+        edits = max_edits(query)
+        if len(results) < limit and edits:
+            found = set(results)
+            fuzzy = sorted(
+                (distance, suggestion) for suggestion, distance in self._fuzzy(query, edits).items()
+                if suggestion not in found
+            )
+            results.extend(suggestion for _, suggestion in fuzzy[:limit - len(results)])
+        return results
+
+    def _fuzzy(self, query, edits):
+        """Suggestions under every node whose prefix is within ``edits`` of ``query``, with that distance."""
+        matches = {}
+        first = self.root.children.get(query[0])
+        if first is None:
+            return matches
+        # The first character is taken as typed: typos there are rare and it prunes most of the trie.
+        stack = [(first, list(range(len(query))), None, None)]
+        query = query[1:]
+        while stack:
+            node, previous, before, previous_char = stack.pop()
+            self.visited += 1
+            for char, child in node.children.items():
+                row = [previous[0] + 1]
+                for i, query_char in enumerate(query, 1):
+                    cost = min(row[i - 1] + 1, previous[i] + 1, previous[i - 1] + (query_char != char))
+                    if before and i > 1 and query_char == previous_char and query[i - 2] == char:
+                        cost = min(cost, before[i - 2] + 1)  # swapped neighbours count as one edit
+                    row.append(cost)
+                if row[-1] <= edits:
+                    # Deeper nodes only hold a subset of these suggestions.
+                    for suggestion in child.top:
+                        if matches.get(suggestion, edits + 1) > row[-1]:
+                            matches[suggestion] = row[-1]
+                    if row[-1] == 0:
+                        continue
+                if min(row) <= edits:
+                    stack.append((child, row, previous, char))
+        return matches
+
+
+def load_suggestions():
+    regions = Region.objects.only('slug', 'name')
+    attractions = Attraction.objects.filter(is_active=True).only('slug', 'name', 'is_featured')
+    return [region_suggestion(r) for r in regions] + [attraction_suggestion(a) for a in attractions]
+
+
+def _is_current(index, version):
+    return (index is not None and index.version == version
+            and time.monotonic() - index.built_at < settings.CATALOGUE_INDEX_MAX_AGE)
+
+
+def get_index():
+    """The current index; built on first use, afterwards only ever rebuilt off the request path."""
+    global _index
+    index = _index
+    if index is None:
+        with _lock:
+            if _index is None:
+                _index = SuggestionIndex(load_suggestions(), namespace_version('catalogue'))
+            return _index
+    if not _is_current(index, namespace_version('catalogue')):
+        schedule_rebuild()
+    return _index
+
+
+def schedule_rebuild():
+    global _pending
+    if not settings.CATALOGUE_INDEX_REBUILD_ASYNC:
+        rebuild()
+        return
+    with _lock:
+        if _pending:
+            return
+        _pending = True
+    _executor.submit(_run)
+
+
+def _run():
+    global _pending
+    try:
+        rebuild()
+    except Exception:
+        logger.exception('Suggestion index rebuild failed')
+    finally:
+        # Cleared only once done, so lookups during the build do not queue another. A write made
+        # meanwhile leaves the new index a version behind, and the next lookup schedules one more.
+        with _lock:
+            _pending = False
+        connections.close_all()
+
+
+def rebuild():
+    global _index
+    version = namespace_version('catalogue')  # read before loading: later writes stay detectable
+    index = SuggestionIndex(load_suggestions(), version)
+    with _lock:
+        _index = index
+
+
+def update_index(apply):
+    """Run ``apply(index)`` on the built index and mark it current, so this process does not rebuild."""
+    with _lock:
+        if _index is not None:
+            apply(_index)
+            _index.version = namespace_version('catalogue')
+
+
+def reset_index():
+    global _index
+    _index = None
+
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='suggestions')
@@ -0,0 +1,40 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from app.attractions.models import Attraction
+from app.attractions.signals import attractions_imported
+from app.regions.models import Region
+from .index import attraction_suggestion, region_suggestion, update_index
+
+
+@receiver(post_save, sender=Attraction)
+def index_attraction(sender, instance, **kwargs):
+    if instance.is_active:
+        update_index(lambda index: index.add(attraction_suggestion(instance)))
+    else:
+        update_index(lambda index: index.remove('attraction', instance.pk))
+
+
+@receiver(post_save, sender=Region)
+def index_region(sender, instance, **kwargs):
+    update_index(lambda index: index.add(region_suggestion(instance)))
+
+
+@receiver(post_delete, sender=Attraction)
+def unindex_attraction(sender, instance, **kwargs):
+    update_index(lambda index: index.remove('attraction', instance.pk))
+
+
+@receiver(post_delete, sender=Region)
+def unindex_region(sender, instance, **kwargs):
+    # Its attractions are cascade-deleted, each through unindex_attraction.
+    update_index(lambda index: index.remove('region', instance.pk))
+
+
+@receiver(attractions_imported, sender=Attraction)
+def index_imported_attractions(sender, attractions, **kwargs):
+    def add(index):
+        for attraction in attractions:
+            if attraction.is_active:
+                index.add(attraction_suggestion(attraction))
+
+    update_index(add)
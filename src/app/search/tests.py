@@ -0,0 +1,171 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from unittest.mock import patch
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from app.attractions.models import Attraction
+from app.core.cache import bump_namespace
+from app.core.testing import ScaledCatalogueMixin
+from app.regions.models import Region
+from . import index as index_module
+from .index import Suggestion, SuggestionIndex, get_index, normalize, reset_index
+
+User = get_user_model()
+
+
+def suggestion(name, pk, weight=2, kind='attraction'):
+    return Suggestion(weight, normalize(name), kind, name.lower().replace(' ', '-'), name, pk)
+
+
+class SuggestionIndexTest(SimpleTestCase):
+    def setUp(self):
+        self.index = SuggestionIndex([
+            suggestion('Serengeti National Park', 1, weight=1),
+            suggestion('Ngorongoro Crater', 2),
+            suggestion('Lake Natron', 3),
+            suggestion('Arusha National Park', 4),
+            suggestion('Arusha', 5, weight=0, kind='region'),
+            suggestion('Mount Kilimanjaro', 6),
+        ])
+
+    def names(self, query, limit=10):
+        return [s.name for s in self.index.search(query, limit)]
+
+    def test_prefix_of_any_word(self):
+        self.assertEqual(self.names('crat'), ['Ngorongoro Crater'])
+        self.assertEqual(self.names('national'), ['Serengeti National Park', 'Arusha National Park'])
+        self.assertEqual(self.names('ARUSHA n')[0], 'Arusha National Park')
+
+    def test_ranking_regions_then_featured(self):
+        self.assertEqual(self.names('ar'), ['Arusha', 'Arusha National Park'])
+        self.assertEqual(self.names('n', limit=2), ['Serengeti National Park', 'Arusha National Park'])
+
+    def test_typos(self):
+        self.assertEqual(self.names('serengetti'), ['Serengeti National Park'])
+        self.assertEqual(self.names('kilimanjro'), ['Mount Kilimanjaro'])
+        self.assertEqual(self.names('natorn')[0], 'Lake Natron')  # one swap
+        self.assertEqual(self.names('kilimnajaro'), ['Mount Kilimanjaro'])
+        self.assertEqual(self.names('xy'), [])
+
+    def test_normalization(self):
+        self.index.add(suggestion('Olduvái Gorge', 7))
+        self.assertEqual(self.names('olduvai'), ['Olduvái Gorge'])
+        self.assertEqual(self.names('  mount   kili '), ['Mount Kilimanjaro'])
+
+    def test_remove_and_rename_match_a_rebuild(self):
+        self.index.remove('attraction', 2)
+        self.index.add(suggestion('Lake Manyara', 3))
+        rebuilt = SuggestionIndex([
+            suggestion('Serengeti National Park', 1, weight=1),
+            suggestion('Arusha National Park', 4),
+            suggestion('Arusha', 5, weight=0, kind='region'),
+            suggestion('Mount Kilimanjaro', 6),
+            suggestion('Lake Manyara', 3),
+        ])
+
+        def dump(node):
+            return node.top, {char: dump(child) for char, child in node.children.items()}
+
+        self.assertEqual(dump(self.index.root), dump(rebuilt.root))
+        self.assertEqual(self.names('nat'), ['Serengeti National Park', 'Arusha National Park'])
+
+
+class SuggestEndpointTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_index()
+        self.addCleanup(reset_index)
+        self.client = APIClient()
+        user = User.objects.create_user(username='typist', email='type@example.com', password='Pass1234!')
+        self.region = Region.objects.create(
+            name='Arusha', slug='arusha', description='Safari hub.', latitude='-3.3869', longitude='36.6830',
+        )
+        self.attraction = Attraction.objects.create(
+            name='Arusha National Park', slug='arusha-national-park', region=self.region,
+            category='national_park', description='Park.', short_description='Park.',
+            latitude='-3.2500', longitude='36.8500', difficulty_level='easy', access_info='By road.',
+            best_time_to_visit='June-October', seasonal_availability='Year-round',
+            estimated_duration='1 day', created_by=user, is_active=True,
+        )
+
+    def suggest(self, q, **params):
+        response = self.client.get('/api/v1/search/suggest/', {'q': q, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(item['type'], item['slug']) for item in response.data]
+
+    def test_suggest(self):
+        self.assertEqual(self.suggest('aru'), [('region', 'arusha'), ('attraction', 'arusha-national-park')])
+        self.assertEqual(self.suggest('aru', limit=1), [('region', 'arusha')])
+        with self.assertNumQueries(0):
+            self.suggest('parc')
+
+    def test_signals_update_index_in_place(self):
+        index = get_index()
+        self.attraction.name = 'Momella Lakes'
+        self.attraction.slug = 'momella-lakes'
+        self.attraction.save()
+        self.assertIs(get_index(), index)
+        self.assertEqual(self.suggest('aru'), [('region', 'arusha')])
+        self.assertEqual(self.suggest('momela'), [('attraction', 'momella-lakes')])
+
+        self.attraction.is_active = False
+        self.attraction.save()
+        self.assertEqual(self.suggest('momella'), [])
+        self.region.delete()
+        self.assertEqual(self.suggest('aru'), [])
+
+    def test_rebuilds_after_writes_elsewhere(self):
+        index = get_index()
+        Attraction.objects.filter(pk=self.attraction.pk).update(name='Meru Crater')
+        bump_namespace('catalogue')
+        self.assertEqual(self.suggest('meru'), [('attraction', 'arusha-national-park')])
+        self.assertIsNot(get_index(), index)
+
+    def test_rebuilds_when_older_than_max_age(self):
+        index = get_index()
+        Attraction.objects.filter(pk=self.attraction.pk).update(name='Meru Crater')  # as another process would
+        self.assertIs(get_index(), index)
+        with override_settings(CATALOGUE_INDEX_MAX_AGE=0):
+            self.assertEqual(self.suggest('meru'), [('attraction', 'arusha-national-park')])
+        self.assertIsNot(get_index(), index)
+
+    @override_settings(CATALOGUE_INDEX_REBUILD_ASYNC=True)
+    def test_stale_index_is_served_while_rebuilding(self):
+        self.addCleanup(setattr, index_module, '_pending', False)
+        index = get_index()
+        bump_namespace('catalogue')
+        with patch.object(index_module, '_executor') as executor:
+            self.assertIs(get_index(), index)
+            self.assertIs(get_index(), index)
+        executor.submit.assert_called_once_with(index_module._run)
+
+    def test_missing_query(self):
+        response = self.client.get('/api/v1/search/suggest/', {'q': ' '})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/v1/search/suggest/', {'q': 'aru', 'limit': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SuggestScalingTest(ScaledCatalogueMixin, TestCase):
+    scaled_attractions = 500
+
+    def setUp(self):
+        super().setUp()
+        reset_index()
+        self.addCleanup(reset_index)
+
+    def test_fuzzy_lookups_prune_the_trie(self):
+        index = get_index()
+
+        def count(node):
+            return 1 + sum(count(child) for child in node.children.values())
+
+        nodes = count(index.root)
+        words = [a.name.split()[0].lower() for a in Attraction.objects.filter(is_active=True)[:20]]
+        queries = [w[:3] for w in words] + [w[:-2] + w[-1] + w[-2] for w in words if len(w) > 4]
+        for query in queries:
+            with self.subTest(query=query):
+                self.assertTrue(index.search(query))
+                # Independent of machine speed: the edit-distance walk only expands a sliver of the trie.
+                self.assertLess(index.visited, nodes / 100)
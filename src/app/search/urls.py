@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import suggest
+
+urlpatterns = [
+    path('suggest/', suggest, name='search-suggest'),
+]
@@ -0,0 +1,58 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter, OpenApiResponse
+from .index import LIMIT, get_index
+
+
+@extend_schema(
+    tags=['Search'],
+    summary='Type-ahead suggestions',
+    description=(
+        f'Returns up to {LIMIT} attraction and region names matching what has been typed so far, for a '
+        'search box. Any word of a name can match (`crat` finds "Ngorongoro Crater"), accents and '
+        'punctuation are ignored, and small typos are tolerated (one edit from 3 characters, two from 6).\n\n'
+        'Regions come first, then featured attractions. Open the result with `/api/v1/regions/<slug>/` or '
+        '`/api/v1/attractions/<slug>/`; use the `search` parameter of the attraction list for full results.\n\n'
+        'Served from an in-memory index; catalogue changes show up immediately on the server process that '
+        'made them and within `CATALOGUE_INDEX_MAX_AGE` seconds (default 300) on the others.\n\n'
+        '**curl example:**\n'
+        '```bash\n'
+        'curl "https://cf89615f228bb45cc805447510de80.pythonanywhere.com/api/v1/search/suggest/?q=serenget"\n'
+        '```'
+    ),
+    parameters=[
+        OpenApiParameter('q', description='Text typed so far.', required=True, type=str),
+        OpenApiParameter('limit', description=f'Number of suggestions (1-{LIMIT}, default {LIMIT}).', required=False, type=int),
+    ],
+    responses={
+        200: OpenApiResponse(
+            description='Suggestions, best first.',
+            examples=[
+                OpenApiExample(
+                    'Suggestions',
+                    value=[
+                        {'type': 'attraction', 'slug': 'serengeti-national-park', 'name': 'Serengeti National Park'},
+                    ],
+                )
+            ],
+        ),
+        400: OpenApiResponse(description='`q` is missing or `limit` is not an integer.'),
+    },
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def suggest(request):
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'error': 'q parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(int(request.query_params.get('limit', LIMIT)), 1), LIMIT)
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response([
+        {'type': suggestion.kind, 'slug': suggestion.slug, 'name': suggestion.name}
+        for suggestion in get_index().search(query, limit)
+    ])
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import ChangeLog
+
+
+@admin.register(ChangeLog)
+class ChangeLogAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'object_id', 'action', 'changed_at']
+    list_filter = ['kind', 'action']
+    readonly_fields = ['kind', 'object_id', 'action', 'changed_at']
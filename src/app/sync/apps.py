@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class SyncConfig(AppConfig):
+    name = 'app.sync'
+
+    def ready(self):
+        from . import signals  # noqa: F401
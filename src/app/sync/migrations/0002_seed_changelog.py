@@ -0,0 +1,33 @@
+from django.db import migrations
+
+SOURCES = [
+    ('regions', 'Region', 'region'),
+    ('attractions', 'Attraction', 'attraction'),
+    ('attractions', 'AttractionImage', 'image'),
+    ('attractions', 'AttractionTip', 'tip'),
+]
+
+
+def seed_changelog(apps, schema_editor):
+    """Give rows that predate the change log an entry, so a full sync includes them."""
+    ChangeLog = apps.get_model('sync', 'ChangeLog')
+    for app_label, model_name, kind in SOURCES:
+        model = apps.get_model(app_label, model_name)
+        ids = model.objects.order_by('pk').values_list('pk', flat=True)
+        ChangeLog.objects.bulk_create(
+            [ChangeLog(kind=kind, object_id=object_id, action='upsert') for object_id in ids.iterator()],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0001_initial'),
+        ('regions', '0001_initial'),
+        ('attractions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_changelog, migrations.RunPython.noop),
+    ]
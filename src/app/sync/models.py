@@ -0,0 +1,33 @@
+from django.db import models
+
+
+class ChangeLog(models.Model):
+    """
+    Append-only log of catalogue changes. The auto-increment primary key is the
+    sync token handed to clients, so "anything newer than X?" is a single
+    primary-key index probe. Ids can commit out of order, so the token only
+    moves past entries older than ``SYNC_SETTLE_SECONDS`` (see
+    ``SyncService.build_changeset``).
+    """
+    KIND_CHOICES = [
+        ('attraction', 'Attraction'),
+        ('region', 'Region'),
+        ('image', 'Attraction Image'),
+        ('tip', 'Attraction Tip'),
+    ]
+
+    ACTION_CHOICES = [
+        ('upsert', 'Created or updated'),
+        ('delete', 'Deleted'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"#{self.pk} {self.action} {self.kind} {self.object_id}"
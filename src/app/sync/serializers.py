@@ -0,0 +1,33 @@
+from rest_framework import serializers
+from app.attractions.models import Attraction, AttractionImage, AttractionTip
+from app.regions.models import Region
+
+
+class SyncRegionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Region
+        fields = ['id', 'name', 'slug', 'description', 'image', 'latitude', 'longitude', 'updated_at']
+
+
+class SyncAttractionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Attraction
+        fields = [
+            'id', 'name', 'slug', 'region', 'category', 'description', 'short_description',
+            'latitude', 'longitude', 'altitude', 'difficulty_level', 'access_info',
+            'nearest_airport', 'distance_from_airport', 'best_time_to_visit',
+            'seasonal_availability', 'estimated_duration', 'entrance_fee',
+            'requires_guide', 'requires_permit', 'featured_image', 'is_featured', 'updated_at'
+        ]
+
+
+class SyncImageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AttractionImage
+        fields = ['id', 'attraction', 'image', 'caption', 'order']
+
+
+class SyncTipSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AttractionTip
+        fields = ['id', 'attraction', 'title', 'description', 'created_at']
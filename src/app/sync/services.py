@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from app.attractions.models import Attraction, AttractionImage, AttractionTip
+from app.regions.models import Region
+from .models import ChangeLog
+from .serializers import SyncAttractionSerializer, SyncImageSerializer, SyncRegionSerializer, SyncTipSerializer
+
+# kind -> (response key, queryset of syncable rows, serializer)
+SYNC_SOURCES = {
+    'region': ('regions', Region.objects.all(), SyncRegionSerializer),
+    'attraction': ('attractions', Attraction.objects.filter(is_active=True), SyncAttractionSerializer),
+    'image': ('images', AttractionImage.objects.all(), SyncImageSerializer),
+    'tip': ('tips', AttractionTip.objects.all(), SyncTipSerializer),
+}
+
+
+class SyncService:
+    @classmethod
+    def latest_token(cls):
+        return ChangeLog.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    @classmethod
+    def build_changeset(cls, since, limit):
+        """
+        Return everything that changed after change-log id ``since``, at most
+        ``limit`` log entries at a time. Several entries for the same object
+        collapse into its current state (or a tombstone if it is gone).
+
+        Ids are allocated at insert but become visible at commit, so a lower id
+        can appear after a higher one has been synced. Entries younger than
+        ``SYNC_SETTLE_SECONDS`` are still sent, but the token stops before the
+        first of them; the next sync repeats them along with anything that
+        committed late in between.
+        """
+        entries = list(
+            ChangeLog.objects.filter(id__gt=since).order_by('id')
+            .values_list('id', 'kind', 'object_id', 'action', 'changed_at')[:limit + 1]
+        )
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        settled_before = timezone.now() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+        token = since
+        for entry_id, _, _, _, changed_at in entries:
+            if changed_at > settled_before:
+                break
+            token = entry_id
+
+        changeset = {
+            'token': str(token),
+            # A page that is entirely unsettled would repeat itself; stop and let
+            # the client come back later.
+            'has_more': has_more and token != since,
+        }
+        pending = {kind: {} for kind in SYNC_SOURCES}
+        for _, kind, object_id, action, _ in entries:
+            pending[kind][object_id] = action
+
+        for kind, (key, queryset, serializer_class) in SYNC_SOURCES.items():
+            actions = pending[kind]
+            upsert_ids = [object_id for object_id, action in actions.items() if action == 'upsert']
+            rows = list(queryset.filter(pk__in=upsert_ids)) if upsert_ids else []
+            found = {row.pk for row in rows}
+            # Anything we can no longer load (deleted later, or deactivated) is a tombstone.
+            deleted = sorted(object_id for object_id in actions if object_id not in found)
+            changeset[key] = {
+                'updated': serializer_class(rows, many=True).data,
+                'deleted': deleted,
+            }
+        return changeset
@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save
+from app.attractions.models import Attraction, AttractionImage, AttractionTip
+from app.regions.models import Region
+from .models import ChangeLog
+
+SYNC_KINDS = {
+    Attraction: 'attraction',
+    Region: 'region',
+    AttractionImage: 'image',
+    AttractionTip: 'tip',
+}
+
+
+def record_changes(kind, object_ids, action='upsert'):
+    """Log changes made through bulk writes, which bypass model signals."""
+    ChangeLog.objects.bulk_create(
+        [ChangeLog(kind=kind, object_id=object_id, action=action) for object_id in object_ids],
+        batch_size=1000,
+    )
+
+
+def log_save(sender, instance, **kwargs):
+    ChangeLog.objects.create(kind=SYNC_KINDS[sender], object_id=instance.pk, action='upsert')
+
+
+def log_delete(sender, instance, **kwargs):
+    ChangeLog.objects.create(kind=SYNC_KINDS[sender], object_id=instance.pk, action='delete')
+
+
+for model in SYNC_KINDS:
+    post_save.connect(log_save, sender=model, dispatch_uid=f'sync_log_save_{model.__name__}')
+    post_delete.connect(log_delete, sender=model, dispatch_uid=f'sync_log_delete_{model.__name__}')
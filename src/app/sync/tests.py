@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework import status
+from app.core.testing import ScaledCatalogueMixin
+from django.contrib.auth import get_user_model
+from app.regions.models import Region
+from app.attractions.models import Attraction, AttractionTip
+from .models import ChangeLog
+from .services import SyncService
+
+User = get_user_model()
+
+
+class SyncAPITest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = '/api/v1/sync/'
+        self.user = User.objects.create_user(username='syncuser', email='sync@example.com', password='Pass1234!')
+        self.region = Region.objects.create(
+            name='Arusha', slug='arusha', description='Safari hub.',
+            latitude='-3.3869', longitude='36.6830',
+        )
+        self.attraction = Attraction.objects.create(
+            name='Serengeti', slug='serengeti', region=self.region,
+            category='national_park', description='Great wildlife reserve.',
+            short_description='Wildlife reserve.', latitude='-2.3333', longitude='34.8333',
+            difficulty_level='easy', access_info='By road or air.',
+            best_time_to_visit='June-October', seasonal_availability='Year-round',
+            estimated_duration='3-5 days', created_by=self.user,
+        )
+
+    def test_full_sync(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([a['slug'] for a in response.data['attractions']['updated']], ['serengeti'])
+        self.assertEqual([r['slug'] for r in response.data['regions']['updated']], ['arusha'])
+
+    def test_no_changes_is_single_query(self):
+        token = self.client.get(self.url).data['token']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'since': token})
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data['token'], token)
+        self.assertEqual(response.data['attractions'], {'updated': [], 'deleted': []})
+
+    def test_delete_leaves_tombstone(self):
+        tip = AttractionTip.objects.create(attraction=self.attraction, title='Go early', description='Beat the crowds.')
+        token = self.client.get(self.url).data['token']
+        attraction_id, tip_id = self.attraction.pk, tip.pk
+        self.attraction.delete()
+        response = self.client.get(self.url, {'since': token})
+        self.assertEqual(response.data['attractions']['deleted'], [attraction_id])
+        self.assertEqual(response.data['tips']['deleted'], [tip_id])
+
+    def test_deactivated_attraction_reported_as_deleted(self):
+        token = self.client.get(self.url).data['token']
+        self.attraction.is_active = False
+        self.attraction.save()
+        response = self.client.get(self.url, {'since': token})
+        self.assertEqual(response.data['attractions']['deleted'], [self.attraction.pk])
+
+    def test_paginates_with_has_more(self):
+        with self.settings(SYNC_PAGE_SIZE=1):
+            response = self.client.get(self.url)
+        self.assertTrue(response.data['has_more'])
+
+    def test_late_commit_of_lower_id_is_not_skipped(self):
+        token = self.client.get(self.url).data['token']
+        # Transaction A takes the next id but has not committed yet; B takes the
+        # one after and commits first.
+        late = ChangeLog.objects.create(kind='attraction', object_id=self.attraction.pk, action='upsert')
+        ChangeLog.objects.create(kind='region', object_id=self.region.pk, action='upsert')
+        late_id = late.pk
+        late.delete()
+
+        with self.settings(SYNC_SETTLE_SECONDS=60):
+            response = self.client.get(self.url, {'since': token})
+            self.assertEqual([r['slug'] for r in response.data['regions']['updated']], ['arusha'])
+            self.assertEqual(response.data['token'], token)
+
+            ChangeLog.objects.create(id=late_id, kind='attraction', object_id=self.attraction.pk, action='upsert')
+            response = self.client.get(self.url, {'since': response.data['token']})
+            self.assertEqual([a['slug'] for a in response.data['attractions']['updated']], ['serengeti'])
+
+    def test_token_advances_past_settled_entries(self):
+        token = self.client.get(self.url).data['token']
+        self.attraction.save()
+        latest = SyncService.latest_token()
+        with self.settings(SYNC_SETTLE_SECONDS=60):
+            self.assertEqual(self.client.get(self.url, {'since': token}).data['token'], token)
+            ChangeLog.objects.filter(id__gt=int(token)).update(changed_at=timezone.now() - timedelta(minutes=5))
+            self.assertEqual(self.client.get(self.url, {'since': token}).data['token'], str(latest))
+
+    def test_invalid_token(self):
+        response = self.client.get(self.url, {'since': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SyncQueryBudgetTest(ScaledCatalogueMixin, TestCase):
+    def test_full_sync(self):
+        with self.assertQueryBudget(6, max_time_ms=500):
+            response = APIClient().get('/api/v1/sync/')
+        self.assertEqual(len(response.data['attractions']['updated']), self.scaled_attractions)
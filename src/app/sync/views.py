@@ -0,0 +1,59 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from django.conf import settings
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample, OpenApiResponse
+from .services import SyncService
+
+_SYNC_EXAMPLE = {
+    'token': '1842',
+    'has_more': False,
+    'attractions': {
+        'updated': [{'id': 1, 'name': 'Mount Kilimanjaro', 'slug': 'mount-kilimanjaro', 'region': 8, '...': '...'}],
+        'deleted': [57],
+    },
+    'regions': {'updated': [], 'deleted': []},
+    'images': {'updated': [], 'deleted': [203, 204]},
+    'tips': {'updated': [], 'deleted': []},
+}
+
+
+@extend_schema(
+    tags=['Sync'],
+    summary='Delta sync for offline clients',
+    description=(
+        'Returns attractions, regions, images and tips created, updated or deleted since `since`.\n\n'
+        '1. On first launch call without `since` to download the full catalogue.\n'
+        '2. Store the returned `token` and send it as `since` on the next sync.\n'
+        '3. While `has_more` is `true`, call again immediately with the new `token`.\n\n'
+        'Each section lists current records under `updated` and ids to remove under `deleted`. '
+        'Deactivated attractions are reported as deleted.\n\n'
+        '**curl example:**\n'
+        '```bash\n'
+        'curl "https://cf89615f228bb45cc805447510de80.pythonanywhere.com/api/v1/sync/?since=1842"\n'
+        '```'
+    ),
+    parameters=[
+        OpenApiParameter('since', description='Token from the previous sync. Omit (or `0`) for a full download.', required=False, type=str),
+    ],
+    responses={
+        200: OpenApiResponse(
+            description='Changes since the token, plus the token to use next time.',
+            examples=[OpenApiExample('Delta', value=_SYNC_EXAMPLE)],
+        ),
+        400: OpenApiResponse(
+            description='`since` is not a valid token.',
+            examples=[OpenApiExample('Invalid token', value={'error': 'Invalid sync token'})],
+        ),
+    },
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def sync(request):
+    since = request.query_params.get('since') or '0'
+    if not since.isdigit():
+        return Response({'error': 'Invalid sync token'}, status=status.HTTP_400_BAD_REQUEST)
+
+    changeset = SyncService.build_changeset(int(since), settings.SYNC_PAGE_SIZE)
+    return Response(changeset)
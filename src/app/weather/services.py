@@ -2,6 +2,8 @@ import requests
 from django.conf import settings
 from django.core.cache import cache
 from decimal import Decimal
+from app.core.metrics import track_upstream
+from app.core.perf import timed
 from .models import WeatherCache
 
 
@@ -41,7 +43,7 @@ class WeatherService:
 
     @classmethod
     def fetch_current_weather(cls, latitude, longitude):
-        cache_key = f'weather_current_{latitude}_{longitude}'
+        cache_key = f'weather_current:{latitude}:{longitude}'
         cached_data = cache.get(cache_key)
         
         if cached_data:
@@ -55,8 +57,9 @@ class WeatherService:
         }
 
         try:
-            response = requests.get(cls.BASE_URL, params=params, timeout=10)
-            response.raise_for_status()
+            with timed('upstream'), track_upstream('open-meteo'):
+                response = requests.get(cls.BASE_URL, params=params, timeout=10)
+                response.raise_for_status()
             data = response.json()
             
             current = data.get('current', {})
@@ -81,7 +84,7 @@ class WeatherService:
 
     @classmethod
     def fetch_forecast(cls, latitude, longitude, days=7):
-        cache_key = f'weather_forecast_{latitude}_{longitude}_{days}'
+        cache_key = f'weather_forecast:{latitude}:{longitude}:{days}'
         cached_data = cache.get(cache_key)
         
         if cached_data:
@@ -96,8 +99,9 @@ class WeatherService:
         }
 
         try:
-            response = requests.get(cls.BASE_URL, params=params, timeout=10)
-            response.raise_for_status()
+            with timed('upstream'), track_upstream('open-meteo'):
+                response = requests.get(cls.BASE_URL, params=params, timeout=10)
+                response.raise_for_status()
             data = response.json()
             
             daily = data.get('daily', {})
@@ -3,6 +3,7 @@ from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from unittest.mock import patch
+from app.core.testing import ScaledCatalogueMixin
 from app.regions.models import Region
 from app.attractions.models import Attraction
 from .models import WeatherCache, SeasonalWeatherPattern
@@ -74,3 +75,37 @@ class WeatherAPITest(TestCase):
         response = self.client.get('/api/v1/weather/seasonal/?attraction=kilimanjaro')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
+
+
+class WeatherQueryBudgetTest(ScaledCatalogueMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.slug = Attraction.objects.order_by('id').values_list('slug', flat=True).first()
+
+    def test_list_and_detail(self):
+        with self.assertQueryBudget(1, max_time_ms=500):
+            response = self.client.get('/api/v1/weather/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json())
+        pk = WeatherCache.objects.values_list('pk', flat=True).first()
+        with self.assertQueryBudget(1):
+            response = self.client.get(f'/api/v1/weather/{pk}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json())
+
+    def test_current_forecast_and_seasonal(self):
+        with patch('app.weather.views.WeatherService.fetch_current_weather', return_value={'temperature': 20.5}):
+            with self.assertQueryBudget(1):
+                response = self.client.get(f'/api/v1/weather/current/?attraction={self.slug}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json())
+        with patch('app.weather.views.WeatherService.fetch_forecast', return_value={'dates': []}):
+            with self.assertQueryBudget(1):
+                response = self.client.get(f'/api/v1/weather/forecast/?attraction={self.slug}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json())
+        with self.assertQueryBudget(2):
+            response = self.client.get(f'/api/v1/weather/seasonal/?attraction={self.slug}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json())
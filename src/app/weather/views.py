@@ -1,9 +1,11 @@
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample, OpenApiResponse
 from app.attractions.models import Attraction
+from app.core.perf import timed
+from app.core.throttling import WeatherRateThrottle
 from .models import WeatherCache, SeasonalWeatherPattern
 from .serializers import WeatherCacheSerializer, SeasonalWeatherPatternSerializer, CurrentWeatherSerializer
 from .services import WeatherService
@@ -59,9 +61,11 @@ _FORECAST_EXAMPLE = {
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def weather_list(request):
-    weather_caches = WeatherCache.objects.all()
+    weather_caches = WeatherCache.objects.select_related('attraction')
     serializer = WeatherCacheSerializer(weather_caches, many=True)
-    return Response(serializer.data)
+    with timed('serialize'):
+        data = serializer.data
+    return Response(data)
 
 
 @extend_schema(
@@ -96,11 +100,13 @@ def weather_list(request):
 @permission_classes([IsAuthenticatedOrReadOnly])
 def weather_detail(request, pk):
     try:
-        weather_cache = WeatherCache.objects.get(pk=pk)
+        weather_cache = WeatherCache.objects.select_related('attraction').get(pk=pk)
     except WeatherCache.DoesNotExist:
         return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
     serializer = WeatherCacheSerializer(weather_cache)
-    return Response(serializer.data)
+    with timed('serialize'):
+        data = serializer.data
+    return Response(data)
 
 
 @extend_schema(
@@ -151,6 +157,7 @@ def weather_detail(request, pk):
 )
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrReadOnly])
+@throttle_classes([WeatherRateThrottle])
 def current_weather(request):
     lat = request.query_params.get('lat')
     lon = request.query_params.get('lon')
@@ -177,7 +184,9 @@ def current_weather(request):
 
     serializer = CurrentWeatherSerializer(data=weather_data)
     serializer.is_valid()
-    return Response(serializer.data)
+    with timed('serialize'):
+        data = serializer.data
+    return Response(data)
 
 
 @extend_schema(
@@ -230,6 +239,7 @@ def current_weather(request):
 )
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrReadOnly])
+@throttle_classes([WeatherRateThrottle])
 def forecast_weather(request):
     lat = request.query_params.get('lat')
     lon = request.query_params.get('lon')
@@ -338,6 +348,8 @@ def seasonal_weather(request):
         attraction = Attraction.objects.get(slug=attraction_slug)
         patterns = SeasonalWeatherPattern.objects.filter(attraction=attraction)
         serializer = SeasonalWeatherPatternSerializer(patterns, many=True)
-        return Response(serializer.data)
+        with timed('serialize'):
+            data = serializer.data
+        return Response(data)
     except Attraction.DoesNotExist:
         return Response({'error': 'Attraction not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cofig.settings')
 
 application = get_asgi_application()
+
+# Build or load the static OpenAPI schema before the first request needs it.
+from app.core.schema import load_schema  # noqa: E402
+
+load_schema()
@@ -12,7 +12,8 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 from pathlib import Path
 from datetime import timedelta
-from decouple import config
+from decouple import Csv, config
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -41,6 +42,7 @@ THIRD_PARTY_APPS = [
     # Add third-party apps here (e.g., 'rest_framework', 'corsheaders', etc.)
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
     'cloudinary_storage',
     'cloudinary',
@@ -52,6 +54,10 @@ CUSTOM_APPS = [
     "app.attractions",
     "app.regions",
     "app.weather",
+    "app.core",
+    "app.sync",
+    "app.itineraries",
+    "app.search",
 ]
 
 INSTALLED_APPS = DEFAULT_APPS + THIRD_PARTY_APPS + CUSTOM_APPS
@@ -60,8 +66,13 @@ INSTALLED_APPS = DEFAULT_APPS + THIRD_PARTY_APPS + CUSTOM_APPS
 AUTH_USER_MODEL = 'accounts.User'
 
 MIDDLEWARE = [
+    'app.core.perf.PerformanceMiddleware',
+    'app.core.metrics.MetricsMiddleware',
+    'app.core.slowlog.SlowQueryMiddleware',
+    'app.core.db.routers.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'app.core.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -90,6 +101,13 @@ WSGI_APPLICATION = 'cofig.wsgi.application'
 
 
 # Database
+# Persistent connections: each worker thread keeps its connection for
+# DATABASE_CONN_MAX_AGE seconds (0 = close after every request) and, with
+# health checks on, pings it before reuse so a server-side timeout never
+# surfaces as a request error.
+DATABASE_CONN_MAX_AGE = config('DATABASE_CONN_MAX_AGE', default=60, cast=int)
+DATABASE_CONN_HEALTH_CHECKS = config('DATABASE_CONN_HEALTH_CHECKS', default=True, cast=bool)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.mysql',
@@ -98,9 +116,27 @@ DATABASES = {
         'PASSWORD': config('DATABASE_PASSWORD', default=''),
         'HOST': config('DATABASE_HOST', default='localhost'),
         'PORT': config('DATABASE_PORT', default=3306),
+        'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DATABASE_CONN_HEALTH_CHECKS,
     }
 }
 
+# Pooled mode for ASGI deployments, where persistent per-thread connections
+# pile up across the sync_to_async thread pool. Requires
+# `pip install django-db-connection-pool[mysql]`; the pool owns reuse, so
+# Django closes (returns) the connection after every request.
+if config('DATABASE_POOL', default=False, cast=bool):
+    DATABASES['default'].update({
+        'ENGINE': 'dj_db_conn_pool.backends.mysql',
+        'CONN_MAX_AGE': 0,
+        'POOL_OPTIONS': {
+            'POOL_SIZE': config('DATABASE_POOL_SIZE', default=10, cast=int),
+            'MAX_OVERFLOW': config('DATABASE_POOL_MAX_OVERFLOW', default=10, cast=int),
+            'RECYCLE': config('DATABASE_POOL_RECYCLE', default=3600, cast=int),
+            'PRE_PING': DATABASE_CONN_HEALTH_CHECKS,
+        },
+    })
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -118,6 +154,29 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing: PASSWORD_HASHER picks the algorithm for new hashes; the
+# others stay listed so existing hashes verify and are rehashed on login.
+# Tune the costs per machine with `manage.py benchmark_hashers --budget-ms`.
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='argon2')
+_PASSWORD_HASHERS = {
+    'argon2': 'app.accounts.hashers.TunedArgon2PasswordHasher',
+    'pbkdf2': 'app.accounts.hashers.TunedPBKDF2PasswordHasher',
+}
+if PASSWORD_HASHER not in _PASSWORD_HASHERS:
+    raise ImproperlyConfigured(f"PASSWORD_HASHER must be one of: {', '.join(_PASSWORD_HASHERS)}")
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+# The Argon2 defaults are the OWASP minimum (19 MiB, 2 passes, 1 lane): each
+# login holds that memory and a core, so raise them only after measuring.
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=2, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=19456, cast=int)  # KiB
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', default=1, cast=int)
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=600000, cast=int)
+
 
 # Internationalization
 LANGUAGE_CODE = 'en-us'
@@ -145,8 +204,12 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        'app.core.perf.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'app.accounts.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -158,6 +221,17 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Per-scope limits for app.core.throttling; an empty value disables a scope.
+    'DEFAULT_THROTTLE_RATES': {
+        'login': config('THROTTLE_LOGIN_RATE', default='10/min') or None,
+        'register': config('THROTTLE_REGISTER_RATE', default='5/hour') or None,
+        'weather': config('THROTTLE_WEATHER_RATE', default='60/min') or None,
+    },
+    # Number of trusted reverse proxies that append to X-Forwarded-For (1 on
+    # PythonAnywhere, set below). 0 keys throttles on REMOTE_ADDR: the header is
+    # client-controlled, so trusting it without a proxy lets anyone rotate it.
+    # Counters are per worker process with the LocMem cache (see app.core.throttling).
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
 }
 
 # JWT Configuration
@@ -167,8 +241,20 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Embed a password hash so a password change revokes outstanding tokens
+    # (checked on write requests by StatelessJWTAuthentication).
+    'CHECK_REVOKE_TOKEN': True,
+    # Answers replayed (already rotated) refresh tokens from the cache; see
+    # app/accounts/tokens.py. Expired rows are removed by `prune_tokens`.
+    'TOKEN_REFRESH_SERIALIZER': 'app.accounts.tokens.CachedTokenRefreshSerializer',
 }
 
+# Reads authenticate from token claims alone; writes load the user from the
+# cache, kept for this many seconds (see app/accounts/authentication.py).
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=60, cast=int)
+# Rendered GET /auth/profile/ responses; dropped whenever the user is saved.
+PROFILE_CACHE_TIMEOUT = config('PROFILE_CACHE_TIMEOUT', default=300, cast=int)
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     config('FRONTEND_URL', default='http://localhost:3000'),
@@ -181,12 +267,78 @@ CORS_ALLOW_CREDENTIALS = True
 # Cache Configuration (in-memory cache, no Redis required)
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'app.core.perf.InstrumentedLocMemCache',
         'LOCATION': 'tour-api-cache',
         'TIMEOUT': 300,
     }
 }
 
+# Fraction of requests (0-1) instrumented by app.core.perf.PerformanceMiddleware:
+# DB/cache/upstream/serializer timings go to a Server-Timing header and the
+# app.perf logger. 0 turns instrumentation off entirely.
+PERF_SAMPLE_RATE = config('PERF_SAMPLE_RATE', default=0.0, cast=float)
+PERF_SERVER_TIMING = config('PERF_SERVER_TIMING', default=True, cast=bool)
+
+# Bearer token required to scrape /metrics. Without one the endpoint answers
+# 404 except to INTERNAL_IPS (e.g. 127.0.0.1 for a scraper on the same
+# host with no proxy in front). Set PROMETHEUS_MULTIPROC_DIR in the environment
+# when running several workers.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+INTERNAL_IPS = config('INTERNAL_IPS', default='', cast=Csv())
+
+# Slow query / request capture (app.core.slowlog). Queries over SLOW_QUERY_MS
+# are stored with parameters, and with EXPLAIN output for a sampled fraction of
+# requests; 0 disables either threshold. Records go to SLOW_LOG_FILE (an empty
+# value sends them to stderr), which rolls over at SLOW_LOG_MAX_BYTES keeping
+# SLOW_LOG_BACKUPS copies. Size rollover assumes a single writing process; with
+# several workers set SLOW_LOG_MAX_BYTES=0 and rotate externally (logrotate).
+# Summarize with: python manage.py slow_queries
+SLOW_QUERY_MS = config('SLOW_QUERY_MS', default=200, cast=float)
+SLOW_REQUEST_MS = config('SLOW_REQUEST_MS', default=1000, cast=float)
+SLOW_QUERY_EXPLAIN_RATE = config('SLOW_QUERY_EXPLAIN_RATE', default=0.05, cast=float)
+SLOW_LOG_FILE = config('SLOW_LOG_FILE', default=str(BASE_DIR / 'logs' / 'slow.jsonl'))
+SLOW_LOG_MAX_BYTES = config('SLOW_LOG_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+SLOW_LOG_BACKUPS = config('SLOW_LOG_BACKUPS', default=5, cast=int)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'app.perf': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# Cached catalogue responses (featured, by_region, region list) are stored
+# pre-compressed and invalidated on any attraction/region change
+CATALOGUE_CACHE_TIMEOUT = 3600  # 1 hour
+
+# In-process catalogue indexes (search suggestions, map clusters) follow writes
+# made by their own process and, through the catalogue namespace version, by
+# other processes only when CACHES is shared. With the per-process LocMem cache
+# they are rebuilt at least this often (seconds) to pick those writes up.
+CATALOGUE_INDEX_MAX_AGE = config('CATALOGUE_INDEX_MAX_AGE', default=300, cast=int)
+# Rebuild those indexes on a background thread while queries keep using the
+# previous one (False rebuilds in the calling thread: on commit, or in the request).
+CATALOGUE_INDEX_REBUILD_ASYNC = config('CATALOGUE_INDEX_REBUILD_ASYNC', default=True, cast=bool)
+
+# Maximum change-log entries returned by one /api/v1/sync/ call
+SYNC_PAGE_SIZE = 1000
+
+# Change-log ids are allocated at insert but visible only at commit, so a slow
+# transaction can commit a lower id after a higher one was synced. Entries newer
+# than this are sent but not passed by the sync token; keep it above the longest
+# catalogue write transaction.
+SYNC_SETTLE_SECONDS = config('SYNC_SETTLE_SECONDS', default=10, cast=int)
+
+# Rows fetched per batch by the streaming attraction export
+EXPORT_CHUNK_SIZE = 500
+
+# Rows validated and written per transaction by the bulk attraction import
+IMPORT_CHUNK_SIZE = 500
+
 # Weather API Configuration
 WEATHER_API_BASE_URL = 'https://api.open-meteo.com/v1/forecast'
 WEATHER_CACHE_TIMEOUT = 1800  # 30 minutes
@@ -199,6 +351,27 @@ SPECTACULAR_SETTINGS = {
     'SERVE_INCLUDE_SCHEMA': False,
 }
 
+# Pre-built schema file served at /api/schema/ (see `manage.py generate_schema`)
+OPENAPI_SCHEMA_DIR = config('OPENAPI_SCHEMA_DIR', default=str(BASE_DIR / 'schema'))
+OPENAPI_SCHEMA_MAX_AGE = config('OPENAPI_SCHEMA_MAX_AGE', default=86400, cast=int)
+
+# Memory-mapped attraction distance matrix (see `manage.py build_distance_matrix`)
+# and how many nearest neighbours are precomputed per attraction.
+DISTANCE_MATRIX_DIR = config('DISTANCE_MATRIX_DIR', default=str(BASE_DIR / 'data' / 'distances'))
+DISTANCE_MATRIX_NEIGHBOURS = config('DISTANCE_MATRIX_NEIGHBOURS', default=32, cast=int)
+
+# Similar-attraction recommendations (see `manage.py build_similar_attractions`):
+# neighbours stored per attraction, the TF-IDF vocabulary size, where the fitted
+# model is stored, and whether edits are applied on a background thread after
+# commit (False applies them on commit, in the saving thread).
+RECOMMENDATION_TOP_K = config('RECOMMENDATION_TOP_K', default=10, cast=int)
+RECOMMENDATION_MAX_FEATURES = config('RECOMMENDATION_MAX_FEATURES', default=1000, cast=int)
+RECOMMENDATION_DIR = config('RECOMMENDATION_DIR', default=str(BASE_DIR / 'data' / 'recommendations'))
+RECOMMENDATION_REFRESH_ASYNC = config('RECOMMENDATION_REFRESH_ASYNC', default=True, cast=bool)
+
+# Keeps tests away from real file-backed state such as DISTANCE_MATRIX_DIR.
+TEST_RUNNER = 'app.core.testing.IsolatedTestRunner'
+
 # PythonAnywhere production overrides
 # These activate when ON_PYTHONANYWHERE=True is set in the server .env
 if config('ON_PYTHONANYWHERE', default=False, cast=bool):
@@ -209,11 +382,43 @@ if config('ON_PYTHONANYWHERE', default=False, cast=bool):
 
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
+            # WAL + tuned pragmas on connect; see app/core/db/backends/sqlite3/base.py
+            'ENGINE': 'app.core.db.backends.sqlite3',
             'NAME': Path.home() / config('PYTHONANYWHERE_USERNAME', default='app') / 'xenohuru-api' / 'db.sqlite3',
+            'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DATABASE_CONN_HEALTH_CHECKS,
+            'TRANSACTION_MODE': config('SQLITE_TRANSACTION_MODE', default='IMMEDIATE'),
+            'PRAGMAS': {
+                'journal_mode': config('SQLITE_JOURNAL_MODE', default='WAL'),
+                'synchronous': config('SQLITE_SYNCHRONOUS', default='NORMAL'),
+                'mmap_size': config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),
+                'cache_size': config('SQLITE_CACHE_SIZE', default=-20000, cast=int),
+                'busy_timeout': config('SQLITE_BUSY_TIMEOUT', default=5000, cast=int),
+            },
         }
     }
 
+    # PythonAnywhere's front-end proxy appends the client IP to X-Forwarded-For.
+    REST_FRAMEWORK['NUM_PROXIES'] = config('NUM_PROXIES', default=1, cast=int)
+
     STATIC_ROOT = BASE_DIR / 'staticfiles'
     MEDIA_ROOT = Path.home() / config('PYTHONANYWHERE_USERNAME', default='app') / 'xenohuru-api' / 'media'
 
+
+# Read replicas: GET/HEAD traffic is routed to these aliases by
+# app.core.db.routers.ReadReplicaRouter; clients that just wrote are pinned to
+# the primary for DATABASE_REPLICA_PIN_SECONDS. DATABASE_REPLICAS is a comma
+# list of SQLite files, or of MySQL `host` / `host/schema` entries. Locally:
+#   DATABASE_REPLICAS=/tmp/replica.sqlite3 + manage.py sync_sqlite_replicas
+DATABASE_REPLICAS = []
+for _i, _replica in enumerate(config('DATABASE_REPLICAS', default='', cast=Csv()), start=1):
+    if DATABASES['default']['ENGINE'].endswith('sqlite3'):
+        _location = {'NAME': _replica}
+    else:
+        _host, _, _name = _replica.partition('/')
+        _location = {'HOST': _host or DATABASES['default']['HOST'], 'NAME': _name or DATABASES['default']['NAME']}
+    DATABASES[f'replica{_i}'] = {**DATABASES['default'], **_location, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica{_i}')
+
+DATABASE_ROUTERS = ['app.core.db.routers.ReadReplicaRouter']
+DATABASE_REPLICA_PIN_SECONDS = config('DATABASE_REPLICA_PIN_SECONDS', default=5, cast=int)
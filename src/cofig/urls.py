@@ -19,7 +19,8 @@ from django.urls import path, include
 from rest_framework import permissions
 from django.conf import settings
 from django.conf.urls.static import static
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from drf_spectacular.views import SpectacularSwaggerView
+from app.core.views import metrics, openapi_schema
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -30,10 +31,16 @@ urlpatterns = [
     path('api/v1/regions/', include('app.regions.urls')),
     path('api/v1/attractions/', include('app.attractions.urls')),
     path('api/v1/weather/', include('app.weather.urls')),
+    path('api/v1/sync/', include('app.sync.urls')),
+    path('api/v1/itineraries/', include('app.itineraries.urls')),
+    path('api/v1/search/', include('app.search.urls')),
 
     # API schema
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+    path('api/schema/', openapi_schema, name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='api-docs'),
+
+    # Prometheus scrape target
+    path('metrics', metrics, name='metrics'),
 ]
 
 if settings.DEBUG:
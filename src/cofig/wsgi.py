@@ -23,3 +23,16 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cofig.settings')
 
 application = get_wsgi_application()
 
+# Build or load the static OpenAPI schema before the first request needs it.
+from app.core.schema import load_schema  # noqa: E402
+
+load_schema()
+
+# Build the type-ahead index so the first /search/suggest/ request does not pay for it.
+from django.db import DatabaseError  # noqa: E402
+from app.search.index import get_index  # noqa: E402
+
+try:
+    get_index()
+except DatabaseError:
+    pass  # e.g. before the first migrate; built on first use instead